@@ -40,6 +40,8 @@ from googleapis.codegen import data_types
 from googleapis.codegen import template_objects
 from googleapis.codegen import utilities
 from googleapis.codegen.api_exception import ApiException
+from googleapis.codegen.schema import BuildResult
+from googleapis.codegen.schema import RunBuilder
 from googleapis.codegen.schema import Schema
 from googleapis.codegen.utilities import convert_size
 
@@ -225,14 +227,18 @@ class Api(template_objects.CodeObject):
           # The error will be reported elsewhere
           continue
         schema = self._schemas[name]
-        for prop in schema.values.get('properties'):
-          if prop.values['wireName'] == info['discriminant']:
-            # Filter out the discriminant property as it is already
-            # contained in the base type.
-            schema.SetTemplateValue(
-                'properties',
-                [p for p in schema.values.get('properties') if p != prop])
-            break
+        referenced = schema
+        if isinstance(referenced, data_types.SchemaReference):
+          referenced = referenced.referenced_schema
+        prop = None
+        if isinstance(referenced, Schema):
+          prop = referenced.PropertyByWireName(info['discriminant'])
+        if prop:
+          # Filter out the discriminant property as it is already
+          # contained in the base type.
+          schema.SetTemplateValue(
+              'properties',
+              [p for p in schema.values.get('properties') if p != prop])
         else:
           logging.warn("Variant schema '%s' for base schema '%s' "
                        "has not the expected discriminant property '%s'.",
@@ -360,20 +366,67 @@ class Api(template_objects.CodeObject):
     Returns:
       A Schema object.
     """
+    return RunBuilder(self.DataTypeBuilder(type_dict, default_name,
+                                           parent=parent, wire_name=wire_name))
 
+  def DataTypeBuilder(self, type_dict, default_name, parent=None,
+                      wire_name=None, parent_path=None):
+    """Returns a builder which does the work of DataTypeFromJson.
+
+    See schema.RunBuilder for how builders are run.
+
+    Args:
+      type_dict: A dict of the form expected of a request or response member
+        of a method description.
+      default_name: The unique name to give the schema if we have to create it.
+      parent: The schema where I was referenced.
+      wire_name: The name which will identify objects of this type in data on
+        the wire.
+      parent_path: (str) The path key of parent, if the caller knows it.
+
+    Yields:
+      Nested builders, then a BuildResult of a Schema object.
+    """
     # new or not initialized, create a fresh one
-    schema = Schema.Create(self, default_name, type_dict or {}, wire_name,
-                           parent)
+    schema = yield Schema.CreateBuilder(self, default_name, type_dict or {},
+                                        wire_name, parent,
+                                        parent_path=parent_path)
     # Only put it in our by-name list if it is a real object
     if isinstance(schema, Schema) or isinstance(schema, data_types.MapDataType):
       # Use the path to the schema as a key. This means that an anonymous class
       # for the 'person' property under the schema 'Activity' will have the
       # unique name 'Activity.person', rather than 'ActivityPerson'.
-      path = '.'.join(
-          [a.values.get('wireName', '<anon>') for a in schema.full_path])
+      # A $ref may have given us a schema defined somewhere else, in which case
+      # the parent_path we were given is not for its parent.
+      path = self.SchemaPath(
+          schema, parent_path if schema.parent is parent else None)
       _LOGGER.debug('DataTypeFromJson: add %s to cache', path)
       self._schemas[path] = schema
-    return schema
+    yield BuildResult(schema)
+
+  @staticmethod
+  def SchemaPath(code_object, parent_path=None):
+    """Returns the path key of an object in the API tree.
+
+    The path key is the '.' joined list of wire names from the top of the tree
+    down to the object.
+
+    Args:
+      code_object: (CodeObject) The object.
+      parent_path: (str) The path key of the object's parent, if known. Passing
+        this avoids walking all the way up the tree.
+
+    Returns:
+      (str) The path key.
+    """
+    name = code_object.values.get('wireName', '<anon>')
+    parent = code_object.parent
+    if not parent:
+      return name
+    if parent_path is None:
+      parent_path = '.'.join(
+          [a.values.get('wireName', '<anon>') for a in parent.full_path])
+    return '%s.%s' % (parent_path, name)
 
   def AddMethod(self, method):
     """Add a new method to the set of all methods."""
@@ -647,6 +700,7 @@ class Method(template_objects.CodeObject):
           handle.
     """
     super(Method, self).__init__(def_dict, api, parent=(parent or api))
+    self._parameters_by_wire_name = {}
     # TODO(user): Fix java templates to name vs. wireName correctly. Then
     # change the __init__ to have wire_name=def_dict.get('id') or name
     # then eliminate this line.
@@ -705,6 +759,9 @@ class Method(template_objects.CodeObject):
     # more human readable definition, rather than the order of the parameters
     # in the discovery doc.
     order = self.values.get('parameterOrder', [])
+    position = {}
+    for index, wire_name in enumerate(order):
+      position.setdefault(wire_name, index)
     req_parameters = []
     opt_parameters = []
     for name, def_dict in self.values.get('parameters', {}).iteritems():
@@ -717,14 +774,12 @@ class Method(template_objects.CodeObject):
       # Standard params are part of the generic request class
       # We want to push all parameters that aren't declared inside
       # parameterOrder after those that are.
-      if param.values['wireName'] in order:
+      if param.values['wireName'] in position:
         req_parameters.append(param)
       else:
         # optional parameters are appended in the order they're declared.
         opt_parameters.append(param)
-    # pylint: disable=g-long-lambda
-    req_parameters.sort(lambda x, y: cmp(order.index(x.values['wireName']),
-                                         order.index(y.values['wireName'])))
+    req_parameters.sort(key=lambda p: position[p.values['wireName']])
     req_parameters.extend(opt_parameters)
     self.SetTemplateValue('parameters', req_parameters)
 
@@ -753,11 +808,13 @@ class Method(template_objects.CodeObject):
 
   def _InitPageable(self, api):
     response_type = self.values.get('responseType')
-    if (response_type != api.void_type
-        and self.FindCodeObjectWithWireName(
-            response_type.values.get('properties'), 'nextPageToken')
-        and self.FindCodeObjectWithWireName(
-            self.optional_parameters, 'pageToken')):
+    if isinstance(response_type, data_types.SchemaReference):
+      response_type = response_type.referenced_schema
+    if not isinstance(response_type, Schema):
+      return
+    page_token = self.ParameterByWireName('pageToken')
+    if (response_type.PropertyByWireName('nextPageToken')
+        and page_token and not page_token.required):
       self.SetTemplateValue('isPageable', True)
 
   def _SetUploadTemplateValues(self, upload_protocol, protocol_dict):
@@ -776,6 +833,39 @@ class Method(template_objects.CodeObject):
       self.SetTemplateValue('%s_upload_multipart' % upload_protocol,
                             protocol_dict.get('multipart', False))
 
+  def SetTemplateValue(self, name, value, meaning=None):
+    """Adds a name/value pair to the template.
+
+    Overridden so that the index of parameters by wire name is rebuilt
+    whenever the parameter list is replaced.
+
+    Args:
+      name: (str) name of the value.
+      value: (object) the value.
+      meaning: (str) description of the value.
+    """
+    super(Method, self).SetTemplateValue(name, value, meaning=meaning)
+    if name == 'parameters':
+      self._parameters_by_wire_name = dict(
+          (p.values['wireName'], p) for p in value or [])
+
+  def DeleteTemplateValue(self, name):
+    """Delete a value from the object, keeping the parameter index in sync."""
+    super(Method, self).DeleteTemplateValue(name)
+    if name == 'parameters':
+      self._parameters_by_wire_name = {}
+
+  def ParameterByWireName(self, wire_name):
+    """Find a parameter of this method by its wire name.
+
+    Args:
+      wire_name: (str) the wireName of the parameter.
+
+    Returns:
+      Parameter or None if not found.
+    """
+    return self._parameters_by_wire_name.get(wire_name)
+
   @property
   def media_upload_parameters(self):
     return self.values.get('mediaUpload')
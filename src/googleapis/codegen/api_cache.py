@@ -0,0 +1,169 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""On disk cache of constructed Api models.
+
+Building an Api from a discovery document validates names, strips HTML from
+descriptions, and creates and links all the schemas, resources and methods.
+For an unchanged discovery document that work always produces the same model,
+so the model may be saved and reloaded instead of being built again.
+
+Models are cached before any language specific annotation is done. Each
+language has its own Api subclass, with its own naming rules, so the cache key
+is a hash of both the discovery document and the Api class which built it.
+"""
+
+import cPickle
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import zlib
+
+from googleapis.codegen import generation_events
+
+# Bump this whenever a change to the Api classes makes old entries unusable.
+_CACHE_FORMAT_VERSION = '1'
+
+# Pickling walks the model graph recursively. Large APIs need more room than
+# the default recursion limit allows.
+_MIN_RECURSION_LIMIT = 20000
+
+_LOGGER = logging.getLogger('codegen')
+
+
+class ApiCache(object):
+  """A directory of serialized Api models, keyed by content hash."""
+
+  def __init__(self, cache_dir):
+    """Construct an ApiCache.
+
+    Args:
+      cache_dir: (str) Directory to hold the cache entries. It is created if
+        it does not exist.
+    """
+    self._cache_dir = cache_dir
+    if not os.path.isdir(cache_dir):
+      os.makedirs(cache_dir)
+
+  @staticmethod
+  def CacheKey(api_loader, discovery_doc):
+    """Compute the cache key for building an Api from a discovery document.
+
+    Args:
+      api_loader: (class) The Api class (or factory) which builds the model.
+      discovery_doc: (dict) The discovery document.
+    Returns:
+      (str) A hex digest.
+    """
+    digest = hashlib.sha1()
+    digest.update(_CACHE_FORMAT_VERSION)
+    digest.update('\0%s.%s\0' % (api_loader.__module__, api_loader.__name__))
+    # The encoding preserves member order, which is significant to the model.
+    digest.update(json.dumps(discovery_doc, separators=(',', ':')))
+    return digest.hexdigest()
+
+  def _PathForKey(self, key):
+    return os.path.join(self._cache_dir, key + '.api')
+
+  def Get(self, key):
+    """Load a cached Api.
+
+    Args:
+      key: (str) A key computed by CacheKey.
+    Returns:
+      (Api) The cached model, or None if there is no usable entry.
+    """
+    path = self._PathForKey(key)
+    try:
+      with open(path, 'rb') as f:
+        data = f.read()
+    except IOError:
+      return None
+    try:
+      with _RecursionLimit(_MIN_RECURSION_LIMIT):
+        return cPickle.loads(zlib.decompress(data))
+    except Exception as e:  # pylint: disable=broad-except
+      # A stale or damaged entry is just a miss.
+      _LOGGER.warning('Ignoring unreadable Api cache entry %s: %s', path, e)
+      return None
+
+  def Put(self, key, the_api):
+    """Store an Api in the cache.
+
+    The entry is written to a temporary file and renamed into place, so that
+    concurrent readers never see a partial entry.
+
+    Args:
+      key: (str) A key computed by CacheKey.
+      the_api: (Api) The model to store.
+    """
+    try:
+      with _RecursionLimit(_MIN_RECURSION_LIMIT):
+        data = zlib.compress(
+            cPickle.dumps(the_api, cPickle.HIGHEST_PROTOCOL), 1)
+    except (RuntimeError, cPickle.PicklingError, TypeError) as e:
+      _LOGGER.warning('Api model can not be cached: %s', e)
+      return
+    fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+      os.rename(temp_path, self._PathForKey(key))
+    except (IOError, OSError):
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+      raise
+
+  def GetOrCreate(self, api_loader, discovery_doc, observers=None):
+    """Return an Api for a discovery document, building it only if needed.
+
+    Args:
+      api_loader: (class) The Api class (or factory) which builds the model.
+      discovery_doc: (dict) The discovery document.
+      observers: (list) GenerationObservers to hand an api_cache HIT or MISS
+        event to.
+    Returns:
+      (Api) The model.
+    """
+    key = self.CacheKey(api_loader, discovery_doc)
+    the_api = self.Get(key)
+    if observers:
+      generation_events.Emit(
+          observers, 'api_cache',
+          generation_events.MISS if the_api is None else generation_events.HIT,
+          key)
+    if the_api is None:
+      the_api = api_loader(discovery_doc)
+      self.Put(key, the_api)
+    return the_api
+
+
+class _RecursionLimit(object):
+  """Context manager which temporarily raises the recursion limit."""
+
+  def __init__(self, limit):
+    self._limit = limit
+    self._saved_limit = None
+
+  def __enter__(self):
+    self._saved_limit = sys.getrecursionlimit()
+    if self._saved_limit < self._limit:
+      sys.setrecursionlimit(self._limit)
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    sys.setrecursionlimit(self._saved_limit)
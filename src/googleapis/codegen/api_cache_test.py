@@ -0,0 +1,96 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for api_cache.py."""
+
+import os
+import shutil
+import tempfile
+
+from google.apputils import basetest
+
+from googleapis.codegen import api_cache
+from googleapis.codegen.api import Api
+from googleapis.codegen.java_generator import JavaApi
+from googleapis.codegen.utilities import discovery_loader
+
+
+class CountingLoader(object):
+  """An Api factory which counts how often it is called."""
+
+  calls = 0
+
+  def __init__(self, discovery_doc):
+    CountingLoader.calls += 1
+    self.api = Api(discovery_doc)
+
+
+class ApiCacheTest(basetest.TestCase):
+
+  def setUp(self):
+    self._cache_dir = tempfile.mkdtemp()
+    self._cache = api_cache.ApiCache(self._cache_dir)
+    self._discovery = discovery_loader.LoadFile(
+        os.path.join(os.path.dirname(__file__), 'testdata',
+                     'sample_discovery.json'))
+
+  def tearDown(self):
+    shutil.rmtree(self._cache_dir)
+
+  def testRoundTrip(self):
+    first = self._cache.GetOrCreate(Api, self._discovery)
+    second = self._cache.GetOrCreate(Api, self._discovery)
+    self.assertIsNot(first, second)
+    self.assertEquals(sorted(first.all_schemas), sorted(second.all_schemas))
+    self.assertEquals(
+        [m.values['rpcMethod'] for m in first.all_methods],
+        [m.values['rpcMethod'] for m in second.all_methods])
+    # The object graph is relinked on load.
+    method = second.MethodByName('chili.activities.get')
+    self.assertIs(second, method.api)
+    self.assertIn(method, method.parent.children)
+
+  def testLoaderBuildsOnlyOnMiss(self):
+    CountingLoader.calls = 0
+    self._cache.GetOrCreate(CountingLoader, self._discovery)
+    self._cache.GetOrCreate(CountingLoader, self._discovery)
+    self.assertEquals(1, CountingLoader.calls)
+
+  def testKeyDependsOnContentAndLoader(self):
+    key = api_cache.ApiCache.CacheKey(Api, self._discovery)
+    self.assertEquals(key, api_cache.ApiCache.CacheKey(Api, self._discovery))
+    self.assertNotEquals(key,
+                         api_cache.ApiCache.CacheKey(JavaApi, self._discovery))
+    self._discovery['revision'] = 'changed'
+    self.assertNotEquals(key,
+                         api_cache.ApiCache.CacheKey(Api, self._discovery))
+
+  def testKeyDependsOnMemberOrder(self):
+    forward = discovery_loader.Loads('{"a": 1, "b": 2}')
+    backward = discovery_loader.Loads('{"b": 2, "a": 1}')
+    self.assertNotEquals(api_cache.ApiCache.CacheKey(Api, forward),
+                         api_cache.ApiCache.CacheKey(Api, backward))
+
+  def testDamagedEntryIsAMiss(self):
+    key = api_cache.ApiCache.CacheKey(Api, self._discovery)
+    with open(os.path.join(self._cache_dir, key + '.api'), 'wb') as f:
+      f.write('not a pickle')
+    self.assertIsNone(self._cache.Get(key))
+    self.assertTrue(self._cache.GetOrCreate(Api, self._discovery))
+    self.assertTrue(self._cache.Get(key))
+
+
+if __name__ == '__main__':
+  basetest.main()
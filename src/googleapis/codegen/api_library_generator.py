@@ -20,6 +20,12 @@ This module specializes TemplateGenerator for building API libraries.
 
 __author__ = 'aiuto@google.com (Tony Aiuto)'
 
+import os
+
+from googleapis.codegen import api_cache
+from googleapis.codegen import generation_events
+from googleapis.codegen import incremental
+from googleapis.codegen.filesys import dependency_bundle
 from googleapis.codegen.generator import TemplateGenerator
 
 
@@ -50,7 +56,15 @@ class ApiLibraryGenerator(TemplateGenerator):
       discovery['modulePath'] = module_path
     if options.get('version_package'):
       discovery['version_module'] = True
-    self._api = api_loader(discovery)
+    cache_dir = options.get('api_cache_dir')
+    # Observers are added after this, so the events of loading the Api are
+    # kept until generation starts.
+    self._load_events = generation_events.RecordingObserver()
+    if cache_dir:
+      self._api = api_cache.ApiCache(cache_dir).GetOrCreate(
+          api_loader, discovery, observers=[self._load_events])
+    else:
+      self._api = api_loader(discovery)
     self._language = language
 
   @property
@@ -75,16 +89,57 @@ class ApiLibraryGenerator(TemplateGenerator):
         templates
     """
     api = self._api
-    self.AnnotateApiForLanguage(api)
-
-    self._BuildPathReplacements(path_replacements)
-    self._top_level_defines = {'api': api.values}
-    self._top_level_defines.update(extra_defines or {})
+    with self._Span('generate', api.values['name'],
+                    version=api.values['version'], language=self._language):
+      for event in self._load_events.events:
+        for observer in self._observers:
+          observer.OnEvent(event)
+      with self._stats.Timing('annotate'):
+        self.AnnotateApiForLanguage(api)
+
+      self._BuildPathReplacements(path_replacements)
+      self._top_level_defines = {'api': api.values}
+      self._top_level_defines.update(extra_defines or {})
+
+      state_dir = self._options.get('incremental_state_dir')
+      if state_dir:
+        render_cache = incremental.RenderCache(state_dir)
+        render_cache.AddRoot(api)
+        self.SetRenderCache(render_cache)
+
+      with self._stats.Timing('templates'):
+        self._GenerateLibrarySource(api, package_writer)
+      if self._options.get('include_dependencies'):
+        with self._stats.Timing('dependencies'):
+          self._IncludeDependencies(package_writer)
+      if state_dir:
+        self._render_cache.Save()
+
+  def _IncludeDependencies(self, package_writer):
+    """Add the dependencies tree to the output package.
+
+    If a dependency bundle directory was given in the options, the static
+    files of the tree come from a prebuilt bundle, and only the rest of the
+    tree is walked.
 
-    self._GenerateLibrarySource(api, package_writer)
-    if self._options.get('include_dependencies'):
-      self.WalkTemplateTree('dependencies', self._path_replacements, {},
-                            self._top_level_defines, package_writer)
+    Args:
+      package_writer: (LibraryPackage) output package
+    """
+    file_filter = None
+    bundle_dir = self._options.get('dependency_bundle_dir')
+    if bundle_dir:
+      dependencies_dir = os.path.join(self._template_dir, 'dependencies')
+      bundle = dependency_bundle.DependencyBundleCache(bundle_dir).GetBundle(
+          dependencies_dir)
+      self._Emit('dependency_bundle',
+                 generation_events.HIT if bundle else generation_events.MISS,
+                 dependencies_dir)
+      if bundle:
+        bundle.IncludeInPackage(package_writer)
+        file_filter = bundle.FileFilter
+    self.WalkTemplateTree('dependencies', self._path_replacements, {},
+                          self._top_level_defines, package_writer,
+                          file_filter=file_filter)
 
   def _BuildPathReplacements(self, path_replacements):
     """Build the set of path replacements used for template tree walking.
@@ -183,18 +238,43 @@ class ApiLibraryGenerator(TemplateGenerator):
     Args:
       api: (Api) The Api.
     """
-    self.AnnotateApi(api)
+    annotate_schema = self._ObservedAnnotator('schema', self.AnnotateSchema)
+    annotate_property = self._ObservedAnnotator('property',
+                                                self.AnnotateProperty)
+    annotate_method = self._ObservedAnnotator('method', self.AnnotateMethod)
+    annotate_resource = self._ObservedAnnotator('resource',
+                                                self.AnnotateResource)
+    self._ObservedAnnotator('api', self.AnnotateApi, node_arg=0)(api)
     for schema in api.all_schemas.values():
       # TODO(user): remove this after completing the transition away from
       # package in all the templates
       schema.SetTemplateValue('package', self.model_module)
-      self.AnnotateSchema(api, schema)
+      annotate_schema(api, schema)
       for prop in schema.values.get('properties', []):
-        self.AnnotateProperty(api, prop, schema)
+        annotate_property(api, prop, schema)
     for resource in api.values['resources']:
-      self.AnnotateResource(api, resource)
+      annotate_resource(api, resource)
     for method in api.values['methods']:
-      self.AnnotateMethod(api, method, None)
+      annotate_method(api, method, None)
+
+  def _ObservedAnnotator(self, node_type, annotator, node_arg=1):
+    """Returns an annotator which emits an annotate span around each call.
+
+    Args:
+      node_type: (str) The type of node the annotator is for.
+      annotator: (callable) The annotator.
+      node_arg: (int) The position of the node in its arguments.
+    Returns:
+      (callable) The annotator itself if nothing observes this generator.
+    """
+    if not self._observers:
+      return annotator
+
+    def ObservedAnnotator(*args):
+      with self._Span('annotate', node_type,
+                      node=args[node_arg].values.get('wireName')):
+        return annotator(*args)
+    return ObservedAnnotator
 
   def AnnotateApi(self, api):
     """Extension point for subclasses to annotate the API node itself.
@@ -254,10 +334,13 @@ class ApiLibraryGenerator(TemplateGenerator):
       api: (Api) The Api which owns this resource.
       resource: (Resource) The Resource to annotate.
     """
+    annotate_method = self._ObservedAnnotator('method', self.AnnotateMethod)
     for method in resource.values['methods']:
-      self.AnnotateMethod(api, method, resource)
+      annotate_method(api, method, resource)
+    annotate_resource = self._ObservedAnnotator('resource',
+                                                self.AnnotateResource)
     for r in resource.values['resources']:
-      self.AnnotateResource(api, r)
+      annotate_resource(api, r)
 
   def AnnotateSchema(self, api, schema):
     """Extension point for subclasses to annotate Schemas.
@@ -25,6 +25,7 @@ import gflags as flags
 from google.apputils import basetest
 
 from googleapis.codegen import data_types
+from googleapis.codegen import generator_lookup
 from googleapis.codegen import language_model
 from googleapis.codegen.api import Api
 from googleapis.codegen.api import AuthScope
@@ -32,6 +33,9 @@ from googleapis.codegen.api import Method
 from googleapis.codegen.api import Resource
 from googleapis.codegen.api import Schema
 from googleapis.codegen.api_exception import ApiException
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.targets import Targets
+from googleapis.codegen.utilities import discovery_loader
 
 FLAGS = flags.FLAGS
 
@@ -198,6 +202,42 @@ class ApiTest(basetest.TestCase):
     post_id = FindByWireName(delete.values['parameters'], 'postId')
     self.assertEquals('path', post_id.location)
 
+  def testParameterByWireName(self):
+    api = self.ApiFromDiscoveryDoc(self._TEST_DISCOVERY_DOC)
+    delete = api.MethodByName('chili.activities.delete')
+    self.assertEquals(FindByWireName(delete.values['parameters'], 'postId'),
+                      delete.ParameterByWireName('postId'))
+    self.assertIsNone(delete.ParameterByWireName('noSuchParameter'))
+    # The index follows replacement of the parameter list.
+    delete.SetTemplateValue('parameters', delete.path_parameters)
+    self.assertIsNone(delete.ParameterByWireName('required_parameter'))
+    self.assertTrue(delete.ParameterByWireName('postId'))
+
+  def testGenerationLeavesTheDiscoveryDocumentUnchanged(self):
+    # The raw values of the model alias the document until first used.
+    path = os.path.join(os.path.dirname(__file__), 'testdata',
+                        'golden_discovery', 'kitchen_sink.json')
+    targets = Targets()
+    for language in ('cpp', 'csharp', 'dart', 'gwt', 'java', 'php'):
+      discovery = discovery_loader.LoadFile(path)
+      before = json.dumps(discovery)
+      features = targets.VariationsForLanguage(language).GetFeatures('default')
+      generator = generator_lookup.GetGeneratorByLanguage(language)(discovery)
+      generator.SetTemplateDir(features.template_dir)
+      generator.SetFeatures(features)
+      generator.GeneratePackage(memory_library_package.MemoryLibraryPackage())
+      self.assertEquals(before, json.dumps(discovery), language)
+      self.assertEquals(json.loads(before)['schemas']['Tag'],
+                        generator.api.SchemaByName('Tag').raw)
+
+  def testVariantDiscriminantRemoved(self):
+    api = self.ApiFromDiscoveryDoc(self._TEST_DISCOVERY_DOC)
+    collection = api.SchemaByName('GeometryCollection')
+    self.assertIsNone(collection.PropertyByWireName('type'))
+    self.assertIsNone(FindByWireName(collection.values['properties'], 'type'))
+    self.assertTrue(collection.PropertyByWireName('geometries'))
+    self.assertEquals('Collection', collection.values['discriminantValue'])
+
   def testEnums(self):
     gen = self.ApiFromDiscoveryDoc('enums.json')
     # Find the method with the enums
@@ -0,0 +1 @@
+#!/usr/bin/python2.7
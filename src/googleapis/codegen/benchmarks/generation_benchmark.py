@@ -0,0 +1,370 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Measure end to end library generation, and check it against a baseline.
+
+Every variation of every language in targets.json is generated from each
+input discovery document. Each generation runs generate_library.Generate in a
+fresh interpreter, which reports the time spent in each phase, as collected
+in its GenerationStats:
+  load       reading the discovery document,
+  model      building the Api model,
+  annotate   the language specific annotation of the model,
+  templates  rendering the templates into the package,
+  package    finishing the zip archive,
+and the peak resident memory of the process.
+
+With --write_baseline the results are stored in --baseline. Otherwise, if
+--baseline exists, each case is compared with it, and the run fails if the
+time or the peak memory of any case went up by more than the allowed
+fraction.
+
+--synthetic_scales adds generated documents of growing size to the inputs,
+so that a run also shows how each language scales.
+Usage:
+$ PYTHONPATH=$(/bin/pwd)/src \
+  python -m googleapis.codegen.benchmarks.generation_benchmark \
+    --baseline=/tmp/baseline.json --write_baseline
+$ PYTHONPATH=$(/bin/pwd)/src \
+  python -m googleapis.codegen.benchmarks.generation_benchmark \
+    --baseline=/tmp/baseline.json
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from google.apputils import app
+import gflags as flags
+
+FLAGS = flags.FLAGS
+
+_TESTDATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                             'testdata')
+
+# The discovery documents generated from by default.
+_DEFAULT_INPUTS = [
+    os.path.join(_TESTDATA_DIR, 'golden_discovery', name) for name in (
+        'endpoints_google_owned.json',
+        'endpoints_third_party.json',
+        'kitchen_sink.json')] + [
+            os.path.join(_TESTDATA_DIR, name) for name in (
+                'enums.json',
+                'moderator.v1.json',
+                'sample_discovery.json',
+                'unicode.json')]
+
+_PHASES = ('load', 'model', 'annotate', 'templates', 'package')
+
+flags.DEFINE_string(
+    'baseline',
+    None,
+    'A JSON file of earlier results to compare with, or to write with'
+    ' --write_baseline.')
+flags.DEFINE_list(
+    'inputs',
+    _DEFAULT_INPUTS,
+    'The discovery documents to generate from.')
+flags.DEFINE_list(
+    'languages',
+    [],
+    'The languages to generate. Defaults to every language in targets.json.')
+flags.DEFINE_float(
+    'max_memory_regression',
+    0.10,
+    'The largest allowed increase of the peak memory of a case, as a'
+    ' fraction of the baseline.')
+flags.DEFINE_float(
+    'max_time_regression',
+    0.15,
+    'The largest allowed increase of the time of a case, as a fraction of'
+    ' the baseline.')
+flags.DEFINE_float(
+    'min_seconds',
+    0.05,
+    'Changes in time smaller than this many seconds are not regressions,'
+    ' however large a fraction of the baseline they are.')
+flags.DEFINE_list(
+    'synthetic_scales',
+    [],
+    'Also generate from a synthetic discovery document at each of these'
+    ' scales. Scale 1 has 50 schemas and 10 resources, each with nested'
+    ' resources and 8 methods.')
+flags.DEFINE_string(
+    'output_json',
+    None,
+    'A file to write the results of this run to.')
+flags.DEFINE_integer(
+    'trials',
+    3,
+    'How many times to generate each case. The median times are kept.')
+flags.DEFINE_boolean(
+    'write_baseline',
+    False,
+    'Write the results to --baseline instead of comparing with it.')
+
+# Run in the child interpreter. It reports the measurements of one
+# generation, or why it failed, as JSON on stdout.
+_CHILD_SCRIPT = """
+import json
+import sys
+import gflags
+from googleapis.codegen.benchmarks import generation_benchmark
+# generate_library reads its flags, which must be parsed first.
+gflags.FLAGS(sys.argv[:1])
+try:
+  result = generation_benchmark.MeasureGeneration(*sys.argv[1:])
+except Exception as e:
+  result = {'error': '%s: %s' % (type(e).__name__, e)}
+json.dump(result, sys.stdout)
+"""
+
+
+def MeasureGeneration(language, variation, input_path):
+  """Generate one library in this process, timing each phase.
+
+  Args:
+    language: (str) The language.
+    variation: (str) The variation of the language.
+    input_path: (str) The discovery document.
+  Returns:
+    (dict) 'seconds', the time of each phase, and 'peak_rss_kb', the peak
+    resident memory of the process.
+  """
+  # pylint: disable=g-import-not-at-top
+  from googleapis.codegen import generate_library
+  from googleapis.codegen import generation_stats
+  from googleapis.codegen import memory_tracer
+  from googleapis.codegen.filesys import zip_library_package
+  from googleapis.codegen.utilities import discovery_loader
+  # pylint: enable=g-import-not-at-top
+
+  stats = generation_stats.GenerationStats()
+  with stats.Timing('load'):
+    discovery_doc = discovery_loader.LoadFile(input_path)
+  with tempfile.TemporaryFile() as out:
+    generate_library.Generate(
+        discovery_doc, zip_library_package.ZipLibraryPackage(out),
+        language=language, language_variant=variation, stats=stats)
+  seconds = dict((phase, stats.seconds.get(phase, 0.0)) for phase in _PHASES)
+  return {'seconds': seconds, 'peak_rss_kb': memory_tracer.PeakRssKb()}
+
+
+def RunCase(language, variation, input_path, trials):
+  """Measure a case in fresh interpreters.
+
+  Args:
+    language: (str) The language.
+    variation: (str) The variation of the language.
+    input_path: (str) The discovery document.
+    trials: (int) How many times to generate the library.
+  Returns:
+    (dict) The median time of each phase and of the whole generation, and
+    the largest peak memory, or 'error' if the generation failed.
+  """
+  results = []
+  for _ in xrange(trials):
+    child = subprocess.Popen(
+        [sys.executable, '-c', _CHILD_SCRIPT, language, variation,
+         input_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=os.environ)
+    output, errors = child.communicate()
+    if child.returncode:
+      lines = errors.strip().splitlines() or ['exit status %d' %
+                                              child.returncode]
+      return {'error': lines[-1]}
+    result = json.loads(output)
+    if 'error' in result:
+      return result
+    results.append(result)
+  seconds = {}
+  for phase in _PHASES:
+    seconds[phase] = _Median([r['seconds'][phase] for r in results])
+  seconds['total'] = _Median([sum(r['seconds'].values()) for r in results])
+  return {'seconds': seconds,
+          'peak_rss_kb': max(r['peak_rss_kb'] for r in results)}
+
+
+def _Median(values):
+  return sorted(values)[len(values) // 2]
+
+
+def CaseName(language, variation, input_path):
+  return '%s/%s/%s' % (language, variation,
+                       os.path.splitext(os.path.basename(input_path))[0])
+
+
+def ListCases(languages, inputs):
+  """Returns (language, variation, input path) for each case to measure."""
+  # pylint: disable=g-import-not-at-top
+  from googleapis.codegen.targets import Targets
+  # pylint: enable=g-import-not-at-top
+  targets = Targets()
+  cases = []
+  for language in languages or sorted(targets.Languages()):
+    variations = targets.VariationsForLanguage(language)
+    if not variations:
+      raise app.UsageError('Unknown language: %s' % language)
+    for variation in sorted(variations):
+      for input_path in inputs:
+        cases.append((language, variation, input_path))
+  return cases
+
+
+def FindRegressions(results, baseline, max_time_regression,
+                    max_memory_regression, min_seconds):
+  """Compare results with a baseline.
+
+  Args:
+    results: (dict) The result of each case, by name.
+    baseline: (dict) Earlier results, in the same form.
+    max_time_regression: (float) The allowed fractional increase in time.
+    max_memory_regression: (float) The allowed fractional increase in peak
+      memory.
+    min_seconds: (float) Increases in time below this are never regressions.
+  Returns:
+    (list) A description of each regression.
+  """
+  regressions = []
+  for name, result in sorted(results.iteritems()):
+    old = baseline.get(name)
+    if not old:
+      continue
+    if 'error' in result:
+      if 'error' not in old:
+        regressions.append('%s: failed: %s' % (name, result['error']))
+      continue
+    if 'error' in old:
+      continue
+    new_time = result['seconds']['total']
+    old_time = old['seconds']['total']
+    if (new_time - old_time > min_seconds and
+        new_time > old_time * (1 + max_time_regression)):
+      regressions.append('%s: %.3fs, was %.3fs' % (name, new_time, old_time))
+    new_memory = result['peak_rss_kb']
+    old_memory = old['peak_rss_kb']
+    if new_memory > old_memory * (1 + max_memory_regression):
+      regressions.append('%s: peak memory %dKB, was %dKB' % (
+          name, new_memory, old_memory))
+  return regressions
+
+
+def WriteSyntheticInputs(scales, output_dir):
+  """Write a synthetic discovery document for each scale.
+
+  Args:
+    scales: (list) The scales, as ints.
+    output_dir: (str) The directory to write the documents to.
+  Returns:
+    (list) The paths of the documents.
+  """
+  # pylint: disable=g-import-not-at-top
+  from googleapis.codegen.utilities import synthetic_discovery
+  # pylint: enable=g-import-not-at-top
+  paths = []
+  for scale in scales:
+    doc = synthetic_discovery.MakeDiscoveryDocument(schemas=50 * scale,
+                                                    resources=10 * scale)
+    path = os.path.join(output_dir, 'synthetic_x%d.json' % scale)
+    with open(path, 'w') as f:
+      json.dump(doc, f, indent=1)
+    paths.append(path)
+  return paths
+
+
+def WriteResults(path, results):
+  """Write the results of a run, as a baseline or a report.
+
+  Args:
+    path: (str) The file to write.
+    results: (dict) The result of each case, by name.
+  """
+  with open(path, 'w') as f:
+    json.dump({'python': platform.python_version(), 'cases': results}, f,
+              indent=1, sort_keys=True)
+
+
+def LoadBaseline(path):
+  """Read the results written by WriteResults.
+
+  Args:
+    path: (str) The file, or None.
+  Returns:
+    (dict) The result of each case, by name, or None if there is no file.
+  """
+  if not (path and os.path.exists(path)):
+    return None
+  with open(path) as f:
+    return json.load(f)['cases']
+
+
+def main(unused_argv):
+  if FLAGS.trials < 1:
+    raise app.UsageError('--trials must be at least 1')
+  if FLAGS.write_baseline and not FLAGS.baseline:
+    raise app.UsageError('You must specify --baseline with --write_baseline')
+  try:
+    scales = [int(scale) for scale in FLAGS.synthetic_scales]
+  except ValueError:
+    raise app.UsageError('--synthetic_scales must be a list of integers')
+
+  synthetic_dir = tempfile.mkdtemp()
+  try:
+    inputs = FLAGS.inputs + WriteSyntheticInputs(scales, synthetic_dir)
+    results = {}
+    print '%-50s %9s %9s %9s %9s %9s %9s %10s' % (
+        ('case',) + _PHASES + ('total', 'peak'))
+    for language, variation, input_path in ListCases(FLAGS.languages,
+                                                     inputs):
+      name = CaseName(language, variation, input_path)
+      result = RunCase(language, variation, input_path, FLAGS.trials)
+      results[name] = result
+      if 'error' in result:
+        print '%-50s failed: %s' % (name, result['error'])
+      else:
+        print '%-50s %s %9.3f %8dKB' % (
+            name, ' '.join('%9.3f' % result['seconds'][phase]
+                           for phase in _PHASES),
+            result['seconds']['total'], result['peak_rss_kb'])
+      sys.stdout.flush()
+  finally:
+    shutil.rmtree(synthetic_dir)
+
+  if FLAGS.output_json:
+    WriteResults(FLAGS.output_json, results)
+  if FLAGS.write_baseline:
+    WriteResults(FLAGS.baseline, results)
+    print 'Wrote baseline %s' % FLAGS.baseline
+    return 0
+  baseline = LoadBaseline(FLAGS.baseline)
+  if baseline is None:
+    return 0
+  regressions = FindRegressions(results, baseline, FLAGS.max_time_regression,
+                                FLAGS.max_memory_regression,
+                                FLAGS.min_seconds)
+  for regression in regressions:
+    print 'REGRESSION %s' % regression
+  if regressions:
+    return 1
+  print 'No regressions against %s' % FLAGS.baseline
+  return 0
+
+
+if __name__ == '__main__':
+  app.run()
@@ -0,0 +1,95 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for generation_benchmark.py."""
+
+import os
+import shutil
+import tempfile
+
+from google.apputils import basetest
+
+from googleapis.codegen.benchmarks import generation_benchmark
+
+
+def _Result(seconds, peak_rss_kb):
+  return {'seconds': {'total': seconds}, 'peak_rss_kb': peak_rss_kb}
+
+
+class GenerationBenchmarkTest(basetest.TestCase):
+
+  def setUp(self):
+    self._dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self._dir)
+
+  def _FindRegressions(self, results, baseline):
+    return generation_benchmark.FindRegressions(
+        results, baseline, max_time_regression=0.15,
+        max_memory_regression=0.10, min_seconds=0.05)
+
+  def testFindRegressions(self):
+    baseline = {
+        'same': _Result(1.0, 1000),
+        'slower': _Result(1.0, 1000),
+        'slightly_slower': _Result(1.0, 1000),
+        'tiny': _Result(0.01, 1000),
+        'bigger': _Result(1.0, 1000),
+        'broken': _Result(1.0, 1000),
+        'was_broken': {'error': 'ValueError: bad'},
+    }
+    results = {
+        'same': _Result(1.0, 1000),
+        'slower': _Result(1.5, 1000),
+        'slightly_slower': _Result(1.1, 1050),
+        # Three times slower, but by less than min_seconds.
+        'tiny': _Result(0.03, 1000),
+        'bigger': _Result(1.0, 1200),
+        'broken': {'error': 'ValueError: bad'},
+        'was_broken': _Result(9.0, 9000),
+        'new': _Result(9.0, 9000),
+    }
+    self.assertEquals(
+        ['bigger: peak memory 1200KB, was 1000KB',
+         'broken: failed: ValueError: bad',
+         'slower: 1.500s, was 1.000s'],
+        self._FindRegressions(results, baseline))
+    self.assertEquals([], self._FindRegressions(baseline, baseline))
+    self.assertEquals([], self._FindRegressions(results, {}))
+
+  def testBaselineRoundTrip(self):
+    path = os.path.join(self._dir, 'baseline.json')
+    self.assertIsNone(generation_benchmark.LoadBaseline(path))
+    self.assertIsNone(generation_benchmark.LoadBaseline(None))
+    results = {'java/default/enums': _Result(1.0, 1000),
+               'php/default/enums': {'error': 'ValueError: bad'}}
+    generation_benchmark.WriteResults(path, results)
+    self.assertEquals(results, generation_benchmark.LoadBaseline(path))
+
+  def testMeasureGeneration(self):
+    input_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                              'testdata', 'sample_discovery.json')
+    result = generation_benchmark.MeasureGeneration('java', 'default',
+                                                    input_path)
+    self.assertEquals(
+        sorted(['load', 'model', 'annotate', 'templates', 'package']),
+        sorted(result['seconds']))
+    self.assertLess(0, result['seconds']['templates'])
+    self.assertLess(0, result['peak_rss_kb'])
+
+
+if __name__ == '__main__':
+  basetest.main()
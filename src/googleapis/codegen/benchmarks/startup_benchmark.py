@@ -0,0 +1,101 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Measure the cold start time of the library generator.
+
+Each trial starts a fresh interpreter, imports generate_library and looks up
+the generator for one language, which is the fixed cost every
+generate_library run pays before it reads its discovery document.
+Usage:
+$ PYTHONPATH=$(/bin/pwd)/src \
+  python -m googleapis.codegen.benchmarks.startup_benchmark --language=java
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from google.apputils import app
+import gflags as flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string(
+    'language',
+    'java',
+    'The language whose generator is looked up in each trial.')
+flags.DEFINE_integer(
+    'trials',
+    10,
+    'How many fresh interpreters to time.')
+
+# Run in the child interpreter. It reports how long the imports took, and
+# which modules they pulled in, as JSON on stdout.
+_CHILD_SCRIPT = """
+import json
+import sys
+import time
+start = time.time()
+from googleapis.codegen import generate_library
+generate_library.generator_lookup.GetGeneratorByLanguage(sys.argv[1])
+elapsed = time.time() - start
+json.dump({'import_seconds': elapsed,
+           'modules': len(sys.modules)}, sys.stdout)
+"""
+
+
+def RunTrial(language):
+  """Time a single cold start in a new interpreter.
+
+  Args:
+    language: (str) The language whose generator to look up.
+  Returns:
+    (dict) 'wall_seconds', the time for the whole process, 'import_seconds',
+    the time for the imports within it, and 'modules', the number of modules
+    loaded.
+  """
+  start = time.time()
+  output = subprocess.check_output(
+      [sys.executable, '-c', _CHILD_SCRIPT, language], env=os.environ)
+  result = json.loads(output)
+  result['wall_seconds'] = time.time() - start
+  return result
+
+
+def _Summarize(values):
+  values = sorted(values)
+  return {'min': values[0],
+          'median': values[len(values) // 2],
+          'max': values[-1]}
+
+
+def main(unused_argv):
+  if FLAGS.trials < 1:
+    raise app.UsageError('--trials must be at least 1')
+  trials = [RunTrial(FLAGS.language) for _ in xrange(FLAGS.trials)]
+  print 'Cold start for --language=%s over %d trials' % (FLAGS.language,
+                                                         FLAGS.trials)
+  for key in ('wall_seconds', 'import_seconds'):
+    summary = _Summarize([t[key] for t in trials])
+    print '  %-15s min %7.1fms  median %7.1fms  max %7.1fms' % (
+        key, summary['min'] * 1000, summary['median'] * 1000,
+        summary['max'] * 1000)
+  print '  %-15s %d' % ('modules', trials[0]['modules'])
+
+
+if __name__ == '__main__':
+  app.run()
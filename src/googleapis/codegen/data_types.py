@@ -105,7 +105,7 @@ class DataType(template_objects.CodeObject):
       if self.language_model:
         safe_class_name = self.language_model.ToSafeClassName(
             safe_class_name, self._api, self._parent)
-      self.SetTemplateValue('safeClassName', safe_class_name)
+      self.CacheTemplateValue('safeClassName', safe_class_name)
     return safe_class_name
 
 
@@ -374,6 +374,7 @@ class SchemaReference(DataType):
     s = self.referenced_schema
     if s:
       return s.values
+    template_objects.NoteRead(self, None)
     return self._def_dict
 
   @property
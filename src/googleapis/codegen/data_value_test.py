@@ -20,6 +20,7 @@ from google.apputils import basetest
 
 from googleapis.codegen import data_types
 from googleapis.codegen import data_value
+from googleapis.codegen import django_helpers
 from googleapis.codegen import language_model
 from googleapis.codegen import schema
 from django import template as django_template  # pylint: disable=g-bad-import-order
@@ -117,6 +118,10 @@ class DataValueTest(basetest.TestCase):
 class DataValueRenderingTest(basetest.TestCase):
   """Tests for DataValue rendering methods in template_helpers."""
 
+  def setUp(self):
+    super(DataValueRenderingTest, self).setUp()
+    django_helpers.SetupDjango()
+
   def _GetContext(self, data=None):
     return django_template.Context(data or {})
 
@@ -27,28 +27,43 @@ import os
 from django import template as django_template
 from django import utils as django_utils
 from django.conf import settings
-# COV_NF_START
-try:
-  # In AppEngine, we have to call use_library() in our main. Doing that causes
-  # an error, which we can safely ignore because use_library did it
-  settings.configure()
-  os.environ['DJANGO_SETTINGS_MODULE'] = 'settings'
-except RuntimeError:
-  pass
 
 from googleapis.codegen import template_helpers
+from googleapis.codegen import template_profiler
 from googleapis.codegen.filesys import files
 
 
-# COV_NF_END
+_django_is_set_up = False
 
-# This is Django magic to add builtin tags and filters.  They don't really
-# support that use case.  Instead you are supposed to put a package of filters
-# in a specific place and the Django web server finds them for you. We are a
-# standalone app, not running in their context, so we have to go under the hood
-# a little.
-django_template.base.add_to_builtins(
-    'googleapis.codegen.template_helpers')
+
+def SetupDjango():
+  """Configure Django for use as a standalone template engine.
+
+  This is deferred until the first template is built, rather than done at
+  import time, so that commands which never render a template do not pay for
+  it. It is safe to call more than once.
+  """
+  global _django_is_set_up
+  if _django_is_set_up:
+    return
+  # COV_NF_START
+  try:
+    # In AppEngine, we have to call use_library() in our main. Doing that
+    # causes an error, which we can safely ignore because use_library did it
+    settings.configure()
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'settings'
+  except RuntimeError:
+    pass
+  # COV_NF_END
+
+  # This is Django magic to add builtin tags and filters.  They don't really
+  # support that use case.  Instead you are supposed to put a package of
+  # filters in a specific place and the Django web server finds them for you.
+  # We are a standalone app, not running in their context, so we have to go
+  # under the hood a little.
+  django_template.base.add_to_builtins(
+      'googleapis.codegen.template_helpers')
+  _django_is_set_up = True
 
 
 def DjangoRenderTemplate(template_path, context_dict):
@@ -60,9 +75,25 @@ def DjangoRenderTemplate(template_path, context_dict):
   Returns:
     (str) The expanded template.
   """
-
-  source = files.GetFileContents(template_path).decode('utf-8')
-  return _DjangoRenderTemplateSource(source, context_dict)
+  profiler = template_profiler.Current()
+  if profiler:
+    return profiler.Profile(
+        template_profiler.TemplateName(template_path,
+                                       context_dict.get('template_dir')),
+        _DjangoRenderTemplateFile, template_path, context_dict)
+  return _DjangoRenderTemplateFile(template_path, context_dict)
+
+
+def _DjangoRenderTemplateFile(template_path, context_dict):
+  """Renders a template file, compiling it only once where possible."""
+  template_dir = context_dict.get('template_dir')
+  if not template_dir:
+    source = files.GetFileContents(template_path).decode('utf-8')
+    return _DjangoRenderTemplateSource(source, context_dict)
+  SetupDjango()
+  t = template_helpers.GetTemplateLoader().GetTemplate(template_path,
+                                                       template_dir)
+  return _RenderCompiledTemplate(t, context_dict)
 
 
 def _DjangoRenderTemplateSource(template_source, context_dict):
@@ -74,7 +105,12 @@ def _DjangoRenderTemplateSource(template_source, context_dict):
   Returns:
     (str) The expanded template.
   """
+  SetupDjango()
   t = django_template.Template(template_source)
+  return _RenderCompiledTemplate(t, context_dict)
+
+
+def _RenderCompiledTemplate(t, context_dict):
   ctxt = django_template.Context(context_dict)
   with template_helpers.SetCurrentContext(ctxt):
     return t.render(ctxt)
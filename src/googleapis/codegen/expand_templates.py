@@ -16,7 +16,6 @@
 
 __author__ = 'aiuto@google.com (Tony Aiuto)'
 
-import json
 import os
 
 from google.apputils import app
@@ -24,9 +23,11 @@ import gflags as flags
 from googleapis.codegen import generator
 from googleapis.codegen import generator_lookup
 from googleapis.codegen import language_model
+from googleapis.codegen import template_profiler
 from googleapis.codegen.api import Api
 from googleapis.codegen.filesys import package_writer_foundry
 from googleapis.codegen.targets import Targets
+from googleapis.codegen.utilities import discovery_loader
 
 FLAGS = flags.FLAGS
 
@@ -69,6 +70,12 @@ flags.DEFINE_enum(
     ' plain=just the source,'
     ' full=turn on all the optional parts (useful for testing the generator).'
     )
+flags.DEFINE_string(
+    'profile_templates',
+    None,
+    'Profile the rendering of each template. A report of the templates, by'
+    ' the time spent in each, is printed and the results are written as JSON'
+    ' to this file.')
 flags.DEFINE_string(
     'templates',
     None,
@@ -83,6 +90,7 @@ flags.DECLARE_key_flag('output_dir')
 flags.DECLARE_key_flag('output_file')
 flags.DECLARE_key_flag('output_format')
 flags.DECLARE_key_flag('output_type')
+flags.DECLARE_key_flag('profile_templates')
 flags.DECLARE_key_flag('templates')
 flags.DECLARE_key_flag('version_package')
 
@@ -96,9 +104,7 @@ def main(unused_argv):
   if not FLAGS.templates:
     raise app.UsageError('You must specify --templates')
 
-  f = open(FLAGS.discovery)
-  discovery_doc = json.loads(f.read())
-  f.close()
+  discovery_doc = discovery_loader.LoadFile(FLAGS.discovery)
 
   options = {
       # Include other files needed to compile (e.g. base jar files)
@@ -159,7 +165,8 @@ def main(unused_argv):
       output_format=FLAGS.output_format)
 
   # do it
-  gen.GeneratePackage(package_writer)
+  with template_profiler.ProfileTo(FLAGS.profile_templates):
+    gen.GeneratePackage(package_writer)
   package_writer.DoneWritingArchive()
   return 0
 
@@ -0,0 +1,119 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Command line tool to mirror discovery documents into a directory.
+
+Each document is written to <mirror_dir>/<name>.<version>.json. Documents
+are fetched concurrently and revalidated against the cache in
+--discovery_cache_dir (by default <mirror_dir>/.cache), so a run only
+transfers, and only rewrites, the documents which changed since the last.
+Usage:
+$ PYTHONPATH=$(/bin/pwd)/src \
+  $(/bin/pwd)/src/googleapis/codegen/fetch_discovery.py \
+    --mirror_dir=discovery --preferred_only
+"""
+
+import logging
+import os
+
+from google.apputils import app
+import gflags as flags
+# For the --discovery_* flags it shares with this tool.
+from googleapis.codegen import generate_library  # pylint: disable=unused-import
+from googleapis.codegen.utilities import discovery_fetcher
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list(
+    'apis',
+    [],
+    'The APIs to fetch, as name:version. Defaults to every API in the'
+    ' directory of the discovery server.')
+flags.DEFINE_integer(
+    'fetch_threads',
+    8,
+    'How many documents to fetch at the same time.')
+flags.DEFINE_string(
+    'mirror_dir',
+    None,
+    'The directory to write the documents to.')
+flags.DEFINE_boolean(
+    'preferred_only',
+    False,
+    'Without --apis, only fetch the preferred version of each API.')
+
+flags.DECLARE_key_flag('apis')
+flags.DECLARE_key_flag('discovery_cache_dir')
+flags.DECLARE_key_flag('discovery_server')
+flags.DECLARE_key_flag('discovery_version')
+flags.DECLARE_key_flag('fetch_threads')
+flags.DECLARE_key_flag('mirror_dir')
+flags.DECLARE_key_flag('preferred_only')
+
+
+def Mirror(fetcher, mirror_dir, apis=None, preferred_only=False, threads=8):
+  """Bring a directory of discovery documents up to date.
+
+  Args:
+    fetcher: (DiscoveryFetcher) The fetcher to use.
+    mirror_dir: (str) The directory to write the documents to.
+    apis: (list) (name, version) of each API to fetch. Every API in the
+      directory of the server if None.
+    preferred_only: (bool) Without apis, only fetch preferred versions.
+    threads: (int) How many documents to fetch at the same time.
+  Returns:
+    (list, dict) The paths of the documents written, and the error for each
+    (name, version) which could not be fetched.
+  """
+  if apis is None:
+    apis = fetcher.ListApis(preferred_only=preferred_only)
+  if not os.path.isdir(mirror_dir):
+    os.makedirs(mirror_dir)
+  results, errors = fetcher.FetchMany(apis, threads=threads)
+  written = []
+  for (name, version), result in sorted(results.iteritems()):
+    path = os.path.join(mirror_dir, '%s.%s.json' % (name, version))
+    if result.modified or not os.path.exists(path):
+      with open(path, 'wb') as f:
+        f.write(result.content)
+      written.append(path)
+  return written, errors
+
+
+def main(unused_argv):
+  if not FLAGS.mirror_dir:
+    raise app.UsageError('You must specify --mirror_dir')
+  apis = None
+  if FLAGS.apis:
+    apis = [tuple(api.split(':')) for api in FLAGS.apis]
+    if any(len(api) != 2 for api in apis):
+      raise app.UsageError('--apis must be a list of name:version')
+  logging.basicConfig(level=logging.INFO)
+
+  fetcher = discovery_fetcher.DiscoveryFetcher(
+      server=FLAGS.discovery_server,
+      discovery_version=FLAGS.discovery_version,
+      cache_dir=(FLAGS.discovery_cache_dir or
+                 os.path.join(FLAGS.mirror_dir, '.cache')))
+  written, errors = Mirror(fetcher, FLAGS.mirror_dir, apis=apis,
+                           preferred_only=FLAGS.preferred_only,
+                           threads=FLAGS.fetch_threads)
+  logging.info('Transferred %d documents, %d were unchanged; wrote %d',
+               fetcher.fetched, fetcher.not_modified, len(written))
+  return 1 if errors else 0
+
+
+if __name__ == '__main__':
+  app.run()
@@ -0,0 +1,295 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A content addressed store for generated libraries.
+
+Libraries generated for many APIs and languages share most of their files:
+licenses, base jars, build files and a good part of the rendered source. A
+ContentStore keeps each distinct file once, as a blob named by the SHA-1 of
+its contents, and describes each library by a manifest listing its file names
+and their blobs.
+
+ContentStoreLibraryPackage is the package writer which fills a store. A
+library can then be assembled from the store on demand, into any other
+package writer. Assembling into a directory tree hard links the blobs, so a
+tree costs no more than its directory entries.
+
+Layout of a store:
+  blobs/ab/cdef...   File contents, named by digest. Blobs are read only.
+  manifests/NAME     A JSON manifest for each library.
+"""
+
+import hashlib
+import json
+import os
+import StringIO
+import tempfile
+
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import filesystem_library_package
+from googleapis.codegen.filesys import library_package
+from googleapis.codegen.filesys.library_package import LibraryPackage
+
+
+class ContentStore(object):
+  """A directory of blobs and library manifests."""
+
+  def __init__(self, root):
+    """Construct a ContentStore.
+
+    Args:
+      root: (str) The directory of the store. It is created if needed.
+    """
+    self._root = root
+    self._blob_dir = os.path.join(root, 'blobs')
+    self._manifest_dir = os.path.join(root, 'manifests')
+    for path in (self._blob_dir, self._manifest_dir):
+      if not os.path.isdir(path):
+        os.makedirs(path)
+
+  def BlobPath(self, digest):
+    """Returns the path of the blob for a digest."""
+    return os.path.join(self._blob_dir, digest[:2], digest[2:])
+
+  def HasBlob(self, digest):
+    return os.path.exists(self.BlobPath(digest))
+
+  def PutData(self, data):
+    """Store a blob of data.
+
+    Args:
+      data: (str) The contents.
+    Returns:
+      (str, bool) The digest of the data, and whether a new blob was written.
+    """
+    digest = hashlib.sha1(data).hexdigest()
+    if self.HasBlob(digest):
+      return digest, False
+    return digest, self._WriteBlob(digest, lambda f: f.write(data))
+
+  def PutFile(self, path):
+    """Store the contents of a file.
+
+    The file is read in pieces, once to compute its digest and, only if the
+    store does not have it already, again to copy it.
+
+    Args:
+      path: (str) Path to the file.
+    Returns:
+      (str, bool) The digest of the file, and whether a new blob was written.
+    """
+    chunk_size = library_package.COPY_CHUNK_SIZE
+    digest = hashlib.sha1()
+    with files.OpenFile(path) as input_stream:
+      for chunk in iter(lambda: input_stream.read(chunk_size), ''):
+        digest.update(chunk)
+      digest = digest.hexdigest()
+      if self.HasBlob(digest):
+        return digest, False
+
+      def Copy(output_stream):
+        input_stream.seek(0)
+        for chunk in iter(lambda: input_stream.read(chunk_size), ''):
+          output_stream.write(chunk)
+
+      return digest, self._WriteBlob(digest, Copy)
+
+  def _WriteBlob(self, digest, writer):
+    """Write a blob through a temporary file, then rename it into place.
+
+    Args:
+      digest: (str) The digest of the contents.
+      writer: (func) Called with the open temporary file to write the
+        contents.
+    Returns:
+      (bool) Whether this call created the blob, rather than a concurrent
+      writer.
+    """
+    blob_path = self.BlobPath(digest)
+    blob_dir = os.path.dirname(blob_path)
+    if not os.path.isdir(blob_dir):
+      try:
+        os.makedirs(blob_dir)
+      except OSError:
+        if not os.path.isdir(blob_dir):
+          raise
+    fd, temp_path = tempfile.mkstemp(dir=blob_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        writer(f)
+      # Blobs may be hard linked into output trees; keep them from being
+      # changed through those links.
+      os.chmod(temp_path, 0444)
+      if os.path.exists(blob_path):
+        return False
+      os.rename(temp_path, blob_path)
+      return True
+    finally:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+  def _ManifestPath(self, name):
+    if not name or name.startswith('.') or '/' in name or os.sep in name:
+      raise ValueError('Invalid manifest name: %r' % name)
+    return os.path.join(self._manifest_dir, name)
+
+  def WriteManifest(self, name, entries):
+    """Write the manifest of a library.
+
+    Args:
+      name: (str) The name of the manifest. It may not contain '/'.
+      entries: (list) (file name, digest, size) for each file in the library.
+    """
+    manifest = {'files': [{'name': file_name, 'digest': digest, 'size': size}
+                          for file_name, digest, size in entries]}
+    path = self._ManifestPath(name)
+    fd, temp_path = tempfile.mkstemp(dir=self._manifest_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+      os.rename(temp_path, path)
+    finally:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+  def ReadManifest(self, name):
+    """Read the manifest of a library.
+
+    Args:
+      name: (str) The name of the manifest.
+    Returns:
+      (list) (file name, digest, size) for each file in the library.
+    Raises:
+      files.FileDoesNotExist: If there is no such manifest.
+    """
+    manifest = json.loads(files.GetFileContents(self._ManifestPath(name)))
+    return [(entry['name'], entry['digest'], entry['size'])
+            for entry in manifest['files']]
+
+  def ManifestNames(self):
+    """Returns the sorted names of the manifests in the store."""
+    return sorted(name for name in os.listdir(self._manifest_dir)
+                  if not name.endswith('.tmp'))
+
+  def Assemble(self, name, package_writer):
+    """Write the files of a library to a package writer.
+
+    Each blob is passed to the writer's IncludeFile, so the writer uses its
+    own way of copying (or linking) files. The caller is responsible for
+    calling package_writer.DoneWritingArchive().
+
+    Args:
+      name: (str) The name of the manifest.
+      package_writer: (LibraryPackage) The package to write to.
+    """
+    for file_name, digest, _ in self.ReadManifest(name):
+      package_writer.IncludeFile(self.BlobPath(digest), file_name)
+
+  def AssembleTree(self, name, output_dir):
+    """Make a directory tree of a library, hard linking the blobs.
+
+    Args:
+      name: (str) The name of the manifest.
+      output_dir: (str) The directory to create the tree in.
+    """
+    package_writer = filesystem_library_package.FilesystemLibraryPackage(
+        output_dir, link_files=True)
+    self.Assemble(name, package_writer)
+    package_writer.DoneWritingArchive()
+
+
+class ContentStoreLibraryPackage(LibraryPackage):
+  """The library package."""
+
+  def __init__(self, store, manifest_name):
+    """Create a new ContentStoreLibraryPackage.
+
+    Args:
+      store: (ContentStore) The store to write to.
+      manifest_name: (str) The name of the manifest to write for the library.
+    """
+    super(ContentStoreLibraryPackage, self).__init__()
+    self._store = store
+    self._manifest_name = manifest_name
+    self._entries = []
+    self._current_file_data = None
+    self._current_file_name = None
+    self.new_blobs = 0
+    self.reused_blobs = 0
+
+  def StartFile(self, name):
+    """Start writing a named file to the package.
+
+    Args:
+      name: (str) path which will identify the contents in the package.
+
+    Returns:
+      A file-like object to write the contents to.
+    """
+    self.EndFile()
+    self._current_file_data = StringIO.StringIO()
+    self._current_file_name = '%s%s' % (self._file_path_prefix, name)
+    return self._current_file_data
+
+  def EndFile(self):
+    """Store the current output file."""
+    if self._current_file_data:
+      data = self._current_file_data.getvalue()
+      self._current_file_data.close()
+      self._current_file_data = None
+      self._AddData(self._current_file_name, data)
+
+  def WriteDataAsFile(self, content, file_name):
+    """Store a blob of content as the given file name.
+
+    Args:
+      content: (str) The blob of content to write
+      file_name: (str) The file name.
+    """
+    self.EndFile()
+    self._AddData('%s%s' % (self._file_path_prefix, file_name), content)
+
+  def IncludeFile(self, path, name):
+    """Store a file from disk.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the package.
+    """
+    self.EndFile()
+    digest, is_new = self._store.PutFile(path)
+    self._AddEntry('%s%s' % (self._file_path_prefix, name), digest,
+                   os.path.getsize(path), is_new)
+
+  def _AddData(self, name, data):
+    if isinstance(data, unicode):
+      data = data.encode('utf-8')
+    digest, is_new = self._store.PutData(data)
+    self._AddEntry(name, digest, len(data), is_new)
+
+  def _AddEntry(self, name, digest, size, is_new):
+    if is_new:
+      self.new_blobs += 1
+    else:
+      self.reused_blobs += 1
+    self._entries.append((name, digest, size))
+
+  def DoneWritingArchive(self):
+    """Write the manifest of the library.
+
+    This method must be called for the library to appear in the store.
+    """
+    self.EndFile()
+    self._store.WriteManifest(self._manifest_name, self._entries)
@@ -0,0 +1,107 @@
+#!/usr/bin/python2.7
+# -*- coding: utf-8 -*-
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for content_store."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import content_store
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import memory_library_package
+
+
+class ContentStoreTest(basetest.TestCase):
+  _FILE_CONTENTS = u'this is a test - ☃☄'
+  _TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+  def setUp(self):
+    self._temp_dir = tempfile.mkdtemp()
+    self._store = content_store.ContentStore(
+        os.path.join(self._temp_dir, 'store'))
+
+  def tearDown(self):
+    shutil.rmtree(self._temp_dir)
+
+  def _WriteLibrary(self, manifest_name, extra_data):
+    package = content_store.ContentStoreLibraryPackage(self._store,
+                                                       manifest_name)
+    package.SetFilePathPrefix('lib')
+    stream = package.StartFile('a.txt')
+    stream.write(self._FILE_CONTENTS)
+    package.WriteDataAsFile(extra_data, 'b.txt')
+    package.IncludeFile(os.path.join(self._TEST_DATA_DIR, 'file1.txt'),
+                        'file1.txt')
+    package.DoneWritingArchive()
+    return package
+
+  def testWriteLibrary(self):
+    package = self._WriteLibrary('one', 'data')
+    self.assertEquals(3, package.new_blobs)
+    self.assertEquals(0, package.reused_blobs)
+    self.assertEquals(['one'], self._store.ManifestNames())
+
+    manifest = self._store.ReadManifest('one')
+    self.assertEquals(['lib/a.txt', 'lib/b.txt', 'lib/file1.txt'],
+                      [name for name, _, _ in manifest])
+    encoded = self._FILE_CONTENTS.encode('utf-8')
+    self.assertEquals((hashlib.sha1(encoded).hexdigest(), len(encoded)),
+                      manifest[0][1:])
+    # testdata/file1.txt is 125 bytes long.
+    self.assertEquals(125, manifest[2][2])
+    self.assertEquals('data', files.GetFileContents(
+        self._store.BlobPath(manifest[1][1])))
+
+  def testIdenticalContentIsStoredOnce(self):
+    self._WriteLibrary('one', 'data')
+    package = self._WriteLibrary('two', 'other data')
+    self.assertEquals(1, package.new_blobs)
+    self.assertEquals(2, package.reused_blobs)
+    self.assertEquals(['one', 'two'], self._store.ManifestNames())
+    blobs = list(files.IterFiles(os.path.join(self._temp_dir, 'store',
+                                              'blobs')))
+    self.assertEquals(4, len(blobs))
+
+  def testAssemble(self):
+    self._WriteLibrary('one', 'data')
+    package = memory_library_package.MemoryLibraryPackage()
+    self._store.Assemble('one', package)
+    package.DoneWritingArchive()
+    self.assertEquals(['lib/a.txt', 'lib/b.txt', 'lib/file1.txt'],
+                      list(package))
+    self.assertEquals(self._FILE_CONTENTS.encode('utf-8'), package['lib/a.txt'])
+    self.assertEquals('data', package['lib/b.txt'])
+
+  def testAssembleTreeLinksBlobs(self):
+    self._WriteLibrary('one', 'data')
+    output_dir = os.path.join(self._temp_dir, 'out')
+    self._store.AssembleTree('one', output_dir)
+    output_path = os.path.join(output_dir, 'lib', 'b.txt')
+    self.assertEquals('data', files.GetFileContents(output_path))
+    _, digest, _ = self._store.ReadManifest('one')[1]
+    self.assertTrue(os.path.samefile(self._store.BlobPath(digest),
+                                     output_path))
+
+  def testMissingManifest(self):
+    self.assertRaises(files.FileDoesNotExist, self._store.ReadManifest, 'none')
+    self.assertRaises(ValueError, self._store.ReadManifest, '../one')
+
+
+if __name__ == '__main__':
+  basetest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A LibraryPackage that counts the files and bytes written to another.
+
+Every operation is passed on to the underlying package, so that its own fast
+paths for included files are still used. Included files are counted by their
+size on disk, and the entries of included zip files by their uncompressed
+size.
+"""
+
+import os
+import zipfile
+
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys.library_package import LibraryPackage
+
+
+def _Size(data):
+  if isinstance(data, unicode):
+    return len(data.encode('utf-8'))
+  return len(data)
+
+
+class _CountingStream(object):
+  """Counts the bytes written through to a stream."""
+
+  def __init__(self, stream, package):
+    self._stream = stream
+    self._package = package
+
+  def write(self, data):  # pylint: disable=g-bad-name
+    self._package.bytes_written += _Size(data)
+    self._stream.write(data)
+
+  def writelines(self, lines):  # pylint: disable=g-bad-name
+    for line in lines:
+      self.write(line)
+
+  def __getattr__(self, name):
+    return getattr(self._stream, name)
+
+
+class CountingLibraryPackage(LibraryPackage):
+  """The library package."""
+
+  def __init__(self, package_writer):
+    """Create a new CountingLibraryPackage.
+
+    Args:
+      package_writer: (LibraryPackage) The package to write to. Any file path
+        prefix should be set on this package, not on that one.
+    """
+    super(CountingLibraryPackage, self).__init__()
+    self._package_writer = package_writer
+    self.files_written = 0
+    self.bytes_written = 0
+
+  @property
+  def package_writer(self):
+    return self._package_writer
+
+  def StartFile(self, name):
+    """Start writing a named file to the package.
+
+    Args:
+      name: (str) path which will identify the contents in the archive.
+
+    Returns:
+      A file-like object to write the contents to.
+    """
+    self.files_written += 1
+    return _CountingStream(
+        self._package_writer.StartFile('%s%s' % (self._file_path_prefix,
+                                                 name)),
+        self)
+
+  def EndFile(self):
+    self._package_writer.EndFile()
+
+  def WriteDataAsFile(self, content, file_name):
+    """Write a blob of content to the package as the given file name.
+
+    Args:
+      content: (str) The blob of content to write
+      file_name: (str) The file name.
+    """
+    self.files_written += 1
+    self.bytes_written += _Size(content)
+    self._package_writer.WriteDataAsFile(
+        content, '%s%s' % (self._file_path_prefix, file_name))
+
+  def CreateDirectory(self, directory):
+    self._package_writer.CreateDirectory(directory)
+
+  def IncludeFile(self, path, name):
+    """Read a file from disk into the package.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the archive.
+    """
+    self._package_writer.IncludeFile(path, '%s%s' % (self._file_path_prefix,
+                                                     name))
+    self.files_written += 1
+    if os.path.exists(path):
+      self.bytes_written += os.path.getsize(path)
+
+  def IncludeZipContents(self, path, directory):
+    """Include the contents of a zip file from disk.
+
+    Args:
+      path: (str) path to the zip file.
+      directory: (str) directory, in the archive, to put the contents under.
+    """
+    self._package_writer.IncludeZipContents(
+        path, '%s%s' % (self._file_path_prefix, directory))
+    with files.OpenFile(path) as input_stream:
+      for info in zipfile.ZipFile(input_stream, 'r').infolist():
+        if not info.filename.endswith('/'):
+          self.files_written += 1
+          self.bytes_written += info.file_size
+
+  def DoneWritingArchive(self):
+    self._package_writer.DoneWritingArchive()
+
+  def FileExtension(self):
+    return self._package_writer.FileExtension()
+
+  def MimeType(self):
+    return self._package_writer.MimeType()
@@ -0,0 +1,54 @@
+#!/usr/bin/python2.7
+# -*- coding: utf-8 -*-
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for counting_library_package."""
+
+import os
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import counting_library_package
+from googleapis.codegen.filesys import memory_library_package
+
+
+class CountingLibraryPackageTest(basetest.TestCase):
+  _FILE_CONTENTS = u'this is a test - ☃☄'
+  _TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+  def testCountsEverythingWritten(self):
+    memory = memory_library_package.MemoryLibraryPackage()
+    package = counting_library_package.CountingLibraryPackage(memory)
+    package.SetFilePathPrefix('top')
+    stream = package.StartFile('a/b')
+    stream.write(self._FILE_CONTENTS)
+    package.EndFile()
+    package.WriteDataAsFile('data', 'c')
+    package.IncludeFile(os.path.join(self._TEST_DATA_DIR, 'file1.txt'),
+                        'file1.txt')
+    package.IncludeZipContents(
+        os.path.join(self._TEST_DATA_DIR, 'zips/a-c.zip'), 'lib')
+    package.DoneWritingArchive()
+
+    self.assertEquals(['top/a/b', 'top/c', 'top/file1.txt',
+                       'top/lib/a/c/e_thing', 'top/lib/a/c/f_thing'],
+                      list(memory))
+    self.assertEquals(self._FILE_CONTENTS.encode('utf-8'), memory['top/a/b'])
+    self.assertEquals(5, package.files_written)
+    self.assertEquals(sum(len(memory[name]) for name in memory),
+                      package.bytes_written)
+
+
+if __name__ == '__main__':
+  basetest.main()
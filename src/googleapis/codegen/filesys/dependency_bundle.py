@@ -0,0 +1,150 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Prebuilt bundles of the static files in a dependencies tree.
+
+With include_dependencies, every library generated for a language variation
+copies the same files (mostly jars) from that variation's dependencies tree.
+A DependencyBundleCache packs those files into a zip file once, and later
+runs splice the bundle into their output package with
+LibraryPackage.IncludeZipContents. For zip output that is a raw copy of the
+bundle's entries.
+
+Only static files are bundled: those which WalkTemplateTree would copy
+unchanged no matter which API is being generated. Templates, files whose
+paths contain a '___' replacement marker, and files with special names
+(starting with '_') are left for WalkTemplateTree to handle as usual.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import zip_library_package
+
+# Bump this whenever a change to the bundle layout makes old bundles unusable.
+_BUNDLE_FORMAT_VERSION = '1'
+
+
+class DependencyBundle(object):
+  """A zip file holding the static files of a dependencies tree."""
+
+  def __init__(self, path, members):
+    """Construct a DependencyBundle.
+
+    Args:
+      path: (str) Path to the bundle zip file.
+      members: (frozenset) Paths, relative to the top of the dependencies
+        tree, of the files in the bundle.
+    """
+    self.path = path
+    self.members = members
+
+  def IncludeInPackage(self, package):
+    """Add the contents of the bundle to an output package.
+
+    Args:
+      package: (LibraryPackage) output package.
+    """
+    package.IncludeZipContents(self.path, '')
+
+  def FileFilter(self, template_path, unused_output_path):
+    """A WalkTemplateTree file_filter which skips the bundled files."""
+    return template_path not in self.members
+
+
+class DependencyBundleCache(object):
+  """A directory of dependency bundles, keyed by the contents of the tree."""
+
+  def __init__(self, cache_dir):
+    """Construct a DependencyBundleCache.
+
+    Args:
+      cache_dir: (str) Directory to hold the bundles. It is created if it does
+        not exist.
+    """
+    self._cache_dir = cache_dir
+    if not os.path.isdir(cache_dir):
+      os.makedirs(cache_dir)
+
+  def GetBundle(self, tree_root):
+    """Return the bundle for a dependencies tree, building it if needed.
+
+    A bundle is rebuilt whenever a file in the tree is added, removed or
+    changes size or modification time.
+
+    Args:
+      tree_root: (str) Path to the dependencies tree.
+    Returns:
+      (DependencyBundle) The bundle, or None if the tree has no static files.
+    """
+    static_files = ListStaticFiles(tree_root)
+    if not static_files:
+      return None
+    digest = hashlib.sha1()
+    digest.update(_BUNDLE_FORMAT_VERSION)
+    digest.update('\0%s\0' % os.path.abspath(tree_root))
+    for relative_path in static_files:
+      stat = os.stat(os.path.join(tree_root, relative_path))
+      digest.update('%s\0%d\0%r\0' % (relative_path, stat.st_size,
+                                      stat.st_mtime))
+    bundle_path = os.path.join(self._cache_dir, digest.hexdigest() + '.zip')
+    if not files.IsFile(bundle_path):
+      self._BuildBundle(tree_root, static_files, bundle_path)
+    return DependencyBundle(bundle_path, frozenset(static_files))
+
+  def _BuildBundle(self, tree_root, static_files, bundle_path):
+    """Write a bundle of files from a tree.
+
+    The bundle is written to a temporary file and renamed into place, so that
+    concurrent readers never see a partial bundle.
+
+    Args:
+      tree_root: (str) Path to the dependencies tree.
+      static_files: (list) Relative paths of the files to bundle.
+      bundle_path: (str) Path of the bundle to write.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as stream:
+        package = zip_library_package.ZipLibraryPackage(stream)
+        for relative_path in static_files:
+          package.IncludeFile(os.path.join(tree_root, relative_path),
+                              relative_path)
+        package.DoneWritingArchive()
+      os.rename(temp_path, bundle_path)
+    finally:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def ListStaticFiles(tree_root):
+  """List the files in a tree which are copied without any change.
+
+  Args:
+    tree_root: (str) Path to a template tree.
+  Returns:
+    (list) Sorted paths of the static files, relative to tree_root.
+  """
+  static_files = []
+  for path in files.IterFiles(tree_root):
+    relative_path = os.path.relpath(path, tree_root)
+    file_name = os.path.basename(relative_path)
+    if (file_name.startswith('_') or file_name.endswith('.tmpl') or
+        '___' in relative_path):
+      continue
+    static_files.append(relative_path)
+  return sorted(static_files)
@@ -0,0 +1,97 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for dependency_bundle."""
+
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import dependency_bundle
+from googleapis.codegen.filesys import zip_library_package
+
+
+class DependencyBundleTest(basetest.TestCase):
+
+  def setUp(self):
+    self._temp_dir = tempfile.mkdtemp()
+    self._tree = os.path.join(self._temp_dir, 'dependencies')
+    for path, content in [('lib/a.jar', 'jar a'),
+                          ('lib/b.jar', 'jar b'),
+                          ('LICENSE', 'license'),
+                          ('pom.xml.tmpl', '{{ api.name }}'),
+                          ('___package___/c.txt', 'c'),
+                          ('_special', 'special')]:
+      self._WriteTreeFile(path, content)
+    self._cache = dependency_bundle.DependencyBundleCache(
+        os.path.join(self._temp_dir, 'cache'))
+
+  def tearDown(self):
+    shutil.rmtree(self._temp_dir)
+
+  def _WriteTreeFile(self, path, content):
+    full_path = os.path.join(self._tree, path)
+    if not os.path.isdir(os.path.dirname(full_path)):
+      os.makedirs(os.path.dirname(full_path))
+    with open(full_path, 'wb') as f:
+      f.write(content)
+
+  def testListStaticFiles(self):
+    self.assertEquals(['LICENSE', 'lib/a.jar', 'lib/b.jar'],
+                      dependency_bundle.ListStaticFiles(self._tree))
+
+  def testGetBundle(self):
+    bundle = self._cache.GetBundle(self._tree)
+    self.assertEquals(frozenset(['LICENSE', 'lib/a.jar', 'lib/b.jar']),
+                      bundle.members)
+    self.assertFalse(bundle.FileFilter('lib/a.jar', 'lib/a.jar'))
+    self.assertTrue(bundle.FileFilter('pom.xml.tmpl', 'pom.xml'))
+
+    output_stream = io.BytesIO()
+    package = zip_library_package.ZipLibraryPackage(output_stream)
+    package.SetFilePathPrefix('top')
+    bundle.IncludeInPackage(package)
+    package.DoneWritingArchive()
+    archive = zipfile.ZipFile(io.BytesIO(output_stream.getvalue()), 'r')
+    self.assertEquals(
+        ['top/', 'top/LICENSE', 'top/lib/', 'top/lib/a.jar', 'top/lib/b.jar'],
+        archive.namelist())
+    self.assertEquals('jar b', archive.read('top/lib/b.jar'))
+
+  def testBundleIsReused(self):
+    bundle_path = self._cache.GetBundle(self._tree).path
+    os.utime(bundle_path, (0, 0))
+    self.assertEquals(bundle_path, self._cache.GetBundle(self._tree).path)
+    # Not rebuilt.
+    self.assertEquals(0, os.stat(bundle_path).st_mtime)
+
+  def testBundleIsRebuiltWhenTheTreeChanges(self):
+    bundle_path = self._cache.GetBundle(self._tree).path
+    self._WriteTreeFile('lib/a.jar', 'new jar a')
+    new_bundle = self._cache.GetBundle(self._tree)
+    self.assertNotEquals(bundle_path, new_bundle.path)
+    self.assertEquals('new jar a',
+                      zipfile.ZipFile(new_bundle.path).read('lib/a.jar'))
+
+  def testEmptyTree(self):
+    self.assertIsNone(self._cache.GetBundle(
+        os.path.join(self._temp_dir, 'no_such_tree')))
+
+
+if __name__ == '__main__':
+  basetest.main()
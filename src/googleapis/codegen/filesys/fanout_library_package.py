@@ -0,0 +1,203 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A LibraryPackage that writes the same files to several other packages.
+
+This lets one generation run produce, for example, a directory tree, a zip
+file and a tgz file at once. Each file is rendered and encoded once, and the
+resulting bytes are handed to every underlying package.
+
+By default each underlying package is driven by a thread of its own, so that
+one package can be compressing while another writes to disk. Operations on
+any one package still happen in the order they were made.
+"""
+
+import Queue
+import StringIO
+import threading
+
+from googleapis.codegen.filesys.library_package import LibraryPackage
+
+# How many operations may wait for each underlying package before the
+# producer blocks. This bounds the data held in memory.
+_MAX_QUEUED_OPERATIONS = 64
+
+
+class _PackageWorker(object):
+  """Performs operations on one package, in order, on a thread of its own."""
+
+  def __init__(self, package):
+    self._package = package
+    self._queue = Queue.Queue(_MAX_QUEUED_OPERATIONS)
+    self._error = None
+    self._thread = threading.Thread(target=self._Run)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def _Run(self):
+    while True:
+      operation = self._queue.get()
+      if operation is None:
+        return
+      if self._error:
+        continue  # Drain the queue; the error is reported by Finish.
+      method_name, args = operation
+      try:
+        getattr(self._package, method_name)(*args)
+      except Exception as e:  # pylint: disable=broad-except
+        self._error = e
+
+  def Submit(self, method_name, *args):
+    """Queue a call of a method of the package."""
+    self._queue.put((method_name, args))
+
+  def Finish(self):
+    """Wait for the queued operations to be done.
+
+    Raises:
+      Exception: the first exception raised by an operation, if any.
+    """
+    self._queue.put(None)
+    self._thread.join()
+    if self._error:
+      raise self._error  # pylint: disable=raising-bad-type
+
+
+class _InlineWorker(object):
+  """Performs operations on one package as soon as they are made."""
+
+  def __init__(self, package):
+    self._package = package
+
+  def Submit(self, method_name, *args):
+    getattr(self._package, method_name)(*args)
+
+  def Finish(self):
+    pass
+
+
+class FanOutLibraryPackage(LibraryPackage):
+  """The library package."""
+
+  def __init__(self, package_writers, parallel=True):
+    """Create a new FanOutLibraryPackage.
+
+    Args:
+      package_writers: (list) The LibraryPackages to write to. Any file path
+        prefix should be set on this package, not on these.
+      parallel: (bool) Write to each package on a thread of its own.
+    """
+    super(FanOutLibraryPackage, self).__init__()
+    self._package_writers = list(package_writers)
+    worker_class = _PackageWorker if parallel else _InlineWorker
+    self._workers = [worker_class(p) for p in self._package_writers]
+    self._current_file_data = None
+    self._current_file_name = None
+    self._done = False
+
+  @property
+  def package_writers(self):
+    return self._package_writers
+
+  def _Submit(self, method_name, *args):
+    for worker in self._workers:
+      worker.Submit(method_name, *args)
+
+  def StartFile(self, name):
+    """Start writing a named file to the packages.
+
+    Args:
+      name: (str) path which will identify the contents in the archive.
+
+    Returns:
+      A file-like object to write the contents to.
+    """
+    self.EndFile()
+    self._current_file_data = StringIO.StringIO()
+    self._current_file_name = '%s%s' % (self._file_path_prefix, name)
+    return self._current_file_data
+
+  def EndFile(self):
+    """Pass the current output file on to the packages."""
+    if self._current_file_data:
+      data = self._current_file_data.getvalue()
+      self._current_file_data.close()
+      self._current_file_data = None
+      self._WriteData(data, self._current_file_name)
+
+  def WriteDataAsFile(self, content, file_name):
+    """Write a blob of content to the packages as the given file name.
+
+    Args:
+      content: (str) The blob of content to write
+      file_name: (str) The file name.
+    """
+    self.EndFile()
+    self._WriteData(content, '%s%s' % (self._file_path_prefix, file_name))
+
+  def _WriteData(self, data, name):
+    # Encode once, here, rather than in every package.
+    if isinstance(data, unicode):
+      data = data.encode('utf-8')
+    self._Submit('WriteDataAsFile', data, name)
+
+  def CreateDirectory(self, directory):
+    """Create one or more directory entries in each package.
+
+    Args:
+      directory: (str) path of a directory in the archive
+    """
+    self._Submit('CreateDirectory', directory)
+
+  def IncludeFile(self, path, name):
+    """Read a file from disk into each package, using its own fast path.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the archive.
+    """
+    self.EndFile()
+    self._Submit('IncludeFile', path, '%s%s' % (self._file_path_prefix, name))
+
+  def IncludeZipContents(self, path, directory):
+    """Include the contents of a zip file from disk in each package.
+
+    Args:
+      path: (str) path to the zip file.
+      directory: (str) directory, in the archive, to put the contents under.
+    """
+    self.EndFile()
+    self._Submit('IncludeZipContents', path,
+                 '%s%s' % (self._file_path_prefix, directory))
+
+  def DoneWritingArchive(self):
+    """Finish every package.
+
+    Raises:
+      Exception: the first error raised while writing to any of the packages.
+    """
+    if self._done:
+      return
+    self._done = True
+    self.EndFile()
+    self._Submit('DoneWritingArchive')
+    errors = []
+    for worker in self._workers:
+      try:
+        worker.Finish()
+      except Exception as e:  # pylint: disable=broad-except
+        errors.append(e)
+    if errors:
+      raise errors[0]
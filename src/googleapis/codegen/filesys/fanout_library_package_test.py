@@ -0,0 +1,118 @@
+#!/usr/bin/python2.7
+# -*- coding: utf-8 -*-
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for fanout_library_package."""
+
+from io import BytesIO
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import fanout_library_package
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.filesys import package_writer_foundry
+from googleapis.codegen.filesys import zip_library_package
+from googleapis.codegen.filesys.library_package import LibraryPackage
+
+
+class _FailingPackage(LibraryPackage):
+
+  def WriteDataAsFile(self, content, file_name):
+    raise IOError('disk full')
+
+
+class FanOutLibraryPackageTest(basetest.TestCase):
+  _FILE_CONTENTS = u'this is a test - ☃☄'
+  _TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+  def _WriteFiles(self, package):
+    package.SetFilePathPrefix('top')
+    stream = package.StartFile('a/b')
+    stream.write(self._FILE_CONTENTS)
+    package.IncludeFile(os.path.join(self._TEST_DATA_DIR, 'file1.txt'),
+                        'file1.txt')
+    package.IncludeZipContents(
+        os.path.join(self._TEST_DATA_DIR, 'zips/a-c.zip'), 'lib')
+    package.DoneWritingArchive()
+
+  def _CheckFanOut(self, parallel):
+    memory = memory_library_package.MemoryLibraryPackage()
+    zip_stream = BytesIO()
+    zip_package = zip_library_package.ZipLibraryPackage(zip_stream)
+    self._WriteFiles(fanout_library_package.FanOutLibraryPackage(
+        [memory, zip_package], parallel=parallel))
+
+    expected_files = ['top/a/b', 'top/file1.txt', 'top/lib/a/c/e_thing',
+                      'top/lib/a/c/f_thing']
+    self.assertEquals(expected_files, list(memory))
+    self.assertEquals(self._FILE_CONTENTS.encode('utf-8'), memory['top/a/b'])
+    archive = zipfile.ZipFile(BytesIO(zip_stream.getvalue()), 'r')
+    self.assertEquals(
+        expected_files,
+        [name for name in archive.namelist() if not name.endswith('/')])
+    for name in expected_files:
+      self.assertEquals(memory[name], archive.read(name))
+
+  def testFanOut(self):
+    self._CheckFanOut(parallel=True)
+
+  def testFanOutInline(self):
+    self._CheckFanOut(parallel=False)
+
+  def testErrorsAreReported(self):
+    memory = memory_library_package.MemoryLibraryPackage()
+    package = fanout_library_package.FanOutLibraryPackage(
+        [_FailingPackage(), memory])
+    package.WriteDataAsFile('data', 'a')
+    package.WriteDataAsFile('data', 'b')
+    self.assertRaises(IOError, package.DoneWritingArchive)
+    # The other packages are still written.
+    self.assertEquals(['a', 'b'], list(memory))
+
+  def testFoundry(self):
+    temp_dir = tempfile.mkdtemp()
+    try:
+      output_dir = os.path.join(temp_dir, 'tree')
+      output_file = os.path.join(temp_dir, 'lib')
+      package = package_writer_foundry.GetPackageWriter(
+          output_dir=output_dir, output_file=output_file,
+          output_format='zip,tgz')
+      package.WriteDataAsFile('data', 'd/f')
+      package.DoneWritingArchive()
+
+      with open(os.path.join(output_dir, 'd/f')) as f:
+        self.assertEquals('data', f.read())
+      self.assertEquals('data',
+                        zipfile.ZipFile(output_file + '.zip').read('d/f'))
+      archive = tarfile.open(output_file + '.tgz', 'r:gz')
+      self.assertEquals('data', archive.extractfile('d/f').read())
+    finally:
+      shutil.rmtree(temp_dir)
+
+  def testFoundryErrors(self):
+    self.assertRaises(ValueError, package_writer_foundry.GetPackageWriter,
+                      output_file='x', output_format=['zip', 'zip'])
+    self.assertRaises(ValueError, package_writer_foundry.GetPackageWriter,
+                      output_file='x', output_format='zip,rar')
+    self.assertRaises(ValueError, package_writer_foundry.GetPackageWriter,
+                      output_dir='x', output_format='zip,tgz')
+
+
+if __name__ == '__main__':
+  basetest.main()
@@ -30,6 +30,28 @@ def GetFileContents(filename):
     raise
 
 
+def OpenFile(filename):
+  """Opens a file for reading in binary mode.
+
+  Use this, rather than GetFileContents, for files which may be large and can
+  be processed in pieces.
+
+  Args:
+    filename: path to a file.
+  Returns:
+    a file object.
+  Raises:
+    FileDoesNotExist: if the file does not exist
+    IOError: for other local IO errors
+  """
+  try:
+    return open(filename, 'rb')
+  except IOError as e:
+    if e.errno == errno.ENOENT:
+      raise FileDoesNotExist(filename)
+    raise
+
+
 def IsFile(filename):
   """Returns whether the named file is a regular file.
 
@@ -21,20 +21,44 @@ file system.
 
 __author__ = 'aiuto@google.com (Tony Aiuto)'
 
+import errno
 import os
+import shutil
+try:
+  import fcntl  # pylint: disable=g-import-not-at-top
+except ImportError:
+  fcntl = None  # Not available on this platform; files are always copied.
 
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import library_package
 from googleapis.codegen.filesys.library_package import LibraryPackage
 
+# ioctl request to share the extents of one file with another (Linux
+# FICLONE). Filesystems which support it (btrfs, xfs, ...) make the copy
+# without moving any data, and copy on write later.
+_FICLONE = 0x40049409
+
+# errnos which mean a link or clone can not be made here, so we should fall
+# back to copying.
+_CANNOT_SHARE_ERRNOS = frozenset([
+    errno.EXDEV, errno.EPERM, errno.EACCES, errno.EINVAL, errno.ENOTTY,
+    errno.EOPNOTSUPP, errno.EMLINK,
+    ])
+
 
 class FilesystemLibraryPackage(LibraryPackage):
   """The library package."""
 
-  def __init__(self, root_path):
+  def __init__(self, root_path, link_files=False):
     """Create a new FilesystemLibraryPackage.
 
     Args:
       root_path: (str) A path to a directory where the files will be written.
         The directory will be created if it does not exist.
+      link_files: (bool) Include files by hard linking them into the output
+        tree, where possible. The output then shares the files of the
+        template tree, so this is only safe when the output will not be
+        modified in place.
     Raises:
       ValueError: If the directory exists, but is not writable.
       OSError: If the directory does not exist and cannot be created.
@@ -44,6 +68,7 @@ class FilesystemLibraryPackage(LibraryPackage):
     self._MakePath(root_path)
     self._root_path = root_path
     self._current_file_stream = None
+    self._link_files = link_files
 
   def StartFile(self, name):
     """Start writing a named file to the package.
@@ -66,6 +91,54 @@ class FilesystemLibraryPackage(LibraryPackage):
       self._current_file_stream.close()
       self._current_file_stream = None
 
+  def CreateDirectory(self, directory):
+    """Create a directory, and any missing parents, in the output tree.
+
+    Args:
+      directory: (str) path of the directory, relative to the root path.
+    """
+    self._MakePath(os.path.join(self._root_path, directory))
+
+  def IncludeFile(self, path, name):
+    """Copy a file from disk into the output tree.
+
+    The file is hard linked if that was requested, then cloned if the
+    filesystem supports it, and otherwise copied in pieces.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the output tree.
+    """
+    self.EndFile()
+    full_path = os.path.join(self._root_path, self._file_path_prefix, name)
+    self._MakePath(os.path.dirname(full_path))
+    if self._link_files and self._LinkFile(path, full_path):
+      return
+    with files.OpenFile(path) as input_stream:
+      with open(full_path, 'wb') as output_stream:
+        if not _CloneFile(input_stream, output_stream):
+          shutil.copyfileobj(input_stream, output_stream,
+                             library_package.COPY_CHUNK_SIZE)
+
+  def _LinkFile(self, path, full_path):
+    """Hard link path to full_path, replacing anything already there.
+
+    Args:
+      path: (str) path to the existing file.
+      full_path: (str) path of the new link.
+    Returns:
+      (bool) True if the link was made.
+    """
+    if os.path.lexists(full_path):
+      os.remove(full_path)
+    try:
+      os.link(path, full_path)
+    except OSError as e:
+      if e.errno not in _CANNOT_SHARE_ERRNOS:
+        raise
+      return False
+    return True
+
   def _MakePath(self, path):
     """Create a directory path if needed.
 
@@ -80,3 +153,23 @@ class FilesystemLibraryPackage(LibraryPackage):
       if os.access(path, os.F_OK):
         raise ValueError('%s exists, but is not writable' % path)
       os.makedirs(path, 0755)
+
+
+def _CloneFile(input_stream, output_stream):
+  """Make output_stream a copy on write clone of input_stream.
+
+  Args:
+    input_stream: (file) an open file to clone.
+    output_stream: (file) an empty file, open for writing.
+  Returns:
+    (bool) True if the filesystem made the clone.
+  """
+  if fcntl is None:
+    return False
+  try:
+    fcntl.ioctl(output_stream.fileno(), _FICLONE, input_stream.fileno())
+  except IOError as e:
+    if e.errno not in _CANNOT_SHARE_ERRNOS:
+      raise
+    return False
+  return True
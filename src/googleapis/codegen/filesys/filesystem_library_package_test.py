@@ -0,0 +1,85 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for filesystem_library_package."""
+
+import os
+import shutil
+import tempfile
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import filesystem_library_package
+
+
+class FilesystemLibraryPackageTest(basetest.TestCase):
+  _TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+  def setUp(self):
+    self._output_dir = tempfile.mkdtemp()
+    self._source_path = os.path.join(self._TEST_DATA_DIR, 'file1.txt')
+    with open(self._source_path, 'rb') as f:
+      self._source_contents = f.read()
+
+  def tearDown(self):
+    shutil.rmtree(self._output_dir)
+
+  def _ReadOutput(self, name):
+    with open(os.path.join(self._output_dir, name), 'rb') as f:
+      return f.read()
+
+  def testWriteFile(self):
+    package = filesystem_library_package.FilesystemLibraryPackage(
+        self._output_dir)
+    package.SetFilePathPrefix('abc')
+    package.WriteDataAsFile('hello', 'd1/f1')
+    package.DoneWritingArchive()
+    self.assertEquals('hello', self._ReadOutput('abc/d1/f1'))
+
+  def testIncludeFile(self):
+    package = filesystem_library_package.FilesystemLibraryPackage(
+        self._output_dir)
+    package.IncludeFile(self._source_path, 'new_directory/file1.txt')
+    package.DoneWritingArchive()
+    output_path = os.path.join(self._output_dir, 'new_directory/file1.txt')
+    self.assertEquals(self._source_contents,
+                      self._ReadOutput('new_directory/file1.txt'))
+    # Without link_files, the output is a file of its own.
+    self.assertFalse(os.path.samefile(self._source_path, output_path))
+
+  def testIncludeFileWithLinks(self):
+    source_path = os.path.join(self._output_dir, 'source.txt')
+    shutil.copyfile(self._source_path, source_path)
+    package = filesystem_library_package.FilesystemLibraryPackage(
+        os.path.join(self._output_dir, 'out'), link_files=True)
+    # An existing file is replaced, not written through.
+    package.WriteDataAsFile('old contents', 'file1.txt')
+    package.IncludeFile(source_path, 'file1.txt')
+    package.DoneWritingArchive()
+    self.assertEquals(self._source_contents, self._ReadOutput('out/file1.txt'))
+    self.assertTrue(os.path.samefile(
+        source_path, os.path.join(self._output_dir, 'out/file1.txt')))
+
+  def testIncludeZipContents(self):
+    package = filesystem_library_package.FilesystemLibraryPackage(
+        self._output_dir)
+    package.IncludeZipContents(
+        os.path.join(self._TEST_DATA_DIR, 'zips/a-c.zip'), 'lib')
+    package.DoneWritingArchive()
+    self.assertEquals('092327347\n', self._ReadOutput('lib/a/c/e_thing'))
+    self.assertEquals('098214201\n', self._ReadOutput('lib/a/c/f_thing'))
+
+
+if __name__ == '__main__':
+  basetest.main()
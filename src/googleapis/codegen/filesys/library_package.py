@@ -23,10 +23,16 @@ __author__ = 'aiuto@google.com (Tony Aiuto)'
 
 import contextlib
 import os
+import shutil
+import zipfile
 
 from googleapis.codegen.filesys import files
 
 
+# The size of the pieces in which included files are copied.
+COPY_CHUNK_SIZE = 1 << 20
+
+
 class LibraryPackage(object):
   """The library package."""
 
@@ -78,13 +84,41 @@ class LibraryPackage(object):
   def IncludeFile(self, path, name):
     """Read a file from disk into the archive.
 
+    The file is copied in pieces, rather than read whole. Subclasses may
+    override this with a faster way to copy a file into their container.
+
     Args:
       path: (str) path to the file.
       name: (str) name the file should have in the archive.
     """
-    output_stream = self.StartFile(name)
-    output_stream.write(files.GetFileContents(path))
-    self.EndFile()
+    with files.OpenFile(path) as input_stream:
+      output_stream = self.StartFile(name)
+      shutil.copyfileobj(input_stream, output_stream, COPY_CHUNK_SIZE)
+      self.EndFile()
+
+  def IncludeZipContents(self, path, directory):
+    """Include the contents of a zip file from disk.
+
+    Each entry is read from the zip file and written as a file of its own,
+    one at a time. Subclasses may override this with a way to copy the
+    entries which avoids decompressing them.
+
+    Args:
+      path: (str) path to the zip file.
+      directory: (str) directory, in the archive, to put the contents under.
+    """
+    with files.OpenFile(path) as input_stream:
+      archive = zipfile.ZipFile(input_stream, 'r')
+      for info in archive.infolist():
+        name = os.path.join(directory, info.filename)
+        if name.endswith('/'):
+          self.CreateDirectory(
+              '%s%s' % (self._file_path_prefix, name.rstrip('/')))
+          continue
+        with archive.open(info) as entry:
+          output_stream = self.StartFile(name)
+          shutil.copyfileobj(entry, output_stream, COPY_CHUNK_SIZE)
+          self.EndFile()
 
   def IncludeManyFiles(self, paths, strip_prefix='', new_prefix=None):
     """Include a list of many files.
@@ -0,0 +1,190 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A LibraryPackage that keeps its files in memory.
+
+This is meant for embedding the generator in a service: a library can be
+generated without touching the file system, then served file by file or
+exported as a zip or tar archive. The contents are held as byte strings, and
+exporting hands those same strings to the archive writer.
+"""
+
+import collections
+import os
+import StringIO
+
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import tar_library_package
+from googleapis.codegen.filesys import zip_library_package
+from googleapis.codegen.filesys.library_package import LibraryPackage
+
+
+class PackageTooLargeError(Exception):
+  """A file or the whole package went over its size limit."""
+
+
+class MemoryLibraryPackage(LibraryPackage):
+  """The library package."""
+
+  def __init__(self, max_file_size=None, max_total_size=None):
+    """Create a new MemoryLibraryPackage.
+
+    Args:
+      max_file_size: (int) If set, the largest file, in bytes, the package
+        will accept.
+      max_total_size: (int) If set, the most bytes the package will hold.
+    """
+    super(MemoryLibraryPackage, self).__init__()
+    self._files = collections.OrderedDict()
+    self._total_size = 0
+    self._max_file_size = max_file_size
+    self._max_total_size = max_total_size
+    self._current_file_data = None
+    self._current_file_name = None
+
+  def StartFile(self, name):
+    """Start writing a named file to the package.
+
+    Args:
+      name: (str) path which will identify the contents in the package.
+
+    Returns:
+      A file-like object to write the contents to.
+    """
+    self.EndFile()
+    self._current_file_data = StringIO.StringIO()
+    self._current_file_name = '%s%s' % (self._file_path_prefix, name)
+    return self._current_file_data
+
+  def EndFile(self):
+    """Store the current output file in the package."""
+    if self._current_file_data:
+      data = self._current_file_data.getvalue()
+      self._current_file_data.close()
+      self._current_file_data = None
+      self._AddFile(self._current_file_name, data)
+
+  def WriteDataAsFile(self, content, file_name):
+    """Store a blob of content in the package as the given file name.
+
+    Args:
+      content: (str) The blob of content to write
+      file_name: (str) The file name.
+    """
+    self.EndFile()
+    self._AddFile('%s%s' % (self._file_path_prefix, file_name), content)
+
+  def IncludeFile(self, path, name):
+    """Read a file from disk into the package.
+
+    The size limits are checked before the file is read.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the package.
+    """
+    self.EndFile()
+    name = '%s%s' % (self._file_path_prefix, name)
+    with files.OpenFile(path) as input_stream:
+      self._CheckSize(name, os.fstat(input_stream.fileno()).st_size)
+      self._AddFile(name, input_stream.read())
+
+  def _CheckSize(self, name, size):
+    """Raise PackageTooLargeError if a file of this size will not fit.
+
+    Args:
+      name: (str) full name of the file in the package.
+      size: (int) size of the file.
+    Raises:
+      PackageTooLargeError: if the file is over a limit.
+    """
+    if self._max_file_size is not None and size > self._max_file_size:
+      raise PackageTooLargeError(
+          '%s is %d bytes, over the limit of %d' % (name, size,
+                                                    self._max_file_size))
+    total_size = self._total_size + size - len(self._files.get(name, ''))
+    if self._max_total_size is not None and total_size > self._max_total_size:
+      raise PackageTooLargeError(
+          'Adding %s makes the package %d bytes, over the limit of %d' % (
+              name, total_size, self._max_total_size))
+
+  def _AddFile(self, name, data):
+    if isinstance(data, unicode):
+      data = data.encode('utf-8')
+    self._CheckSize(name, len(data))
+    self._total_size += len(data) - len(self._files.pop(name, ''))
+    self._files[name] = data
+
+  def DoneWritingArchive(self):
+    """Signal that we are done writing the entire package."""
+    self.EndFile()
+
+  @property
+  def total_size(self):
+    """The number of bytes in all the files of the package."""
+    return self._total_size
+
+  def __len__(self):
+    return len(self._files)
+
+  def __iter__(self):
+    """Iterate over the file names, in the order they were added."""
+    return iter(self._files)
+
+  def __contains__(self, name):
+    return name in self._files
+
+  def __getitem__(self, name):
+    """Returns the contents of a file in the package."""
+    return self._files[name]
+
+  def iteritems(self):  # pylint: disable=g-bad-name
+    """Iterate over (name, contents) pairs, in the order they were added."""
+    return self._files.iteritems()
+
+  def ExportTo(self, package_writer):
+    """Write every file of this package to another package.
+
+    The file contents are passed on as they are, not copied. The caller is
+    responsible for calling package_writer.DoneWritingArchive().
+
+    Args:
+      package_writer: (LibraryPackage) the package to write to.
+    """
+    self.EndFile()
+    for name, data in self._files.iteritems():
+      package_writer.WriteDataAsFile(data, name)
+
+  def WriteZip(self, stream):
+    """Write the package as a zip file.
+
+    Args:
+      stream: (file) A file-like object to write to.
+    """
+    package_writer = zip_library_package.ZipLibraryPackage(stream)
+    self.ExportTo(package_writer)
+    package_writer.DoneWritingArchive()
+
+  def WriteTar(self, stream, compress=True):
+    """Write the package as a tar file.
+
+    Args:
+      stream: (file) A file-like object to write to.
+      compress: (boolean) Whether to gzip-compress the output.
+    """
+    package_writer = tar_library_package.TarLibraryPackage(stream,
+                                                           compress=compress)
+    self.ExportTo(package_writer)
+    package_writer.DoneWritingArchive()
@@ -0,0 +1,103 @@
+#!/usr/bin/python2.7
+# -*- coding: utf-8 -*-
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for memory_library_package."""
+
+from io import BytesIO
+import os
+import tarfile
+import zipfile
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.filesys import package_writer_foundry
+
+
+class MemoryLibraryPackageTest(basetest.TestCase):
+  _FILE_CONTENTS = u'this is a test - ☃☄'
+  _TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+  def setUp(self):
+    self._package = memory_library_package.MemoryLibraryPackage()
+
+  def testWriteFiles(self):
+    stream = self._package.StartFile('a/b')
+    stream.write(self._FILE_CONTENTS)
+    self._package.SetFilePathPrefix('top')
+    self._package.WriteDataAsFile('data', 'c')
+    self._package.IncludeFile(os.path.join(self._TEST_DATA_DIR, 'file1.txt'),
+                              'file1.txt')
+    self._package.DoneWritingArchive()
+
+    self.assertEquals(['a/b', 'top/c', 'top/file1.txt'], list(self._package))
+    self.assertEquals(self._FILE_CONTENTS.encode('utf-8'), self._package['a/b'])
+    self.assertEquals('data', self._package['top/c'])
+    # testdata/file1.txt is 125 bytes long.
+    self.assertEquals(125, len(self._package['top/file1.txt']))
+    self.assertEquals(len(self._FILE_CONTENTS.encode('utf-8')) + 4 + 125,
+                      self._package.total_size)
+
+  def testReplaceFile(self):
+    self._package.WriteDataAsFile('12345', 'a')
+    self._package.WriteDataAsFile('12', 'a')
+    self.assertEquals(1, len(self._package))
+    self.assertEquals(2, self._package.total_size)
+
+  def testSizeLimits(self):
+    package = memory_library_package.MemoryLibraryPackage(max_file_size=100,
+                                                          max_total_size=150)
+    package.WriteDataAsFile('x' * 100, 'a')
+    self.assertRaises(memory_library_package.PackageTooLargeError,
+                      package.WriteDataAsFile, 'x' * 101, 'b')
+    self.assertRaises(memory_library_package.PackageTooLargeError,
+                      package.IncludeFile,
+                      os.path.join(self._TEST_DATA_DIR, 'file1.txt'), 'c')
+    package.WriteDataAsFile('x' * 50, 'd')
+    self.assertRaises(memory_library_package.PackageTooLargeError,
+                      package.WriteDataAsFile, 'x', 'e')
+    # Replacing a file only counts the difference.
+    package.WriteDataAsFile('x' * 10, 'a')
+    self.assertEquals(60, package.total_size)
+    self.assertEquals(['a', 'd'], sorted(package))
+
+  def testWriteZip(self):
+    self._package.WriteDataAsFile(self._FILE_CONTENTS, 'd1/f1')
+    self._package.WriteDataAsFile('two', 'f2')
+    stream = BytesIO()
+    self._package.WriteZip(stream)
+    archive = zipfile.ZipFile(BytesIO(stream.getvalue()), 'r')
+    self.assertEquals(['d1/', 'd1/f1', 'f2'], archive.namelist())
+    self.assertEquals(self._FILE_CONTENTS.encode('utf-8'),
+                      archive.read('d1/f1'))
+
+  def testWriteTar(self):
+    self._package.WriteDataAsFile(self._FILE_CONTENTS, 'd1/f1')
+    self._package.WriteDataAsFile('two', 'f2')
+    stream = BytesIO()
+    self._package.WriteTar(stream)
+    archive = tarfile.open(fileobj=BytesIO(stream.getvalue()), mode='r:gz')
+    self.assertEquals(['d1/f1', 'f2'], archive.getnames())
+    self.assertEquals('two', archive.extractfile('f2').read())
+
+  def testFoundry(self):
+    package = package_writer_foundry.GetPackageWriter(output_format='memory')
+    self.assertIsInstance(package, memory_library_package.MemoryLibraryPackage)
+    self.assertRaises(ValueError, package_writer_foundry.GetPackageWriter,
+                      output_dir='/tmp', output_format='memory')
+
+
+if __name__ == '__main__':
+  basetest.main()
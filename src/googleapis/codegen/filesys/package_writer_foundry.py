@@ -1,14 +1,50 @@
 #!/usr/bin/python2.7
 """Foundary for getting a package writer."""
 
+from googleapis.codegen.filesys import fanout_library_package
 from googleapis.codegen.filesys import filesystem_library_package
+from googleapis.codegen.filesys import memory_library_package
 from googleapis.codegen.filesys import tar_library_package
 from googleapis.codegen.filesys import zip_library_package
 
 
+# The archive formats, which are also the extensions of their files.
+ARCHIVE_FORMATS = ('zip', 'tgz', 'tar')
+
+
 def GetPackageWriter(output_dir=None, output_file=None, output_format='zip'):
-  """Get an output writer for a package."""
+  """Get an output writer for a package.
+
+  Several formats may be asked for at once, in which case the writer fans
+  each file out to a writer for every one of them. Then output_file is the
+  path of the archives without their extension (which is the format name),
+  and output_dir, if given, adds a directory tree to the outputs.
+
+  Args:
+    output_dir: (str) A directory to write the files to.
+    output_file: (str) An archive file to write.
+    output_format: (str|list) The kind of archive to write: 'zip', 'tgz' or
+      'tar'. 'memory' means the package is kept in memory. A list, or a comma
+      separated string, names several formats.
+  Returns:
+    (LibraryPackage) The package writer.
+  Raises:
+    ValueError: If the combination of arguments is not valid.
+  """
+  if isinstance(output_format, basestring):
+    output_formats = output_format.split(',')
+  else:
+    output_formats = list(output_format)
+  if len(output_formats) > 1:
+    return _GetFanOutPackageWriter(output_dir, output_file, output_formats)
+  output_format = output_formats[0]
 
+  if output_format == 'memory':
+    if output_dir or output_file:
+      raise ValueError(
+          'GetPackageWriter takes neither output_dir nor output_file for'
+          ' memory output')
+    return memory_library_package.MemoryLibraryPackage()
   if not (output_dir or output_file):
     raise ValueError(
         'GetPackageWriter requires either output_dir or output_file')
@@ -29,3 +65,28 @@ def GetPackageWriter(output_dir=None, output_file=None, output_format='zip'):
     else:
       package_writer = zip_library_package.ZipLibraryPackage(out)
   return package_writer
+
+
+def _GetFanOutPackageWriter(output_dir, output_file, output_formats):
+  """Get a writer which writes to a package of each of several formats."""
+  if len(set(output_formats)) != len(output_formats):
+    raise ValueError('Output formats may only be given once: %s' %
+                     ','.join(output_formats))
+  for output_format in output_formats:
+    if output_format in ARCHIVE_FORMATS:
+      if not output_file:
+        raise ValueError('GetPackageWriter requires output_file for %s output'
+                         % output_format)
+    elif output_format != 'memory':
+      raise ValueError('Unknown output format: %s' % output_format)
+  package_writers = []
+  if output_dir:
+    package_writers.append(GetPackageWriter(output_dir=output_dir))
+  for output_format in output_formats:
+    if output_format == 'memory':
+      package_writers.append(GetPackageWriter(output_format=output_format))
+    else:
+      package_writers.append(GetPackageWriter(
+          output_file='%s.%s' % (output_file, output_format),
+          output_format=output_format))
+  return fanout_library_package.FanOutLibraryPackage(package_writers)
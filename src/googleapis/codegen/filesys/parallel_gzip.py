@@ -0,0 +1,163 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A gzip writer which compresses blocks of its input in parallel.
+
+The input is cut into fixed size blocks, and each block is deflated on its
+own, on a pool of threads (zlib releases the interpreter lock while it
+compresses). Every block but the last ends with a sync flush, which leaves
+the compressed data on a byte boundary, so the compressed blocks can simply
+be concatenated into one deflate stream. The result is a single, standard
+gzip member which any gzip reader can decompress.
+
+Because the blocks are fixed in size, the output depends only on the input
+and the compression level, never on the number of threads. The gzip header
+carries no file name and a fixed time stamp, so the same input always gives
+the same bytes.
+"""
+
+import collections
+import multiprocessing
+from multiprocessing import pool as multiprocessing_pool
+import struct
+import zlib
+
+# Uncompressed bytes per independently compressed block.
+BLOCK_SIZE = 1 << 17
+
+# Fixed gzip header: magic, deflate, no flags, mtime 0, no extra flags,
+# unknown OS.
+_GZIP_HEADER = '\037\213\010\000' + struct.pack('<L', 0) + '\000\377'
+
+
+def _CompressBlock(data, level, last):
+  """Deflate one block into a piece of a raw deflate stream.
+
+  Args:
+    data: (str) the uncompressed block.
+    level: (int) zlib compression level.
+    last: (bool) whether this is the final block of the stream.
+  Returns:
+    (str) the compressed block.
+  """
+  compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+  return compressor.compress(data) + compressor.flush(
+      zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter(object):
+  """A write only file-like object which gzips to another stream."""
+
+  def __init__(self, stream, threads=None, compresslevel=9):
+    """Construct a ParallelGzipWriter.
+
+    Args:
+      stream: (file) A file-like object to write the gzip data to. It is not
+        closed by close().
+      threads: (int) How many blocks to compress at once. Defaults to the
+        number of CPUs.
+      compresslevel: (int) zlib compression level, 1 to 9.
+    """
+    self._stream = stream
+    self._threads = threads or multiprocessing.cpu_count()
+    self._level = compresslevel
+    # Created with the first full block, so that small outputs, and writers
+    # abandoned before any output, never start threads.
+    self._pool = None
+    self._buffer = []
+    self._buffered_size = 0
+    self._pending = collections.deque()
+    self._crc = 0
+    self._size = 0
+    self._closed = False
+    stream.write(_GZIP_HEADER)
+
+  def write(self, data):  # pylint: disable=g-bad-name
+    if self._closed:
+      raise ValueError('write to a closed ParallelGzipWriter')
+    if not data:
+      return
+    self._crc = zlib.crc32(data, self._crc)
+    self._size += len(data)
+    self._buffer.append(data)
+    self._buffered_size += len(data)
+    if self._buffered_size >= BLOCK_SIZE:
+      data = ''.join(self._buffer)
+      offset = 0
+      while len(data) - offset >= BLOCK_SIZE:
+        self._SubmitBlock(data[offset:offset + BLOCK_SIZE], False)
+        offset += BLOCK_SIZE
+      rest = data[offset:]
+      self._buffer = [rest] if rest else []
+      self._buffered_size = len(rest)
+
+  def flush(self):  # pylint: disable=g-bad-name
+    """Flush what has been compressed so far. Blocks are not cut short."""
+    self._stream.flush()
+
+  def close(self):  # pylint: disable=g-bad-name
+    """Compress the remaining data and write the gzip trailer."""
+    if self._closed:
+      return
+    self._closed = True
+    self._SubmitBlock(''.join(self._buffer), True)
+    self._buffer = []
+    self._WritePending(0)
+    if self._pool:
+      self._pool.close()
+      self._pool.join()
+      self._pool = None
+    self._stream.write(struct.pack('<LL', self._crc & 0xffffffff,
+                                   self._size & 0xffffffff))
+    self._stream.flush()
+
+  def Abandon(self):
+    """Stop the compressing threads without finishing the gzip stream."""
+    self._closed = True
+    self._pending.clear()
+    if self._pool:
+      self._pool.terminate()
+      self._pool.join()
+      self._pool = None
+
+  def _SubmitBlock(self, data, last):
+    if not (self._pool or last) and self._threads > 1:
+      self._pool = multiprocessing_pool.ThreadPool(self._threads)
+    if self._pool:
+      self._pending.append(
+          self._pool.apply_async(_CompressBlock, (data, self._level, last)))
+      # Keep every thread busy, while bounding the data held in memory.
+      self._WritePending(2 * self._threads)
+    else:
+      self._stream.write(_CompressBlock(data, self._level, last))
+
+  def _WritePending(self, keep):
+    """Write out compressed blocks, in order, until at most keep remain."""
+    while len(self._pending) > keep:
+      self._stream.write(self._pending.popleft().get())
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, unused_value, unused_traceback):
+    if exc_type:
+      self.Abandon()
+    else:
+      self.close()
+
+  def __del__(self):
+    # A writer dropped without close(), e.g. when generation failed.
+    if getattr(self, '_pool', None):
+      self._pool.terminate()
@@ -0,0 +1,99 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for parallel_gzip."""
+
+import gzip
+import io
+import random
+import threading
+
+from google.apputils import basetest
+from googleapis.codegen.filesys import parallel_gzip
+
+
+class ParallelGzipWriterTest(basetest.TestCase):
+
+  def setUp(self):
+    rand = random.Random(42)
+    words = ['alpha', 'beta', 'gamma', 'delta', '\n', '{', '}']
+    # A few blocks worth, plus an odd tail.
+    self._data = ' '.join(
+        rand.choice(words)
+        for _ in xrange(parallel_gzip.BLOCK_SIZE // 2)) + 'tail'
+
+  def _Compress(self, pieces, threads):
+    output = io.BytesIO()
+    with parallel_gzip.ParallelGzipWriter(output, threads=threads) as writer:
+      for piece in pieces:
+        writer.write(piece)
+    return output.getvalue()
+
+  def _Decompress(self, data):
+    return gzip.GzipFile(fileobj=io.BytesIO(data)).read()
+
+  def testRoundTrip(self):
+    compressed = self._Compress([self._data], 4)
+    self.assertLess(len(compressed), len(self._data))
+    self.assertEquals(self._data, self._Decompress(compressed))
+
+  def testOutputDoesNotDependOnThreadsOrWrites(self):
+    expected = self._Compress([self._data], 1)
+    pieces = [self._data[i:i + 1000] for i in xrange(0, len(self._data), 1000)]
+    self.assertEquals(expected, self._Compress(pieces, 1))
+    self.assertEquals(expected, self._Compress(pieces, 3))
+    self.assertEquals(expected, self._Compress([self._data], 8))
+
+  def testEmpty(self):
+    compressed = self._Compress([], 2)
+    self.assertEquals('', self._Decompress(compressed))
+
+  def testWriteAfterClose(self):
+    writer = parallel_gzip.ParallelGzipWriter(io.BytesIO(), threads=1)
+    writer.close()
+    self.assertRaises(ValueError, writer.write, 'data')
+
+
+  def testThreadsStartOnlyForFullBlocks(self):
+    threads = threading.active_count()
+    writer = parallel_gzip.ParallelGzipWriter(io.BytesIO(), threads=4)
+    writer.write('small')
+    self.assertEquals(threads, threading.active_count())
+    writer.write(self._data)
+    self.assertLess(threads, threading.active_count())
+    writer.close()
+    self.assertEquals(threads, threading.active_count())
+
+  def testThreadsStopWhenAbandoned(self):
+    threads = threading.active_count()
+    try:
+      with parallel_gzip.ParallelGzipWriter(io.BytesIO(), threads=4) as w:
+        w.write(self._data)
+        raise IOError('failed')
+    except IOError:
+      pass
+    self.assertEquals(threads, threading.active_count())
+    writer = parallel_gzip.ParallelGzipWriter(io.BytesIO(), threads=4)
+    writer.write(self._data)
+    del writer
+    # Terminated workers exit as soon as they see the pool stop.
+    for _ in xrange(100):
+      if threading.active_count() == threads:
+        break
+      threading.Event().wait(0.01)
+    self.assertEquals(threads, threading.active_count())
+
+if __name__ == '__main__':
+  basetest.main()
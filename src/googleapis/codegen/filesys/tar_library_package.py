@@ -21,27 +21,43 @@ components generated and required by a library.
 
 __author__ = 'sammccall@google.com (Sam McCall)'
 
+import cStringIO
 from io import BytesIO
+import os
 import StringIO
 import tarfile
-import time
+import zipfile
 
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import parallel_gzip
 from googleapis.codegen.filesys.library_package import LibraryPackage
 
+# A constant modification time for every entry, so that the same files always
+# make the same archive. This is the time used by ZipLibraryPackage,
+# 1980-01-01 00:00:01 UTC.
+_ENTRY_MTIME = 315532801
+
 
 class TarLibraryPackage(LibraryPackage):
   """The library package."""
 
-  def __init__(self, stream, compress=True):
+  def __init__(self, stream, compress=True, compress_threads=None):
     """Create a new TarLibraryPackage.
 
     Args:
       stream: (file) A file-like object to write to.
       compress: (boolean) Whether to gzip-compress the output.
+      compress_threads: (int) How many threads to compress with. Defaults to
+        the number of CPUs. The output does not depend on this.
     """
     super(TarLibraryPackage, self).__init__()
-    mode = 'w:gz' if compress else 'w'
-    self._tar = tarfile.open(fileobj=stream, mode=mode)
+    self._gzip = None
+    if compress:
+      self._gzip = parallel_gzip.ParallelGzipWriter(
+          stream, threads=compress_threads)
+      stream = self._gzip
+    # Stream mode, so that the output need not support seek or tell.
+    self._tar = tarfile.open(fileobj=stream, mode='w|')
     self._current_file_data = None
     self._compress = compress
 
@@ -64,9 +80,7 @@ class TarLibraryPackage(LibraryPackage):
   def EndFile(self):
     """Flush the current output file to the tar container."""
     if self._current_file_data:
-      info = tarfile.TarInfo(self._current_file_name)
-      info.mtime = time.time()
-      info.mode = 0644
+      info = self._NewTarInfo(self._current_file_name)
       data = self._current_file_data.getvalue()
       if isinstance(data, unicode):
         data = data.encode('utf-8')
@@ -75,6 +89,67 @@ class TarLibraryPackage(LibraryPackage):
       self._current_file_data.close()
       self._current_file_data = None
 
+  def WriteDataAsFile(self, content, file_name):
+    """Write a blob of content to the archive, without buffering it again.
+
+    Args:
+      content: (str) The blob of content to write
+      file_name: (str) The file name.
+    """
+    if isinstance(content, unicode):
+      content = content.encode('utf-8')
+    # A cStringIO made from a str reads from it in place.
+    self._AddStream(file_name, len(content), cStringIO.StringIO(content))
+
+  def IncludeFile(self, path, name):
+    """Stream a file from disk into the archive.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the archive.
+    """
+    with files.OpenFile(path) as input_stream:
+      self._AddStream(name, os.fstat(input_stream.fileno()).st_size,
+                      input_stream)
+
+  def IncludeZipContents(self, path, directory):
+    """Stream the contents of a zip file from disk into the archive.
+
+    Args:
+      path: (str) path to the zip file.
+      directory: (str) directory, in the archive, to put the contents under.
+    """
+    with files.OpenFile(path) as input_stream:
+      archive = zipfile.ZipFile(input_stream, 'r')
+      for info in archive.infolist():
+        if info.filename.endswith('/'):
+          continue  # Like StartFile, we do not make directory entries.
+        with archive.open(info) as entry:
+          self._AddStream(os.path.join(directory, info.filename),
+                          info.file_size, entry)
+
+  def _AddStream(self, name, size, input_stream):
+    """Add a file to the archive, copying it from a stream in pieces.
+
+    Args:
+      name: (str) name the file should have in the archive.
+      size: (int) the number of bytes to copy from input_stream.
+      input_stream: (file) a file-like object to read the contents from.
+    """
+    self.EndFile()
+    name = '%s%s' % (self._file_path_prefix, name)
+    # Let this explode if the name is not ascii.
+    info = self._NewTarInfo(name.encode('ascii'))
+    info.size = size
+    self._tar.addfile(info, input_stream)
+
+  def _NewTarInfo(self, name):
+    """Returns a TarInfo for a file entry with the standard attributes."""
+    info = tarfile.TarInfo(name)
+    info.mtime = _ENTRY_MTIME
+    info.mode = 0644
+    return info
+
   def DoneWritingArchive(self):
     """Signal that we are done writing the entire package.
 
@@ -85,6 +160,9 @@ class TarLibraryPackage(LibraryPackage):
       self.EndFile()
       self._tar.close()
       self._tar = None
+      if self._gzip:
+        self._gzip.close()
+        self._gzip = None
 
   def FileExtension(self):
     """Returns the file extension for this archive, either tar or tgz."""
@@ -124,6 +124,35 @@ class TarLibraryPackageTest(basetest.TestCase):
     self.assertEquals(1, len(info_list))  # no explicit folders
     self.assertEquals(made_up_path, info_list[0].name)
     self.assertEquals(expected_size, info_list[0].size)
+    with open(os.path.join(self._TEST_DATA_DIR, 'file1.txt'), 'rb') as f:
+      self.assertEquals(f.read(), archive.extractfile(info_list[0]).read())
+
+  def testIncludeZipContents(self):
+    self._package.IncludeZipContents(
+        os.path.join(self._TEST_DATA_DIR, 'zips/a-c.zip'), 'lib')
+    self._package.DoneWritingArchive()
+
+    archive = tarfile.open(fileobj=BytesIO(self._output_stream.getvalue()),
+                           mode='r:gz')
+    self.assertEquals(['lib/a/c/e_thing', 'lib/a/c/f_thing'],
+                      archive.getnames())
+    self.assertEquals('092327347\n',
+                      archive.extractfile('lib/a/c/e_thing').read())
+
+  def testOutputIsDeterministic(self):
+    outputs = []
+    for _ in range(2):
+      stream = BytesIO()
+      package = tar_library_package.TarLibraryPackage(stream)
+      package.WriteDataAsFile(self._FILE_CONTENTS, self._FILE_NAME)
+      package.IncludeFile(os.path.join(self._TEST_DATA_DIR, 'file1.txt'),
+                          'file1.txt')
+      package.DoneWritingArchive()
+      outputs.append(stream.getvalue())
+    self.assertEquals(outputs[0], outputs[1])
+    archive = tarfile.open(fileobj=BytesIO(outputs[0]), mode='r:gz')
+    self.assertEquals(set([315532801]),
+                      set(info.mtime for info in archive.getmembers()))
 
   def testManyFiles(self):
     top_of_tree = os.path.join(self._TEST_DATA_DIR, 'tree/')
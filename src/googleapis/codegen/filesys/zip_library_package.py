@@ -23,10 +23,21 @@ __author__ = 'aiuto@google.com (Tony Aiuto)'
 
 import os
 import StringIO
+import struct
 import zipfile
+import zlib
 
+from googleapis.codegen.filesys import files
+from googleapis.codegen.filesys import library_package
 from googleapis.codegen.filesys.library_package import LibraryPackage
 
+# General purpose flag bits, from the zip file format specification.
+_ENCRYPTED_FLAG = 0x1
+_DATA_DESCRIPTOR_FLAG = 0x8
+
+# Compression methods which ZipFile can write entries for.
+_COPYABLE_COMPRESS_TYPES = frozenset([zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+
 
 class ZipLibraryPackage(LibraryPackage):
   """The library package."""
@@ -106,6 +117,125 @@ class ZipLibraryPackage(LibraryPackage):
       self._current_file_data.close()
       self._current_file_data = None
 
+  def WriteDataAsFile(self, content, file_name):
+    """Write a blob of content to the archive, without buffering it again.
+
+    Args:
+      content: (str) The blob of content to write
+      file_name: (str) The file name.
+    """
+    info = self._NewEntryInfo(file_name)
+    if isinstance(content, unicode):
+      content = content.encode('utf-8')
+    self._zip.writestr(info, content)
+
+  def IncludeFile(self, path, name):
+    """Stream a file from disk into the archive.
+
+    The entry is stored, not compressed, so its header only needs the size
+    and CRC of the file. Those are found by a first pass over the file; the
+    second pass copies it to the archive. Neither pass holds more than a
+    chunk of the file in memory, and the output stream need not be seekable.
+
+    Args:
+      path: (str) path to the file.
+      name: (str) name the file should have in the archive.
+    """
+    chunk_size = library_package.COPY_CHUNK_SIZE
+    with files.OpenFile(path) as input_stream:
+      crc = 0
+      size = 0
+      for chunk in iter(lambda: input_stream.read(chunk_size), ''):
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+      info = self._NewEntryInfo(name)
+      info.compress_type = zipfile.ZIP_STORED
+      info.file_size = info.compress_size = size
+      info.CRC = crc & 0xffffffff
+      input_stream.seek(0)
+      self._WriteEntry(info, input_stream, size)
+
+  def IncludeZipContents(self, path, directory):
+    """Copy the contents of a zip file from disk into the archive.
+
+    Entries are copied as they are, still compressed, so each costs little
+    more than copying its bytes. Entries which zipfile could not write itself
+    (encrypted or with unsupported compression) are expanded instead.
+
+    Args:
+      path: (str) path to the zip file.
+      directory: (str) directory, in the archive, to put the contents under.
+    """
+    with files.OpenFile(path) as input_stream:
+      archive = zipfile.ZipFile(input_stream, 'r')
+      for source_info in archive.infolist():
+        name = os.path.join(directory, source_info.filename)
+        if name.endswith('/'):
+          self.EndFile()
+          self.CreateDirectory(
+              '%s%s' % (self._file_path_prefix, name.rstrip('/')))
+          continue
+        if (source_info.flag_bits & _ENCRYPTED_FLAG or
+            source_info.compress_type not in _COPYABLE_COMPRESS_TYPES):
+          with archive.open(source_info) as entry:
+            self.WriteDataAsFile(entry.read(), name)
+          continue
+        info = self._NewEntryInfo(name)
+        info.compress_type = source_info.compress_type
+        # Sizes and CRC go in the header we write, not in a data descriptor.
+        info.flag_bits = source_info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+        info.file_size = source_info.file_size
+        info.compress_size = source_info.compress_size
+        info.CRC = source_info.CRC
+        _SeekToEntryData(input_stream, source_info)
+        self._WriteEntry(info, input_stream, source_info.compress_size)
+
+  def _NewEntryInfo(self, name):
+    """Start a new file entry, creating its directories.
+
+    Args:
+      name: (str) name the file should have in the archive.
+    Returns:
+      (ZipInfo) the entry's info, with its name, time stamp and permissions.
+    """
+    self.EndFile()
+    name = '%s%s' % (self._file_path_prefix, name)
+    # Let this explode if the name is not ascii.
+    name = name.encode('ascii')
+    self.CreateDirectory(os.path.dirname(name))
+    info = zipfile.ZipInfo(name, date_time=self.ZipTimestamp())
+    info.external_attr = 0644 << 16
+    return info
+
+  def _WriteEntry(self, info, input_stream, size):
+    """Write an entry whose header fields are already known.
+
+    This follows ZipFile.writestr, with the data copied in pieces.
+
+    Args:
+      info: (ZipInfo) the complete info for the entry.
+      input_stream: (file) a file-like object to read the entry data from.
+      size: (int) the number of bytes of entry data to copy.
+    """
+    # pylint: disable=protected-access
+    zip_file = self._zip
+    info.header_offset = zip_file.fp.tell()
+    zip_file._writecheck(info)
+    zip_file._didModify = True
+    zip_file.fp.write(info.FileHeader(
+        info.file_size > zipfile.ZIP64_LIMIT or
+        info.compress_size > zipfile.ZIP64_LIMIT))
+    chunk_size = library_package.COPY_CHUNK_SIZE
+    while size > 0:
+      chunk = input_stream.read(min(chunk_size, size))
+      if not chunk:
+        raise IOError('Unexpected end of data for %s' % info.filename)
+      zip_file.fp.write(chunk)
+      size -= len(chunk)
+    zip_file.fp.flush()
+    zip_file.filelist.append(info)
+    zip_file.NameToInfo[info.filename] = info
+
   def ZipTimestamp(self):
     # Use a constant timestamp to avoid non-deterministic build-time output.
     return (1980, 1, 1, 0, 0, 1)
@@ -128,3 +258,25 @@ class ZipLibraryPackage(LibraryPackage):
   def MimeType(self):
     """Returns the MIME type for this archive."""
     return 'application/zip'
+
+
+def _SeekToEntryData(input_stream, info):
+  """Position a zip file stream at the start of an entry's (compressed) data.
+
+  Args:
+    input_stream: (file) the zip file.
+    info: (ZipInfo) the entry, as read from the zip file's directory.
+  Raises:
+    zipfile.BadZipfile: if the entry's local header is missing.
+  """
+  input_stream.seek(info.header_offset)
+  header = input_stream.read(zipfile.sizeFileHeader)
+  if len(header) != zipfile.sizeFileHeader:
+    raise zipfile.BadZipfile('Truncated file header for %s' % info.filename)
+  fields = struct.unpack(zipfile.structFileHeader, header)
+  if fields[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:  # pylint: disable=protected-access
+    raise zipfile.BadZipfile('Bad magic number for %s' % info.filename)
+  input_stream.seek(
+      fields[zipfile._FH_FILENAME_LENGTH] +  # pylint: disable=protected-access
+      fields[zipfile._FH_EXTRA_FIELD_LENGTH],  # pylint: disable=protected-access
+      os.SEEK_CUR)
@@ -21,6 +21,8 @@ __author__ = 'aiuto@google.com (Tony Aiuto)'
 
 import io
 import os
+import shutil
+import tempfile
 import zipfile
 
 import gflags as flags
@@ -105,6 +107,59 @@ class ZipLibraryPackageTest(basetest.TestCase):
     self.assertEquals(made_up_path, info_list[1].filename)
     self.assertEquals(expected_size, info_list[1].file_size)
 
+  def testIncludeFileMatchesWrittenData(self):
+    path = os.path.join(self._TEST_DATA_DIR, 'file1.txt')
+    with open(path, 'rb') as f:
+      content = f.read()
+    self._package.IncludeFile(path, 'included.txt')
+    self._package.DoneWritingArchive()
+    written_stream = io.BytesIO()
+    written = zip_library_package.ZipLibraryPackage(written_stream)
+    written.WriteDataAsFile(content, 'included.txt')
+    written.DoneWritingArchive()
+
+    # Streaming the file in makes exactly the same archive.
+    self.assertEquals(written_stream.getvalue(),
+                      self._output_stream.getvalue())
+    archive = zipfile.ZipFile(io.BytesIO(self._output_stream.getvalue()), 'r')
+    self.assertIsNone(archive.testzip())
+    self.assertEquals(content, archive.read('included.txt'))
+
+  def testIncludeZipContents(self):
+    self._package.IncludeZipContents(
+        os.path.join(self._TEST_DATA_DIR, 'zips/a-c.zip'), 'lib')
+    self._package.DoneWritingArchive()
+
+    archive = zipfile.ZipFile(io.BytesIO(self._output_stream.getvalue()), 'r')
+    self.assertIsNone(archive.testzip())
+    self.assertEquals(
+        ['lib/', 'lib/a/', 'lib/a/c/', 'lib/a/c/e_thing', 'lib/a/c/f_thing'],
+        [info.filename for info in archive.infolist()])
+    self.assertEquals('092327347\n', archive.read('lib/a/c/e_thing'))
+    self.assertEquals('098214201\n', archive.read('lib/a/c/f_thing'))
+
+  def testIncludeZipContentsCopiesCompressedEntries(self):
+    temp_dir = tempfile.mkdtemp()
+    try:
+      source_path = os.path.join(temp_dir, 'source.zip')
+      content = 'compress me ' * 1000
+      source = zipfile.ZipFile(source_path, 'w', zipfile.ZIP_DEFLATED)
+      source.writestr('big.txt', content)
+      source.close()
+      source_size = zipfile.ZipFile(source_path).getinfo(
+          'big.txt').compress_size
+      self._package.IncludeZipContents(source_path, '')
+      self._package.DoneWritingArchive()
+    finally:
+      shutil.rmtree(temp_dir)
+
+    archive = zipfile.ZipFile(io.BytesIO(self._output_stream.getvalue()), 'r')
+    self.assertIsNone(archive.testzip())
+    info = archive.getinfo('big.txt')
+    self.assertEquals(zipfile.ZIP_DEFLATED, info.compress_type)
+    self.assertEquals(source_size, info.compress_size)
+    self.assertEquals(content, archive.read('big.txt'))
+
   def testManyFiles(self):
     top_of_tree = os.path.join(self._TEST_DATA_DIR, 'tree/')
     total_files_in_testdata_tree = 3  # determined by hand
@@ -23,24 +23,32 @@ $ PYTHONPATH=$(/bin/pwd)/src \
 
 __author__ = 'aiuto@google.com (Tony Aiuto)'
 
-import collections
-import json
 import logging
 import os
+import sys
 
 
-import httplib2
-
 from google.apputils import app
 import gflags as flags
-from google.apputils import resources
+from googleapis.codegen import generation_stats
 from googleapis.codegen import generator_lookup
+from googleapis.codegen import memory_tracer
+from googleapis.codegen import template_profiler
+from googleapis.codegen.filesys import content_store
+from googleapis.codegen.filesys import counting_library_package
 from googleapis.codegen.filesys import package_writer_foundry
+from googleapis.codegen.utilities import discovery_fetcher
+from googleapis.codegen.utilities import discovery_loader
 from googleapis.codegen.targets import Targets
 
 FLAGS = flags.FLAGS
 
 
+flags.DEFINE_string(
+    'api_cache_dir',
+    None,
+    'A directory in which to cache constructed API models, so that later'
+    ' runs on an unchanged discovery document can skip building them.')
 flags.DEFINE_string(
     'api_name',
     None,
@@ -49,6 +57,18 @@ flags.DEFINE_string(
     'api_version',
     None,
     'version of "api_name" to generate for.  E.g. "v1".')
+flags.DEFINE_string(
+    'dependency_bundle_dir',
+    None,
+    'A directory in which to keep prebuilt bundles of the dependency files'
+    ' included with --output_type=full, so that later runs can copy them'
+    ' into the output in one piece.')
+flags.DEFINE_string(
+    'discovery_cache_dir',
+    None,
+    'A directory in which to cache discovery documents fetched for'
+    ' --api_name. A cached document is only transferred again if it has'
+    ' changed on the server.')
 flags.DEFINE_string(
     'discovery_server',
     'www.googleapis.com',
@@ -82,6 +102,24 @@ flags.DEFINE_string(
      ' include file. Otherwise use the standard output file naming and produce'
      ' a source file for the overall API and one for each schema. This option'
      ' is only supported for C++ and Objective-C.'))
+flags.DEFINE_string(
+    'content_store_dir',
+    None,
+    'A path to a content addressed store to write the generated library to,'
+    ' instead of --output_dir or --output_file. Files which are the same in'
+    ' several libraries are stored once.')
+flags.DEFINE_string(
+    'incremental_state_dir',
+    None,
+    'A directory to keep the state of generating this library in. When it'
+    ' holds the state of an earlier run, only the files affected by changes'
+    ' since then are rendered again. Use a separate directory for each'
+    ' library.')
+flags.DEFINE_string(
+    'manifest_name',
+    None,
+    'The name of the library in --content_store_dir. Defaults to'
+    ' <api name>-<api version>-<language>.')
 flags.DEFINE_string(
     'output_dir',
     None,
@@ -91,11 +129,13 @@ flags.DEFINE_string(
     None,
     'An output file path to contain the archive for the generated library.'
     ' The contents of the file are determined by the output_format parameter')
-flags.DEFINE_enum(
+flags.DEFINE_list(
     'output_format',
-    'zip',
-    ['zip', 'tgz', 'tar'],
-    'What format to use for --output_file.')
+    ['zip'],
+    'What format to use for --output_file: zip, tgz or tar. Several comma'
+    ' separated formats may be given, to write them all in one pass. Then'
+    ' --output_file is the path of the archives without their extension, and'
+    ' --output_dir may also be given.')
 flags.DEFINE_enum(
     'output_type',
     'plain',
@@ -110,21 +150,47 @@ flags.DEFINE_string(
     'Use an alternate path for the generated code. This must be a file path'
     ' using "/" as a separator, not "."'
     )
+flags.DEFINE_string(
+    'profile_templates',
+    None,
+    'Profile the rendering of each template. A report of the templates, by'
+    ' the time spent in each, is printed and the results are written as JSON'
+    ' to this file.')
+flags.DEFINE_string(
+    'stats_json',
+    None,
+    'Write the time spent in each phase of the generation, and counts of'
+    ' what was generated, as JSON to this file.')
+flags.DEFINE_boolean(
+    'trace_memory',
+    False,
+    'Sample the memory use at the end of each phase of the generation, and'
+    ' print a report of it. The samples are also written to --stats_json.'
+    ' This slows generation down.')
 flags.DEFINE_bool('version_package', False, 'Put API version in package paths')
 flags.DEFINE_bool('verbose', False, 'Enable verbose logging')
 
+flags.DECLARE_key_flag('api_cache_dir')
 flags.DECLARE_key_flag('api_name')
 flags.DECLARE_key_flag('api_version')
+flags.DECLARE_key_flag('content_store_dir')
+flags.DECLARE_key_flag('dependency_bundle_dir')
+flags.DECLARE_key_flag('discovery_cache_dir')
 flags.DECLARE_key_flag('include_timestamp')
+flags.DECLARE_key_flag('incremental_state_dir')
 flags.DECLARE_key_flag('input')
 flags.DECLARE_key_flag('language')
 flags.DECLARE_key_flag('language_variant')
+flags.DECLARE_key_flag('manifest_name')
 flags.DECLARE_key_flag('monolithic_source_name')
 flags.DECLARE_key_flag('output_dir')
 flags.DECLARE_key_flag('output_file')
 flags.DECLARE_key_flag('output_format')
 flags.DECLARE_key_flag('output_type')
 flags.DECLARE_key_flag('package_path')
+flags.DECLARE_key_flag('profile_templates')
+flags.DECLARE_key_flag('stats_json')
+flags.DECLARE_key_flag('trace_memory')
 flags.DECLARE_key_flag('version_package')
 
 
@@ -134,41 +200,78 @@ def main(unused_argv):
   if FLAGS.api_name and FLAGS.input:
     raise app.UsageError(
         'You can only specify one of --api_name or --input')
-  if not (FLAGS.output_dir or FLAGS.output_file):
+  if FLAGS.content_store_dir:
+    if FLAGS.output_dir or FLAGS.output_file:
+      raise app.UsageError(
+          'You can not specify --output_dir or --output_file with'
+          ' --content_store_dir')
+  elif not (FLAGS.output_dir or FLAGS.output_file):
     raise app.UsageError(
-        'You must specify one of --output_dir or --output_file')
-  if FLAGS.output_dir and FLAGS.output_file:
+        'You must specify one of --output_dir, --output_file or'
+        ' --content_store_dir')
+  for output_format in FLAGS.output_format:
+    if output_format not in package_writer_foundry.ARCHIVE_FORMATS:
+      raise app.UsageError('Unknown --output_format: %s' % output_format)
+  multiple_formats = len(FLAGS.output_format) > 1
+  if FLAGS.output_dir and FLAGS.output_file and not multiple_formats:
     raise app.UsageError(
         'You can only specify one of --output_dir or --output_file')
+  if multiple_formats and not FLAGS.output_file:
+    raise app.UsageError(
+        'You must specify --output_file with several --output_format values')
 
   if FLAGS.verbose:
     logging.basicConfig(level=logging.DEBUG)
 
 
   # Get the discovery document
+  tracer = None
+  if FLAGS.trace_memory:
+    tracer = memory_tracer.MemoryTracer()
+    tracer.Sample('start')
+  stats = generation_stats.GenerationStats(memory_tracer=tracer)
   if FLAGS.api_name:
     if not FLAGS.api_version:
       raise app.UsageError('You must specify --api_version with --api_name')
     content = GetApiDiscovery(FLAGS.api_name, FLAGS.api_version)
+    with stats.Timing('load'):
+      discovery_doc = discovery_loader.Loads(content)
+    if discovery_doc.get('error'):
+      raise app.Error(discovery_doc['error'])
+  else:
+    with stats.Timing('load'):
+      discovery_doc = discovery_loader.LoadFile(FLAGS.input)
+
+
+  if FLAGS.content_store_dir:
+    manifest_name = FLAGS.manifest_name or '%s-%s-%s' % (
+        discovery_doc['name'], discovery_doc['version'], FLAGS.language)
+    package_writer = content_store.ContentStoreLibraryPackage(
+        content_store.ContentStore(FLAGS.content_store_dir), manifest_name)
   else:
-    f = open(FLAGS.input)
-    content = f.read()
-    f.close()
-  discovery_doc = json.loads(content, object_pairs_hook=collections.OrderedDict)
-
-
-  package_writer = package_writer_foundry.GetPackageWriter(
-      output_dir=FLAGS.output_dir, output_file=FLAGS.output_file,
-      output_format=FLAGS.output_format)
-
-  Generate(discovery_doc=discovery_doc,
-           package_writer=package_writer,
-           include_timestamp=FLAGS.include_timestamp,
-           version_package=FLAGS.version_package,
-           package_path=FLAGS.package_path,
-           output_type=FLAGS.output_type,
-           language=FLAGS.language,
-           language_variant=FLAGS.language_variant)
+    package_writer = package_writer_foundry.GetPackageWriter(
+        output_dir=FLAGS.output_dir, output_file=FLAGS.output_file,
+        output_format=FLAGS.output_format)
+
+  with template_profiler.ProfileTo(FLAGS.profile_templates):
+    Generate(discovery_doc=discovery_doc,
+             package_writer=package_writer,
+             include_timestamp=FLAGS.include_timestamp,
+             version_package=FLAGS.version_package,
+             package_path=FLAGS.package_path,
+             output_type=FLAGS.output_type,
+             language=FLAGS.language,
+             language_variant=FLAGS.language_variant,
+             api_cache_dir=FLAGS.api_cache_dir,
+             dependency_bundle_dir=FLAGS.dependency_bundle_dir,
+             incremental_state_dir=FLAGS.incremental_state_dir,
+             stats=stats)
+  if tracer:
+    tracer.Stop()
+    sys.stderr.write(tracer.Report() + '\n')
+  if FLAGS.stats_json:
+    with open(FLAGS.stats_json, 'w') as f:
+      f.write(stats.ToJson())
   return 0
 
 
@@ -179,8 +282,24 @@ def Generate(discovery_doc, package_writer,
              output_type='plain',
              language='java',
              language_variant='default',
-             callback=None):
-  """Generate a library package from discovery and options."""
+             callback=None,
+             api_cache_dir=None,
+             dependency_bundle_dir=None,
+             incremental_state_dir=None,
+             features=None,
+             stats=None):
+  """Generate a library package from discovery and options.
+
+  features may be passed in, as returned by GetFeatures, by callers which
+  generate many libraries; otherwise they are read for language and
+  language_variant.
+
+  The time spent in each phase, and counts of the API and of the files
+  written, are collected in stats, or in new GenerationStats if it is None,
+  which are returned.
+  """
+  if stats is None:
+    stats = generation_stats.GenerationStats()
   options = {
       # Include other files needed to compile (e.g. base jar files)
       'include_dependencies': False,
@@ -190,37 +309,42 @@ def Generate(discovery_doc, package_writer,
       'version_package': version_package,
       # Custom package name
       'package_path': package_path,
+      # Where to cache the constructed Api model
+      'api_cache_dir': api_cache_dir,
+      # Where to keep prebuilt bundles of the dependency files
+      'dependency_bundle_dir': dependency_bundle_dir,
+      # Where to keep the state for incremental generation
+      'incremental_state_dir': incremental_state_dir,
       }
   if FLAGS.monolithic_source_name:
     options['useSingleSourceFile'] = True
   if output_type == 'full':
     options['include_dependencies'] = True
 
-  # determine language version from language variant.
-  language_variations = Targets().VariationsForLanguage(language)
-  if not language_variations:
-    raise app.UsageError('Language %s missing from '
-                         'apiserving/libgen/gen/targets.json' %
-                         language)
-  features = language_variations.GetFeatures(language_variant)
-  if not features:
-    raise app.UsageError('Unsupported language variant: '
-                         '%s/%s/features.json is missing' %
-                         language, language_variant)
+  if features is None:
+    features = GetFeatures(language, language_variant)
   try:
     generator_class = generator_lookup.GetGeneratorByLanguage(
         features.get('generator', language))
   except ValueError:
     raise app.UsageError('Unsupported language: %s' % language)
 
-  generator = generator_class(discovery_doc, options=options)
+  with stats.Timing('model'):
+    generator = generator_class(discovery_doc, options=options)
   if FLAGS.monolithic_source_name:
     generator.api.SetTemplateValue('monolithicSourceName',
                                    FLAGS.monolithic_source_name)
   generator.SetTemplateDir(features.template_dir)
   generator.SetFeatures(features)
-  generator.GeneratePackage(package_writer)
-  package_writer.DoneWritingArchive()
+  generator.SetGenerationStats(stats)
+  counting_writer = counting_library_package.CountingLibraryPackage(
+      package_writer)
+  generator.GeneratePackage(counting_writer)
+  with stats.Timing('package'):
+    counting_writer.DoneWritingArchive()
+  stats.CountApi(generator.api)
+  stats.Count('files', counting_writer.files_written)
+  stats.Count('bytes', counting_writer.bytes_written)
   if callback:
     callback(discovery_doc=discovery_doc,
              package_writer=package_writer,
@@ -230,21 +354,45 @@ def Generate(discovery_doc, package_writer,
              output_type=output_type,
              language=language,
              language_variant=language_variant)
+  return stats
+
+
+def GetFeatures(language, language_variant, targets=None):
+  """Returns the features of a variant of a language.
+
+  Args:
+    language: (str) The language.
+    language_variant: (str) The variant of the language.
+    targets: (Targets) The targets to look in. Read from disk if not given.
+  Returns:
+    (Features) The features.
+  Raises:
+    app.UsageError: If the language or variant is not known.
+  """
+  # determine language version from language variant.
+  language_variations = (targets or Targets()).VariationsForLanguage(language)
+  if not language_variations:
+    raise app.UsageError('Language %s missing from '
+                         'apiserving/libgen/gen/targets.json' %
+                         language)
+  features = language_variations.GetFeatures(language_variant)
+  if not features:
+    raise app.UsageError('Unsupported language variant: '
+                         '%s/%s/features.json is missing' %
+                         (language, language_variant))
+  return features
 
 
 def GetApiDiscovery(api_name, api_version):
   """Get a discovery doc from the discovery server."""
-  api_path = 'apis/%s/%s/rest' % (api_name, api_version)
-
-  discovery_url = 'https://%s/discovery/%s/%s' % (
-      FLAGS.discovery_server, FLAGS.discovery_version, api_path)
-  http = httplib2.Http()
-  _, content = http.request(discovery_url)
-  discovery_doc = json.loads(content)
-  error = discovery_doc.get('error')
-  if error:
-    raise app.Error(error)
-  return content
+  fetcher = discovery_fetcher.DiscoveryFetcher(
+      server=FLAGS.discovery_server,
+      discovery_version=FLAGS.discovery_version,
+      cache_dir=FLAGS.discovery_cache_dir)
+  try:
+    return fetcher.FetchApi(api_name, api_version).content
+  except discovery_fetcher.DiscoveryFetchError as e:
+    raise app.Error(str(e))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,140 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Events emitted by a generator, for observers such as tracing systems.
+
+Observers are added to a TemplateGenerator with AddObserver, and are handed
+an Event for each step of the generation. Most steps are spans: a START event
+and an END event with the same span_id. The kinds of event are:
+  generate     (span) the generation of a whole library; name is the API,
+  annotate     (span) the annotation of one node of the Api; name is the
+               type of node (api, schema, property, resource or method), and
+               details['node'] the name of the node,
+  template     (span) the render of a template into a file; name is the
+               template, and details['output_path'] the file,
+  file         (span) writing a file to the package; name is its path, and
+               details['bytes'] its size, on the END event, when known,
+  render_cache (HIT or MISS) whether a file was reused from the incremental
+               render cache; name is its path,
+  dependency_bundle (HIT or MISS) whether the dependencies came from a
+               prebuilt bundle; name is the dependencies directory,
+  template_cache (HIT, MISS or EVICT) whether a template was found compiled
+               in the template cache, or was dropped from it to make room;
+               name is the template, and on a MISS details['stale'] is
+               whether an edited template was found,
+  api_cache    (HIT or MISS) whether the Api came from the Api model cache;
+               name is the cache key. The Api is loaded when the generator
+               is made, before observers can be added, so these are handed
+               on when generation starts.
+
+With no observers the generator only checks that its list of them is empty.
+"""
+
+import collections
+import itertools
+import time
+
+START = 'start'
+END = 'end'
+HIT = 'hit'
+MISS = 'miss'
+EVICT = 'evict'
+
+Event = collections.namedtuple(
+    'Event', ['kind', 'phase', 'name', 'span_id', 'timestamp', 'details'])
+
+_span_ids = itertools.count(1)
+
+
+class GenerationObserver(object):
+  """Base class of observers of generation events."""
+
+  def OnEvent(self, event):
+    """Called with each Event.
+
+    Subclasses should implement this.
+
+    Args:
+      event: (Event) The event.
+    """
+    pass
+
+
+class RecordingObserver(GenerationObserver):
+  """Keeps every event it is handed, in order."""
+
+  def __init__(self):
+    self.events = []
+
+  def OnEvent(self, event):
+    self.events.append(event)
+
+
+def Emit(observers, kind, phase, name, span_id=None, **details):
+  """Hand an event to each observer.
+
+  Args:
+    observers: (list) The GenerationObservers.
+    kind: (str) The kind of event.
+    phase: (str) START, END, HIT, MISS or EVICT.
+    name: (str) What the event is about.
+    span_id: (int) The span of START and END events.
+    **details: Anything else about the event.
+  """
+  event = Event(kind, phase, name, span_id, time.time(), details)
+  for observer in observers:
+    observer.OnEvent(event)
+
+
+class Span(object):
+  """Emits START on entering a with block and END on leaving it.
+
+  details may be added to before the block ends, to go on the END event.
+  """
+
+  def __init__(self, observers, kind, name, details):
+    self._observers = observers
+    self._kind = kind
+    self._name = name
+    self.details = details
+    self.span_id = next(_span_ids)
+
+  def __enter__(self):
+    Emit(self._observers, self._kind, START, self._name, self.span_id,
+         **self.details)
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    Emit(self._observers, self._kind, END, self._name, self.span_id,
+         **self.details)
+
+
+class _NoSpan(object):
+  """Stands in for a Span when nothing observes it."""
+
+  span_id = None
+
+  @property
+  def details(self):
+    return {}
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    pass
+
+
+NO_SPAN = _NoSpan()
@@ -0,0 +1,167 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for generation_events.py, and their emission by generators."""
+
+import os
+import shutil
+import tempfile
+
+from google.apputils import basetest
+
+from googleapis.codegen import generation_events
+from googleapis.codegen import generator_lookup
+from googleapis.codegen import template_helpers
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.targets import Targets
+from googleapis.codegen.utilities import discovery_loader
+
+
+class GenerationEventsTest(basetest.TestCase):
+
+  def setUp(self):
+    self._state_dir = tempfile.mkdtemp()
+    self._discovery = discovery_loader.LoadFile(
+        os.path.join(os.path.dirname(__file__), 'testdata',
+                     'golden_discovery', 'kitchen_sink.json'))
+
+  def tearDown(self):
+    shutil.rmtree(self._state_dir)
+
+  def _Generate(self, observer=None, state_dir=None, api_cache_dir=None):
+    """Generate the Java library, returning the package."""
+    features = Targets().VariationsForLanguage('java').GetFeatures('default')
+    generator_class = generator_lookup.GetGeneratorByLanguage('java')
+    generator = generator_class(
+        self._discovery, options={'incremental_state_dir': state_dir,
+                                  'api_cache_dir': api_cache_dir})
+    generator.SetTemplateDir(features.template_dir)
+    generator.SetFeatures(features)
+    if observer:
+      generator.AddObserver(observer)
+    package = memory_library_package.MemoryLibraryPackage()
+    generator.GeneratePackage(package)
+    package.DoneWritingArchive()
+    return package
+
+  def testSpansAreNestedAndPaired(self):
+    observer = generation_events.RecordingObserver()
+    self._Generate(observer)
+    events = observer.events
+    self.assertEquals(('generate', generation_events.START, 'kitch_sink'),
+                      events[0][:3])
+    self.assertEquals(('generate', generation_events.END, 'kitch_sink'),
+                      events[-1][:3])
+    self.assertEquals('java', events[0].details['language'])
+    open_spans = []
+    for event in events:
+      if event.phase == generation_events.START:
+        open_spans.append(event)
+      elif event.phase == generation_events.END:
+        start = open_spans.pop()
+        self.assertEquals(start.span_id, event.span_id)
+        self.assertEquals(start[:3], (event.kind, generation_events.START,
+                                      event.name))
+        self.assertLessEqual(start.timestamp, event.timestamp)
+    self.assertEquals([], open_spans)
+    self.assertEquals(
+        set(['api', 'schema', 'property', 'resource', 'method']),
+        set(e.name for e in events if e.kind == 'annotate'))
+    self.assertIn('Tag', [e.details['node'] for e in events
+                          if e.kind == 'annotate' and e.name == 'schema'])
+
+  def testFileEventsMatchThePackage(self):
+    observer = generation_events.RecordingObserver()
+    package = self._Generate(observer)
+    file_ends = dict((e.name, e.details['bytes']) for e in observer.events
+                     if e.kind == 'file' and e.phase == generation_events.END)
+    self.assertEquals(sorted(package), sorted(file_ends))
+    for name in package:
+      self.assertEquals(len(package[name]), file_ends[name])
+    templates = [e for e in observer.events if e.kind == 'template']
+    self.assertEquals(2 * len(package), len(templates))
+
+  def testRenderCacheHitsAndMisses(self):
+    first = generation_events.RecordingObserver()
+    self._Generate(first, self._state_dir)
+    second = generation_events.RecordingObserver()
+    package = self._Generate(second, self._state_dir)
+
+    def CacheEvents(observer, phase):
+      return [e.name for e in observer.events
+              if e.kind == 'render_cache' and e.phase == phase]
+    self.assertEquals([], CacheEvents(first, generation_events.HIT))
+    hits = CacheEvents(second, generation_events.HIT)
+    self.assertTrue(hits)
+    self.assertEquals(len(package), len(hits) +
+                      len(CacheEvents(second, generation_events.MISS)))
+
+  def testTemplateCacheEvents(self):
+    loader = template_helpers.GetTemplateLoader()
+    limits = loader.Stats()
+    self.addCleanup(loader.SetLimits, limits['max_entries'],
+                    limits['max_bytes'])
+    loader.Clear()
+    first = generation_events.RecordingObserver()
+    self._Generate(first)
+    second = generation_events.RecordingObserver()
+    self._Generate(second)
+
+    def CacheEvents(observer, phase):
+      return [e.name for e in observer.events
+              if e.kind == 'template_cache' and e.phase == phase]
+    misses = CacheEvents(first, generation_events.MISS)
+    self.assertTrue(misses)
+    self.assertEquals(sorted(set(misses)), sorted(misses))
+    self.assertEquals([], CacheEvents(second, generation_events.MISS))
+    self.assertEquals(set(misses),
+                      set(CacheEvents(second, generation_events.HIT)))
+
+    loader.SetLimits(max_entries=1)
+    third = generation_events.RecordingObserver()
+    self._Generate(third)
+    self.assertTrue(CacheEvents(third, generation_events.MISS))
+    self.assertTrue(CacheEvents(third, generation_events.EVICT))
+
+  def testApiCacheEvents(self):
+    cache_dir = os.path.join(self._state_dir, 'api_cache')
+    first = generation_events.RecordingObserver()
+    self._Generate(first, api_cache_dir=cache_dir)
+    second = generation_events.RecordingObserver()
+    self._Generate(second, api_cache_dir=cache_dir)
+
+    def ApiCacheEvents(observer):
+      return [e.phase for e in observer.events if e.kind == 'api_cache']
+    self.assertEquals([generation_events.MISS], ApiCacheEvents(first))
+    self.assertEquals([generation_events.HIT], ApiCacheEvents(second))
+    # The load is handed on inside the generate span.
+    self.assertEquals('generate', second.events[0].kind)
+    self.assertEquals('api_cache', second.events[1].kind)
+
+  def testNothingIsEmittedWithoutObservers(self):
+    observer = generation_events.RecordingObserver()
+    features = Targets().VariationsForLanguage('java').GetFeatures('default')
+    generator = generator_lookup.GetGeneratorByLanguage('java')(
+        self._discovery)
+    generator.SetTemplateDir(features.template_dir)
+    generator.SetFeatures(features)
+    generator.AddObserver(observer)
+    generator.RemoveObserver(observer)
+    generator.GeneratePackage(memory_library_package.MemoryLibraryPackage())
+    self.assertEquals([], observer.events)
+
+
+if __name__ == '__main__':
+  basetest.main()
@@ -0,0 +1,514 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A long running server which generates libraries on request.
+
+Each run of generate_library starts a fresh interpreter, imports the
+generators, reads targets.json and the features of the language and compiles
+every template it uses. The server does all of that once, and keeps the
+results for every later request.
+
+Usage:
+$ PYTHONPATH=$(/bin/pwd)/src \
+  $(/bin/pwd)/src/googleapis/codegen/generation_server.py --port=8090
+$ curl --data-binary @plus.json -o plus.zip \
+  'http://localhost:8090/generate?language=java&output_format=zip'
+
+Requests:
+  POST /generate   The body is a discovery document. The query parameters
+                   are language, language_variant, output_format (zip, tgz
+                   or tar), output_type (plain or full), package_path,
+                   version_package and include_timestamp, as for
+                   generate_library. The response is the archive.
+  GET /stats       Counts and timings of the requests served, and of the
+                   compiled template cache, as JSON.
+
+Libraries are generated by a fixed number of worker threads. Requests wait
+in a queue of bounded size for a free worker; when the queue is full the
+server answers 503 at once, so clients can back off. Each response carries
+how long the request waited and how long each phase took, in the
+X-Queue-Seconds, X-Generate-Seconds and X-Archive-Seconds headers.
+"""
+
+import BaseHTTPServer
+import json
+import logging
+import os
+import Queue
+import SocketServer
+import StringIO
+import threading
+import time
+import urlparse
+
+from google.apputils import app
+import gflags as flags
+from googleapis.codegen import api_exception
+from googleapis.codegen import generate_library
+from googleapis.codegen import generator_lookup
+from googleapis.codegen import template_helpers
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.filesys import package_writer_foundry
+from googleapis.codegen.targets import Targets
+from googleapis.codegen.utilities import discovery_loader
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string(
+    'host',
+    'localhost',
+    'The address to listen on with --port.')
+flags.DEFINE_integer(
+    'port',
+    None,
+    'The TCP port to listen on.')
+flags.DEFINE_string(
+    'socket_path',
+    None,
+    'A Unix domain socket to listen on, instead of --port.')
+flags.DEFINE_integer(
+    'workers',
+    2,
+    'How many libraries may be generated at the same time.')
+flags.DEFINE_integer(
+    'queue_size',
+    64,
+    'How many requests may wait for a worker before new ones are refused.')
+flags.DEFINE_integer(
+    'max_request_bytes',
+    16 << 20,
+    'The largest discovery document accepted.')
+flags.DEFINE_list(
+    'warm_languages',
+    [],
+    'Languages whose targets and features are loaded, and whose templates'
+    ' are compiled, before the server starts listening.')
+flags.DEFINE_integer(
+    'template_cache_entries',
+    None,
+    'The most compiled templates to keep in memory. No limit if not set.')
+flags.DEFINE_integer(
+    'template_cache_bytes',
+    None,
+    'The most template source, in bytes, to keep compiled in memory. No'
+    ' limit if not set.')
+
+_CONTENT_TYPES = {
+    'tar': 'application/x-tar',
+    'tgz': 'application/gzip',
+    'zip': 'application/zip',
+}
+
+_BOOLEAN_PARAMETERS = ('include_timestamp', 'version_package')
+_STRING_PARAMETERS = ('language', 'language_variant', 'output_format',
+                      'output_type', 'package_path')
+
+
+class QueueFullError(Exception):
+  """Too many requests are waiting for a worker."""
+
+
+class RequestError(Exception):
+  """A request can not be served as asked."""
+
+
+class GenerationRequest(object):
+  """A library to generate, and what became of it."""
+
+  def __init__(self, discovery_content, language='java',
+               language_variant='default', output_format='zip',
+               output_type='plain', package_path=None, version_package=False,
+               include_timestamp=False):
+    """Construct a GenerationRequest.
+
+    Args:
+      discovery_content: (str) The discovery document.
+      language: (str) The language to generate.
+      language_variant: (str) The variant of the language.
+      output_format: (str) The archive to make: zip, tgz or tar.
+      output_type: (str) plain or full, as for generate_library.
+      package_path: (str) An alternate path for the generated code.
+      version_package: (bool) Put the API version in package paths.
+      include_timestamp: (bool) Add a timestamp to the generated files.
+    """
+    self.discovery_content = discovery_content
+    self.language = language
+    self.language_variant = language_variant
+    self.output_format = output_format
+    self.output_type = output_type
+    self.package_path = package_path
+    self.version_package = version_package
+    self.include_timestamp = include_timestamp
+    self.archive = None
+    self.error = None
+    self.timings = {}
+    self.submit_time = time.time()
+    self._done = threading.Event()
+
+  def Wait(self, timeout=None):
+    """Wait for the request to be served.
+
+    Args:
+      timeout: (float) Seconds to wait at most. Forever if None.
+    Returns:
+      (bool) Whether the request was served.
+    """
+    self._done.wait(timeout)
+    return self._done.is_set()
+
+  def Done(self):
+    self._done.set()
+
+
+class GenerationService(object):
+  """Generates libraries on a pool of worker threads."""
+
+  def __init__(self, workers=2, queue_size=64, targets=None):
+    """Construct a GenerationService and start its workers.
+
+    Args:
+      workers: (int) How many libraries may be generated at the same time.
+      queue_size: (int) How many requests may wait for a worker.
+      targets: (Targets) The targets to generate for. Read from disk if not
+        given.
+    """
+    self._targets = targets or Targets()
+    self._features = {}
+    self._lock = threading.Lock()
+    self._queue = Queue.Queue(queue_size)
+    self._stats = {
+        'served': 0,
+        'failed': 0,
+        'refused': 0,
+        'busy_workers': 0,
+        'queue_seconds': 0.0,
+        'generate_seconds': 0.0,
+        'archive_seconds': 0.0,
+    }
+    self._workers = []
+    for _ in range(workers):
+      worker = threading.Thread(target=self._Work)
+      worker.daemon = True
+      worker.start()
+      self._workers.append(worker)
+
+  def GetFeatures(self, language, language_variant):
+    """Returns the features of a language variant, loading them once.
+
+    Args:
+      language: (str) The language.
+      language_variant: (str) The variant.
+    Returns:
+      (Features) The features.
+    Raises:
+      RequestError: If the language or variant is not known.
+    """
+    key = (language, language_variant)
+    with self._lock:
+      features = self._features.get(key)
+    if features is None:
+      variations = self._targets.VariationsForLanguage(language)
+      if variations and not variations.IsValid(language_variant):
+        raise RequestError('Unknown variant of %s: %s' % (language,
+                                                         language_variant))
+      try:
+        features = generate_library.GetFeatures(language, language_variant,
+                                                targets=self._targets)
+        generator_lookup.GetGeneratorByLanguage(
+            features.get('generator', language))
+      except (app.UsageError, ValueError) as e:
+        raise RequestError(str(e))
+      with self._lock:
+        features = self._features.setdefault(key, features)
+    return features
+
+  def WarmUp(self, languages):
+    """Load the features and compile the templates of some languages.
+
+    Templates which do not compile are logged; requests which use them fail
+    as they would have without the warm up.
+
+    Args:
+      languages: (list) The names of the languages.
+    Raises:
+      RequestError: If a language is not known.
+    """
+    for language in languages:
+      variations = self._targets.VariationsForLanguage(language)
+      if not variations:
+        raise RequestError('Unknown language: %s' % language)
+      for variant in variations:
+        self.GetFeatures(language, variant)
+        for result in variations.PrecompileTemplates(variant):
+          if result.error:
+            logging.error('Template %s: %s', result.path, result.error)
+
+  def Submit(self, request):
+    """Queue a request for the next free worker.
+
+    Args:
+      request: (GenerationRequest) The request.
+    Raises:
+      QueueFullError: If too many requests are waiting already.
+    """
+    try:
+      self._queue.put_nowait(request)
+    except Queue.Full:
+      with self._lock:
+        self._stats['refused'] += 1
+      raise QueueFullError('%d requests are waiting' % self._queue.qsize())
+
+  def Generate(self, request):
+    """Generate a library and wait for it.
+
+    Args:
+      request: (GenerationRequest) The request.
+    Returns:
+      (str) The archive.
+    Raises:
+      QueueFullError: If too many requests are waiting already.
+      RequestError: If the request can not be served.
+    """
+    self.Submit(request)
+    request.Wait()
+    if request.error:
+      raise request.error  # pylint: disable=raising-bad-type
+    return request.archive
+
+  def Stats(self):
+    """Returns the counts and total timings of the requests, as a dict."""
+    with self._lock:
+      stats = dict(self._stats)
+    stats['queued'] = self._queue.qsize()
+    stats['workers'] = len(self._workers)
+    stats['template_cache'] = template_helpers.GetTemplateLoader().Stats()
+    return stats
+
+  def Close(self):
+    """Stop the workers once the queued requests are served, and wait."""
+    for _ in self._workers:
+      self._queue.put(None)
+    for worker in self._workers:
+      worker.join()
+    self._workers = []
+
+  def _Work(self):
+    while True:
+      request = self._queue.get()
+      if request is None:
+        return
+      with self._lock:
+        self._stats['busy_workers'] += 1
+      try:
+        self._Serve(request)
+      finally:
+        with self._lock:
+          self._stats['busy_workers'] -= 1
+        request.Done()
+
+  def _Serve(self, request):
+    """Generate the library of a request on this thread."""
+    start = time.time()
+    request.timings['queue'] = start - request.submit_time
+    try:
+      self._Generate(request)
+    except (RequestError, app.UsageError, ValueError,
+            api_exception.ApiException) as e:
+      request.error = RequestError(str(e))
+    except Exception as e:  # pylint: disable=broad-except
+      logging.exception('Generating %s failed', request.language)
+      request.error = e
+    with self._lock:
+      if request.error:
+        self._stats['failed'] += 1
+      else:
+        self._stats['served'] += 1
+      for phase, seconds in request.timings.iteritems():
+        self._stats['%s_seconds' % phase] += seconds
+    logging.info('%s %s: %s', request.language,
+                 'failed' if request.error else '%d bytes' % len(
+                     request.archive),
+                 ', '.join('%s %.3fs' % (phase, seconds) for phase, seconds
+                           in sorted(request.timings.iteritems())))
+
+  def _Generate(self, request):
+    """Generate the library and archive of a request."""
+    if request.output_format not in package_writer_foundry.ARCHIVE_FORMATS:
+      raise RequestError('Unknown output_format: %s' % request.output_format)
+    if request.output_type not in ('plain', 'full'):
+      raise RequestError('Unknown output_type: %s' % request.output_type)
+    features = self.GetFeatures(request.language, request.language_variant)
+    start = time.time()
+    discovery_doc = discovery_loader.Loads(request.discovery_content)
+    package = memory_library_package.MemoryLibraryPackage()
+    generate_library.Generate(discovery_doc=discovery_doc,
+                              package_writer=package,
+                              include_timestamp=request.include_timestamp,
+                              version_package=request.version_package,
+                              package_path=request.package_path,
+                              output_type=request.output_type,
+                              language=request.language,
+                              language_variant=request.language_variant,
+                              features=features)
+    archived = time.time()
+    request.timings['generate'] = archived - start
+    stream = StringIO.StringIO()
+    if request.output_format == 'zip':
+      package.WriteZip(stream)
+    else:
+      package.WriteTar(stream, compress=request.output_format == 'tgz')
+    request.archive = stream.getvalue()
+    request.timings['archive'] = time.time() - archived
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """Serves the requests of one connection."""
+
+  def do_GET(self):  # pylint: disable=g-bad-name
+    if urlparse.urlparse(self.path).path != '/stats':
+      self.send_error(404)
+      return
+    self._Respond(200, json.dumps(self.server.service.Stats(), indent=1,
+                                  sort_keys=True), 'application/json')
+
+  def do_POST(self):  # pylint: disable=g-bad-name
+    url = urlparse.urlparse(self.path)
+    if url.path != '/generate':
+      self.send_error(404)
+      return
+    try:
+      length = int(self.headers.get('Content-Length', ''))
+    except ValueError:
+      self.send_error(411)
+      return
+    if length > self.server.max_request_bytes:
+      self.send_error(413)
+      return
+    try:
+      request = self._ParseRequest(self.rfile.read(length), url.query)
+      archive = self.server.service.Generate(request)
+    except QueueFullError as e:
+      self._Respond(503, str(e))
+      return
+    except RequestError as e:
+      self._Respond(400, str(e))
+      return
+    except Exception as e:  # pylint: disable=broad-except
+      self._Respond(500, str(e))
+      return
+    headers = dict(('X-%s-Seconds' % phase.capitalize(), '%.3f' % seconds)
+                   for phase, seconds in request.timings.iteritems())
+    self._Respond(200, archive, _CONTENT_TYPES[request.output_format],
+                  headers)
+
+  def _ParseRequest(self, content, query):
+    """Make a GenerationRequest from a discovery document and parameters."""
+    kwargs = {}
+    for name, values in urlparse.parse_qs(query).iteritems():
+      value = values[-1]
+      if name in _BOOLEAN_PARAMETERS:
+        kwargs[name] = value.lower() in ('1', 'true', 'yes')
+      elif name in _STRING_PARAMETERS:
+        kwargs[name] = value
+      else:
+        raise RequestError('Unknown parameter: %s' % name)
+    return GenerationRequest(content, **kwargs)
+
+  def _Respond(self, code, body, content_type='text/plain', headers=None):
+    self.send_response(code)
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(len(body)))
+    for name, value in sorted((headers or {}).iteritems()):
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(body)
+
+  def address_string(self):  # pylint: disable=g-bad-name
+    # Clients of a Unix domain socket have no address.
+    if isinstance(self.client_address, tuple):
+      return self.client_address[0]
+    return 'local'
+
+  def log_message(self, log_format, *args):  # pylint: disable=g-bad-name
+    logging.info('%s %s', self.address_string(), log_format % args)
+
+
+class _HTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+
+class _UnixHTTPServer(SocketServer.ThreadingMixIn,
+                      SocketServer.UnixStreamServer):
+  daemon_threads = True
+
+
+def MakeServer(service, port=None, host='localhost', socket_path=None,
+               max_request_bytes=16 << 20):
+  """Make a server for a GenerationService.
+
+  Args:
+    service: (GenerationService) The service.
+    port: (int) The TCP port to listen on. 0 picks a free port.
+    host: (str) The address to listen on with port.
+    socket_path: (str) A Unix domain socket to listen on, instead of port.
+    max_request_bytes: (int) The largest discovery document accepted.
+  Returns:
+    (SocketServer.BaseServer) The server. Call serve_forever() on it.
+  """
+  if socket_path:
+    if os.path.exists(socket_path):
+      os.remove(socket_path)
+    server = _UnixHTTPServer(socket_path, _RequestHandler)
+  else:
+    server = _HTTPServer((host, port), _RequestHandler)
+  server.service = service
+  server.max_request_bytes = max_request_bytes
+  return server
+
+
+def main(unused_argv):
+  if (FLAGS.port is None) == (FLAGS.socket_path is None):
+    raise app.UsageError('You must specify one of --port or --socket_path')
+  if FLAGS.workers < 1:
+    raise app.UsageError('--workers must be at least 1')
+  logging.basicConfig(level=logging.INFO)
+  template_helpers.GetTemplateLoader().SetLimits(
+      max_entries=FLAGS.template_cache_entries,
+      max_bytes=FLAGS.template_cache_bytes)
+
+  service = GenerationService(workers=FLAGS.workers,
+                              queue_size=FLAGS.queue_size)
+  try:
+    service.WarmUp(FLAGS.warm_languages)
+  except RequestError as e:
+    raise app.UsageError(str(e))
+  server = MakeServer(service, port=FLAGS.port, host=FLAGS.host,
+                      socket_path=FLAGS.socket_path,
+                      max_request_bytes=FLAGS.max_request_bytes)
+  logging.info('Serving on %s', FLAGS.socket_path or server.server_address)
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    service.Close()
+    if FLAGS.socket_path and os.path.exists(FLAGS.socket_path):
+      os.remove(FLAGS.socket_path)
+  return 0
+
+
+if __name__ == '__main__':
+  app.run()
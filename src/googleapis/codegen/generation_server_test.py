@@ -0,0 +1,170 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for generation_server.py."""
+
+import httplib
+import json
+import os
+import StringIO
+import threading
+import zipfile
+
+from google.apputils import basetest
+
+from googleapis.codegen import generation_server
+from googleapis.codegen.filesys import files
+
+
+class BlockingService(generation_server.GenerationService):
+  """A service whose workers wait to be released before each request."""
+
+  def __init__(self, **kwargs):
+    self.release = threading.Event()
+    super(BlockingService, self).__init__(**kwargs)
+
+  def _Generate(self, request):
+    self.release.wait()
+    request.archive = 'archive'
+
+
+class GenerationServerTest(basetest.TestCase):
+
+  def setUp(self):
+    self._discovery = files.GetFileContents(
+        os.path.join(os.path.dirname(__file__), 'testdata',
+                     'sample_discovery.json'))
+
+  def _Service(self, service_class=generation_server.GenerationService,
+               **kwargs):
+    service = service_class(**kwargs)
+    self.addCleanup(service.Close)
+    return service
+
+  def _Contents(self, archive):
+    archive = zipfile.ZipFile(StringIO.StringIO(archive))
+    return dict((name, archive.read(name)) for name in archive.namelist())
+
+  def testGenerate(self):
+    service = self._Service(workers=1)
+    request = generation_server.GenerationRequest(self._discovery)
+    archive = zipfile.ZipFile(StringIO.StringIO(service.Generate(request)))
+    self.assertTrue([name for name in archive.namelist()
+                     if name.endswith('.java')])
+    self.assertEquals(['archive', 'generate', 'queue'],
+                      sorted(request.timings))
+    stats = service.Stats()
+    self.assertEquals(1, stats['served'])
+    self.assertEquals(0, stats['busy_workers'])
+
+  def testWarmUpCompilesTemplates(self):
+    service = self._Service(workers=1)
+    service.WarmUp(['java'])
+    cache = service.Stats()['template_cache']
+    self.assertLess(0, cache['entries'])
+    self.assertRaises(generation_server.RequestError, service.WarmUp,
+                      ['cobol'])
+
+  def testConcurrentGenerationsMatchASingleOne(self):
+    for name in ('sample_discovery.json', 'enums.json'):
+      content = files.GetFileContents(
+          os.path.join(os.path.dirname(__file__), 'testdata', name))
+      service = self._Service(workers=1)
+      expected = self._Contents(service.Generate(
+          generation_server.GenerationRequest(content, language='csharp')))
+
+      service = self._Service(workers=4)
+      requests = [generation_server.GenerationRequest(content,
+                                                      language='csharp')
+                  for _ in range(8)]
+      for request in requests:
+        service.Submit(request)
+      for request in requests:
+        self.assertTrue(request.Wait(60))
+        self.assertIsNone(request.error)
+        contents = self._Contents(request.archive)
+        self.assertEquals(sorted(expected), sorted(contents))
+        # Compare by name, the sources are too long to show.
+        self.assertEquals([], [path for path in sorted(expected)
+                               if contents[path] != expected[path]])
+      self.assertEquals([], [path for path, source in expected.iteritems()
+                             if '\x00' in source])
+
+  def testBadRequests(self):
+    service = self._Service(workers=1)
+    for kwargs in ({'language': 'cobol'},
+                   {'language_variant': 'none'},
+                   {'output_format': 'rar'}):
+      request = generation_server.GenerationRequest(self._discovery, **kwargs)
+      self.assertRaises(generation_server.RequestError, service.Generate,
+                        request)
+    request = generation_server.GenerationRequest('not json')
+    self.assertRaises(generation_server.RequestError, service.Generate,
+                      request)
+    self.assertEquals(4, service.Stats()['failed'])
+
+  def testFullQueueRefusesRequests(self):
+    service = self._Service(BlockingService, workers=1, queue_size=1)
+    # Cleanups run last first: let the workers go before closing.
+    self.addCleanup(service.release.set)
+    requests = [generation_server.GenerationRequest('') for _ in range(3)]
+    service.Submit(requests[0])
+    # Wait for the worker to take the first request off the queue.
+    while service.Stats()['busy_workers'] != 1:
+      threading.Event().wait(0.01)
+    service.Submit(requests[1])
+    self.assertRaises(generation_server.QueueFullError, service.Submit,
+                      requests[2])
+    self.assertEquals(1, service.Stats()['refused'])
+    service.release.set()
+    for request in requests[:2]:
+      self.assertTrue(request.Wait(10))
+      self.assertEquals('archive', request.archive)
+
+  def testHttp(self):
+    service = self._Service(workers=1)
+    server = generation_server.MakeServer(service, port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+      connection = httplib.HTTPConnection(*server.server_address)
+      connection.request('POST', '/generate?language=java&output_format=tgz',
+                         self._discovery)
+      response = connection.getresponse()
+      self.assertEquals(200, response.status)
+      self.assertEquals('application/gzip',
+                        response.getheader('Content-Type'))
+      self.assertTrue(response.getheader('X-Generate-Seconds'))
+      self.assertEquals('\x1f\x8b', response.read()[:2])
+
+      connection.request('POST', '/generate?language=cobol', self._discovery)
+      response = connection.getresponse()
+      self.assertEquals(400, response.status)
+      response.read()
+
+      connection.request('GET', '/stats')
+      response = connection.getresponse()
+      self.assertEquals(200, response.status)
+      stats = json.loads(response.read())
+      self.assertEquals(1, stats['served'])
+      self.assertEquals(1, stats['failed'])
+    finally:
+      server.shutdown()
+      server.server_close()
+
+
+if __name__ == '__main__':
+  basetest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Timings and counts of one library generation.
+
+generate_library.Generate returns a GenerationStats, which holds the seconds
+spent in each phase of the generation:
+  load           parsing the discovery document (only when it is given one),
+  model          building the Api model,
+  annotate       the language specific annotation of the model,
+  templates      walking the template tree and rendering the source,
+  dependencies   adding the dependencies, when they are included,
+  package        finishing the output package,
+and counts of what was generated: the schemas, properties, resources and
+methods of the API, and the files and bytes written. Given a MemoryTracer,
+it also samples memory use at the end of each phase.
+"""
+
+import collections
+import contextlib
+import json
+import time
+
+
+class GenerationStats(object):
+  """Timings of the phases of a generation, and counts of what it made."""
+
+  def __init__(self, memory_tracer=None):
+    """Construct a GenerationStats.
+
+    Args:
+      memory_tracer: (memory_tracer.MemoryTracer) Samples memory use at the
+        end of each phase, if given.
+    """
+    self.seconds = collections.OrderedDict()
+    self.counts = collections.OrderedDict()
+    self.memory_tracer = memory_tracer
+
+  @contextlib.contextmanager
+  def Timing(self, phase):
+    """Add the time spent in a with block to a phase."""
+    start = time.time()
+    try:
+      yield
+    finally:
+      self.seconds[phase] = (self.seconds.get(phase, 0.0) +
+                             time.time() - start)
+      if self.memory_tracer:
+        self.memory_tracer.Sample(phase)
+
+  def Count(self, name, n=1):
+    """Add n to a count."""
+    self.counts[name] = self.counts.get(name, 0) + n
+
+  def CountApi(self, api):
+    """Count the schemas, properties, resources and methods of an Api.
+
+    Args:
+      api: (Api) The API.
+    """
+    schemas = api.all_schemas.values()
+    self.Count('schemas', len(schemas))
+    self.Count('properties', sum(len(s.values.get('properties') or [])
+                                 for s in schemas))
+    resources = list(api.values.get('resources') or [])
+    self.Count('resources', len(resources))
+    while resources:
+      nested = resources.pop().values.get('resources') or []
+      self.Count('resources', len(nested))
+      resources.extend(nested)
+    self.Count('methods', len(api.all_methods))
+
+  @property
+  def total_seconds(self):
+    return sum(self.seconds.itervalues())
+
+  def AsDict(self):
+    result = {
+        'seconds': dict(self.seconds, total=self.total_seconds),
+        'counts': dict(self.counts),
+    }
+    if self.memory_tracer:
+      result['memory'] = self.memory_tracer.AsList()
+    return result
+
+  def ToJson(self):
+    return json.dumps(self.AsDict(), indent=1, sort_keys=True)
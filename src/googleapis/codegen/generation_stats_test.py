@@ -0,0 +1,76 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for generation_stats.py, and their collection by Generate."""
+
+import json
+import os
+
+from google.apputils import basetest
+
+from googleapis.codegen import generate_library
+from googleapis.codegen import generation_stats
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.utilities import discovery_loader
+
+
+class GenerationStatsTest(basetest.TestCase):
+
+  def testTimingAddsUp(self):
+    stats = generation_stats.GenerationStats()
+    with stats.Timing('a'):
+      pass
+    first = stats.seconds['a']
+    with stats.Timing('a'):
+      pass
+    with stats.Timing('b'):
+      pass
+    self.assertGreaterEqual(stats.seconds['a'], first)
+    self.assertEquals(['a', 'b'], list(stats.seconds))
+    self.assertAlmostEqual(stats.seconds['a'] + stats.seconds['b'],
+                           stats.AsDict()['seconds']['total'])
+
+  def testTimingCountsFailedPhases(self):
+    stats = generation_stats.GenerationStats()
+    try:
+      with stats.Timing('broken'):
+        raise ValueError
+    except ValueError:
+      pass
+    self.assertIn('broken', stats.seconds)
+
+  def testGenerateCollectsStats(self):
+    discovery_doc = discovery_loader.LoadFile(os.path.join(
+        os.path.dirname(__file__), 'testdata', 'golden_discovery',
+        'kitchen_sink.json'))
+    package = memory_library_package.MemoryLibraryPackage()
+    stats = generate_library.Generate(discovery_doc, package,
+                                      language='java',
+                                      language_variant='default')
+    self.assertEquals(['model', 'annotate', 'templates', 'package'],
+                      list(stats.seconds))
+    counts = stats.counts
+    self.assertEquals(len(package), counts['files'])
+    self.assertEquals(sum(len(package[name]) for name in package),
+                      counts['bytes'])
+    self.assertEquals(28, counts['methods'])
+    self.assertEquals(18, counts['resources'])
+    self.assertGreater(counts['schemas'], 0)
+    self.assertGreater(counts['properties'], counts['schemas'])
+    self.assertEquals(counts, json.loads(stats.ToJson())['counts'])
+
+
+if __name__ == '__main__':
+  basetest.main()
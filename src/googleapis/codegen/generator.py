@@ -23,15 +23,15 @@ __author__ = 'aiuto@google.com (Tony Aiuto)'
 import datetime
 import os
 import re
-import StringIO
 import time
-import zipfile
 
 
 from googleapis.codegen.django_helpers import DjangoRenderTemplate
 from googleapis.codegen.language_model import LanguageModel
 from googleapis.codegen.template_objects import UseableInTemplates
 # Has to be after django_helpers pylint: disable=g-bad-import-order
+from googleapis.codegen import generation_events
+from googleapis.codegen import generation_stats
 from googleapis.codegen import template_helpers
 from googleapis.codegen.filesys import files
 
@@ -65,11 +65,18 @@ class TemplateGenerator(object):
     self._template_dir = os.path.dirname(__file__)
     self._surface_features = {}
     self._language_model = language_model or LanguageModel()
+    self._render_cache = None
+    self._stats = generation_stats.GenerationStats()
+    self._observers = []
 
   @property
   def language_model(self):
     return self._language_model
 
+  @property
+  def render_cache(self):
+    return self._render_cache
+
   def IncludeFileTree(self, path_to_tree, package):
     """Walk a file tree and copy files directly into an output package.
 
@@ -90,17 +97,14 @@ class TemplateGenerator(object):
     """Returns the full path to a template."""
     return os.path.join(self._template_dir, template_name)
 
-  def RenderTemplate(self, template_path, context_dict=None):
-    """Render a template.
-
-    Renders a template with the standard dictionary of bindings.
+  def TemplateVariables(self, context_dict=None):
+    """Returns the variables a template is rendered with.
 
     Args:
-      template_path: (str) Full path to a template.
       context_dict: (dict) A dictionary to augment the standard template
         dictionary.
     Returns:
-      (str) The fully rendered template string.
+      (dict) The standard dictionary of bindings, updated by context_dict.
     """
     variables_dict = {
         'tool': self._tool_info,  # Information about the build tool
@@ -111,7 +115,64 @@ class TemplateGenerator(object):
         }
     if context_dict:
       variables_dict.update(context_dict)
-    return DjangoRenderTemplate(template_path, variables_dict)
+    return variables_dict
+
+  def RenderTemplate(self, template_path, context_dict=None):
+    """Render a template.
+
+    Renders a template with the standard dictionary of bindings.
+
+    Args:
+      template_path: (str) Full path to a template.
+      context_dict: (dict) A dictionary to augment the standard template
+        dictionary.
+    Returns:
+      (str) The fully rendered template string.
+    """
+    return DjangoRenderTemplate(template_path,
+                                self.TemplateVariables(context_dict))
+
+  def SetRenderCache(self, render_cache):
+    """Use a RenderCache to render only the files whose inputs changed.
+
+    Args:
+      render_cache: (incremental.RenderCache) The cache, or None.
+    """
+    self._render_cache = render_cache
+
+  @property
+  def stats(self):
+    """The GenerationStats the phases of GeneratePackage are timed in."""
+    return self._stats
+
+  def SetGenerationStats(self, stats):
+    """Time the phases of GeneratePackage in a GenerationStats.
+
+    Args:
+      stats: (generation_stats.GenerationStats) The stats.
+    """
+    self._stats = stats
+
+  def AddObserver(self, observer):
+    """Hand the events of generation to an observer.
+
+    Args:
+      observer: (generation_events.GenerationObserver) The observer.
+    """
+    self._observers.append(observer)
+
+  def RemoveObserver(self, observer):
+    self._observers.remove(observer)
+
+  def _Span(self, kind, name, **details):
+    """Returns a span to emit START and END events of a with block around."""
+    if not self._observers:
+      return generation_events.NO_SPAN
+    return generation_events.Span(self._observers, kind, name, details)
+
+  def _Emit(self, kind, phase, name, **details):
+    if self._observers:
+      generation_events.Emit(self._observers, kind, phase, name, **details)
 
   def RenderTemplateToFile(self, template_path, context_dict, package,
                            output_path):
@@ -128,22 +189,46 @@ class TemplateGenerator(object):
       None
     """
     output_dir, file_name = os.path.split(output_path)
+    unit = None
+    if self._render_cache:
+      context_dict = self._render_cache.TrackVariables(context_dict)
+      unit = self._render_cache.WriteCachedUnit(
+          template_path, output_path, self.TemplateVariables(context_dict),
+          package)
+      self._Emit('render_cache',
+                 generation_events.MISS if unit else generation_events.HIT,
+                 output_path)
+      if not unit:
+        return
+    written = []
 
     def WriteFileInPackage(path, content):
       """Writes content to a path in our current package writer."""
       if isinstance(content, unicode):
         content = content.encode('utf-8', errors='ignore')
-      out = package.StartFile(os.path.join(output_dir, path))
-      out.write(content)
-      package.EndFile()
+      path = os.path.join(output_dir, path)
+      with self._Span('file', path) as span:
+        out = package.StartFile(path)
+        out.write(content)
+        package.EndFile()
+        span.details['bytes'] = len(content)
+      if unit:
+        written.append((path, content))
 
     try:
       context_dict[template_helpers.FILE_WRITER] = WriteFileInPackage
-      content = self.RenderTemplate(template_path, context_dict)
+      with self._Span('template', template_path, output_path=output_path):
+        with template_helpers.ObserveTemplateCache(self._observers):
+          content = self.RenderTemplate(template_path, context_dict)
       WriteFileInPackage(file_name, content)
     except template_helpers.Halt:
       pass
+    finally:
+      if unit:
+        unit.Stop()
     del context_dict[template_helpers.FILE_WRITER]
+    if unit:
+      unit.Finish(written)
 
   def WalkTemplateTree(self, path_to_tree, path_replacements, list_replacements,
                        variables, package, file_filter=None):
@@ -188,12 +273,8 @@ class TemplateGenerator(object):
         path: Path to file, relative to top of template tree.
       """
       full_path = os.path.join(self._template_dir, path)
-      zip_slurp = files.GetFileContents(full_path)
-      archive = zipfile.ZipFile(StringIO.StringIO(zip_slurp), 'r')
-      for info in archive.infolist():
-        package.WriteDataAsFile(
-            archive.read(info.filename),
-            os.path.join(relative_path, info.filename))
+      with self._Span('file', relative_path, source=full_path):
+        package.IncludeZipContents(full_path, relative_path)
 
     top_of_tree = os.path.normpath(
         os.path.join(self._template_dir, path_to_tree))
@@ -237,7 +318,8 @@ class TemplateGenerator(object):
         if file_filter and not file_filter(full_template_path,
                                            full_output_path):
           continue
-        package.IncludeFile(path, full_output_path)
+        with self._Span('file', full_output_path, source=path):
+          package.IncludeFile(path, full_output_path)
 
   def GeneratePackage(self, package_writer):
     """Generate the package.
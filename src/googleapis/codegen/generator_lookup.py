@@ -7,15 +7,7 @@
 __author__ = 'akesling@google.com (Alex Kesling)'
 
 
-from googleapis.codegen import cpp_generator
-from googleapis.codegen import csharp_generator
-from googleapis.codegen import dart_generator
-from googleapis.codegen import gwt_generator
-from googleapis.codegen import java_generator
-from googleapis.codegen import objc_generator
-from googleapis.codegen import php_generator
-from googleapis.codegen import python_generator
-from googleapis.codegen import sample_generator
+import importlib
 
 
 # Multiple generators per language are possible, as is the case with
@@ -23,29 +15,35 @@ from googleapis.codegen import sample_generator
 # features.json file (with the "generator" attribute); this will refer
 # to a key in these dictionaries.  If a template tree does not
 # include this specification, the language name is used as a key.
+#
+# Generators are named by (module, class) rather than imported here, so that
+# a run for one language does not pay for importing all the others (and their
+# dependencies, such as the Python client library).
 _GENERATORS_BY_LANGUAGE = {
-    'cpp': cpp_generator.CppGenerator,
-    'csharp': csharp_generator.CSharpGenerator,
-    'dart': dart_generator.DartGenerator,
-    'gwt': gwt_generator.GwtGenerator,
-    'java': java_generator.Java14Generator,
-    'objc': objc_generator.ObjCGenerator,
-    'php': php_generator.PHPGenerator,
-    'python': python_generator.PythonGenerator,
-    'sample': sample_generator.SampleGenerator,
+    'cpp': ('cpp_generator', 'CppGenerator'),
+    'csharp': ('csharp_generator', 'CSharpGenerator'),
+    'dart': ('dart_generator', 'DartGenerator'),
+    'gwt': ('gwt_generator', 'GwtGenerator'),
+    'java': ('java_generator', 'Java14Generator'),
+    'objc': ('objc_generator', 'ObjCGenerator'),
+    'php': ('php_generator', 'PHPGenerator'),
+    'python': ('python_generator', 'PythonGenerator'),
+    'sample': ('sample_generator', 'SampleGenerator'),
     }
 
 
 _ALL_GENERATORS = {
-    'java1_12': java_generator.Java12Generator,
-    'java1_13': java_generator.Java12Generator,
-    'java1_14': java_generator.Java14Generator,
-    'java1_15': java_generator.Java14Generator,
+    'java1_12': ('java_generator', 'Java12Generator'),
+    'java1_13': ('java_generator', 'Java12Generator'),
+    'java1_14': ('java_generator', 'Java14Generator'),
+    'java1_15': ('java_generator', 'Java14Generator'),
 }
 
 
 _ALL_GENERATORS.update(_GENERATORS_BY_LANGUAGE)
 
+_GENERATOR_PACKAGE = 'googleapis.codegen'
+
 
 def GetGeneratorByLanguage(language_or_generator):
   """Return the appropriate generator for this language.
@@ -62,9 +60,11 @@ def GetGeneratorByLanguage(language_or_generator):
   """
 
   try:
-    return _ALL_GENERATORS[language_or_generator]
+    module_name, class_name = _ALL_GENERATORS[language_or_generator]
   except KeyError:
     raise ValueError('Unsupported language: %s' % language_or_generator)
+  module = importlib.import_module('%s.%s' % (_GENERATOR_PACKAGE, module_name))
+  return getattr(module, class_name)
 
 
 def SupportedLanguages():
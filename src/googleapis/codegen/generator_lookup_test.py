@@ -7,6 +7,7 @@ __author__ = 'akesling@google.com (Alex Kesling)'
 
 import json
 import os
+import sys
 
 
 from google.apputils import basetest
@@ -38,6 +39,14 @@ class GeneratorLookupTest(basetest.TestCase):
     gen = generator_lookup.GetGeneratorByLanguage('java1_14')
     self.assertEquals(java_generator.Java14Generator, gen)
 
+  def testGeneratorsAreImportedOnDemand(self):
+    # Nothing in this test imports the PHP generator, so it is only loaded
+    # once it is asked for.
+    self.assertNotIn('googleapis.codegen.php_generator', sys.modules)
+    gen = generator_lookup.GetGeneratorByLanguage('php')
+    self.assertEquals('PHPGenerator', gen.__name__)
+    self.assertIn('googleapis.codegen.php_generator', sys.modules)
+
   def testVersionFromFeature(self):
     template_root = os.path.join(os.path.dirname(__file__),
                                  'testdata/templates')
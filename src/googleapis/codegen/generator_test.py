@@ -101,6 +101,14 @@ class GeneratorTest(basetest.TestCase):
     self._package.DoneWritingArchive()
     self.VerifyPackageContains(['foo'], must_not_contain=['bar'])
 
+  def testWalkTemplateTreeExpandsZipFiles(self):
+    gen = generator.TemplateGenerator()
+    gen.SetTemplateDir(self._TEST_DATA_DIR)
+    gen.WalkTemplateTree('bundle', {}, {}, {}, self._package)
+    self._package.DoneWritingArchive()
+    self.VerifyPackageContains(['LICENSE.txt', 'from_zip/', 'from_zip/a.txt'],
+                               must_not_contain=['___unzip___package.zip'])
+
 
 
 if __name__ == '__main__':
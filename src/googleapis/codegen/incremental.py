@@ -0,0 +1,605 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Incremental regeneration of a library.
+
+A RenderCache remembers, for every template rendered into an output file (a
+"unit"), what the rendering depended on:
+  * the variables it was given, other than template objects,
+  * the contents of every template it loaded, and
+  * every template value it read, as (object, name), together with a digest
+    of the value read.
+and it keeps the files the unit wrote in a content store.
+
+On the next run over a new version of the discovery document, each unit is
+checked before it is rendered. If its templates are unchanged and every
+value it read last time still has the same digest, the files it wrote last
+time are written again instead of rendering it. So when a new revision of an
+API changes one method, only the files which looked at that method are
+rendered.
+
+Template objects are matched between runs by a key made of the names along
+the path to them from the Api. Values which refer to other template
+objects are digested as references, by key, since any use of the contents of
+the other object is itself recorded as a read.
+
+A unit is always rendered again if it changed any template value while
+rendering, or read a value which can not be digested.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from googleapis.codegen import template_helpers
+from googleapis.codegen import template_objects
+from googleapis.codegen.filesys import content_store
+from googleapis.codegen.filesys import files
+
+# Bump this whenever a change to the state format or to the digests makes old
+# state unusable.
+_STATE_FORMAT_VERSION = '1'
+
+# Hex digits kept of the digests of values read. Each run stores tens of
+# thousands of them, and 80 bits are plenty to notice a change.
+_DIGEST_LENGTH = 20
+
+_LOGGER = logging.getLogger('codegen')
+
+# Names tried, in order, to name a template object in its key.
+_KEY_NAME_FIELDS = ('wireName', 'id', 'name', 'className', 'value')
+_TYPE_FIELDS = ('type', 'format')
+
+# Attributes of template objects which link to objects reached some other way.
+_LINK_ATTRIBUTES = frozenset(['_api', '_parent', '_children', '_module'])
+
+
+class _Untrackable(Exception):
+  """A value which can not be digested was read."""
+
+
+class _TrackedValues(dict):
+  """A copy of the values of a template object, which records what is read.
+
+  Templates get the values of the Api as a plain dictionary, so reads of it do
+  not go through the Api object. Each unit is given one of these in its place.
+  """
+
+  def __init__(self, owner):
+    super(_TrackedValues, self).__init__(owner.values)
+    self._owner = owner
+
+  def __getitem__(self, key):
+    template_objects.NoteRead(self._owner, key)
+    return dict.__getitem__(self, key)
+
+  def __setitem__(self, key, value):
+    self._owner.SetTemplateValue(key, value)
+    dict.__setitem__(self, key, value)
+
+  def __contains__(self, key):
+    template_objects.NoteRead(self._owner, key)
+    return dict.__contains__(self, key)
+
+  def get(self, key, default=None):  # pylint: disable=g-bad-name
+    template_objects.NoteRead(self._owner, key)
+    return dict.get(self, key, default)
+
+  def _All(self):
+    template_objects.NoteRead(self._owner, None)
+
+  def __iter__(self):
+    self._All()
+    return dict.__iter__(self)
+
+  def __len__(self):
+    self._All()
+    return dict.__len__(self)
+
+  def keys(self):  # pylint: disable=g-bad-name
+    self._All()
+    return dict.keys(self)
+
+  def values(self):  # pylint: disable=g-bad-name
+    self._All()
+    return dict.values(self)
+
+  def items(self):  # pylint: disable=g-bad-name
+    self._All()
+    return dict.items(self)
+
+  def iteritems(self):  # pylint: disable=g-bad-name
+    self._All()
+    return dict.iteritems(self)
+
+
+def _HasName(node):
+  values = node.values
+  return any(isinstance(dict.get(values, field), basestring)
+             for field in _KEY_NAME_FIELDS)
+
+
+def _NodeName(node):
+  values = node.values
+  for field in _KEY_NAME_FIELDS:
+    name = dict.get(values, field)
+    if isinstance(name, basestring):
+      return '%s:%s' % (type(node).__name__, name)
+  # Unnamed objects, such as primitive data types, go by their type.
+  return ':'.join([type(node).__name__] +
+                  [dict.get(values, field) or '' for field in _TYPE_FIELDS])
+
+
+class _NodeIndex(object):
+  """Finds the template objects of the current run by key.
+
+  The key of a template object is the path by which it is first reached from
+  a root, breadth first, made of the names of the values followed and of the
+  template objects passed through. List positions are not part of the path,
+  so adding an element to a list does not change the keys of the others.
+  """
+
+  def __init__(self):
+    self._nodes_by_key = {}
+    self._keys = {}
+    self._values_owners = {}
+
+  def AddRoot(self, root):
+    """Index a template object and every template object reachable from it."""
+    if id(root) in self._keys:
+      return
+    queue = collections.deque([(root, '')])
+    seen = set()
+    while queue:
+      value, path = queue.popleft()
+      if id(value) in seen:
+        continue
+      seen.add(id(value))
+      if isinstance(value, template_objects.UseableInTemplates):
+        if id(value) in self._keys:
+          continue
+        key = self._ParentBasedKey(value)
+        if key is None:
+          key = '%s/%s' % (path, _NodeName(value)) if path else _NodeName(
+              value)
+        self._keys[id(value)] = key
+        self._nodes_by_key.setdefault(key, []).append(value)
+        values = value.values
+        self._values_owners.setdefault(id(values), value)
+        for name, item in sorted(dict.items(values)):
+          queue.append((item, '%s/%s' % (key, name)))
+        # Objects held in other attributes, such as the data type of a
+        # property, are also used by templates.
+        for name, item in sorted(vars(value).iteritems()):
+          if name in _LINK_ATTRIBUTES:
+            continue
+          if (isinstance(item, template_objects.UseableInTemplates) or
+              (isinstance(item, list) and item and
+               isinstance(item[0], template_objects.UseableInTemplates))):
+            queue.append((item, '%s/%s' % (key, name.lstrip('_'))))
+      elif isinstance(value, dict):
+        for name, item in dict.items(value):
+          queue.append((item, '%s/%s' % (path, name)))
+      elif isinstance(value, (list, tuple)):
+        for item in value:
+          queue.append((item, path))
+
+  def _ParentBasedKey(self, node):
+    """Returns the key of a named object under its parent, or None.
+
+    Named objects are keyed by their names and those of their parents, up to
+    one which is already indexed, when there is such a chain. That keeps
+    apart, for example, nested schemas of the same name which are all listed
+    in the models of the Api.
+
+    Args:
+      node: (UseableInTemplates) The object.
+    Returns:
+      (str) The key, or None if the object has to be keyed by its path.
+    """
+    names = []
+    seen = set()
+    while id(node) not in self._keys:
+      if id(node) in seen or not _HasName(node):
+        return None
+      seen.add(id(node))
+      names.append(_NodeName(node))
+      try:
+        node = getattr(node, 'parent', None)
+      except Exception:  # pylint: disable=broad-except
+        # e.g. a SchemaReference to a missing schema.
+        return None
+      if node is None:
+        return None
+    names.append(self._keys[id(node)])
+    return '/'.join(reversed(names))
+
+  def KeyOf(self, node):
+    """Returns the key of a template object.
+
+    Objects which are not indexed get a key which no object can be found by,
+    so that a unit which read them is always rendered again.
+
+    Args:
+      node: (UseableInTemplates) The object.
+    Returns:
+      (str) The key.
+    """
+    key = self._keys.get(id(node))
+    if key is None:
+      key = '?' + _NodeName(node)
+    return key
+
+  def Lookup(self, key):
+    """Returns the template objects with a key, or an empty list."""
+    return self._nodes_by_key.get(key, [])
+
+  def ValuesOwner(self, value):
+    """Returns the template object whose values dict this is, or None."""
+    return self._values_owners.get(id(value))
+
+
+def _Digest(value, index):
+  """Digest a value read by a template.
+
+  Template objects inside the value, and the values dictionaries of template
+  objects, are digested as references. The value itself is always digested
+  by its contents.
+
+  Args:
+    value: (object) The value.
+    index: (_NodeIndex) Index used to name template objects.
+  Returns:
+    (str) The hex digest.
+  Raises:
+    _Untrackable: If the value contains something which can not be digested.
+  """
+  digest = hashlib.sha1()
+  end = object()
+  top = value
+  objects_seen = {}
+  stack = [value]
+  while stack:
+    value = stack.pop()
+    if value is end:
+      digest.update(')')
+    elif value is None or isinstance(value, (bool, int, long, float)):
+      digest.update('%s:%r;' % (type(value).__name__, value))
+    elif isinstance(value, basestring):
+      if isinstance(value, unicode):
+        value = value.encode('utf-8')
+      digest.update('s%d:%s' % (len(value), value))
+    elif isinstance(value, template_objects.UseableInTemplates):
+      digest.update('n%s;' % index.KeyOf(value).encode('utf-8'))
+    elif isinstance(value, dict):
+      owner = index.ValuesOwner(value)
+      if owner is not None and value is not top:
+        digest.update('v%s;' % index.KeyOf(owner).encode('utf-8'))
+        continue
+      items = dict.items(value)
+      if type(value) is dict:  # pylint: disable=unidiomatic-typecheck
+        items.sort()
+      digest.update('{')
+      stack.append(end)
+      for item_key, item_value in reversed(items):
+        stack.append(item_value)
+        stack.append(item_key)
+    elif isinstance(value, (list, tuple)):
+      digest.update('[')
+      stack.append(end)
+      stack.extend(reversed(value))
+    elif isinstance(value, (set, frozenset)):
+      digest.update('<')
+      stack.append(end)
+      stack.extend(sorted(value, reverse=True))
+    elif hasattr(value, '__dict__') and not callable(value):
+      # Helpers kept in template values, such as import managers, are
+      # digested by their attributes.
+      if id(value) in objects_seen:
+        digest.update('r%d;' % objects_seen[id(value)])
+        continue
+      objects_seen[id(value)] = len(objects_seen)
+      digest.update('o%s' % type(value).__name__)
+      stack.append(vars(value))
+    else:
+      raise _Untrackable(type(value).__name__)
+  return digest.hexdigest()[:_DIGEST_LENGTH]
+
+
+def _ReadValue(node, name):
+  """Returns what a template gets when it reads a name from an object."""
+  values = node.values
+  if name is None:
+    # Values cached by the object may or may not have been computed yet.
+    cached = node.cached_value_names
+    return dict((k, v) for k, v in values.iteritems() if k not in cached)
+  if name in values:
+    return values[name]
+  try:
+    value = getattr(node, name)
+    if callable(value):
+      value = value()
+    return value
+  except Exception:  # pylint: disable=broad-except
+    return None
+
+
+class _Unit(object):
+  """The rendering of one template into the output package."""
+
+  def __init__(self, cache, unit_key, template_path, variables):
+    self._cache = cache
+    self._unit_key = unit_key
+    self._template_path = template_path
+    self._variables = variables
+    self._access_log = template_objects.AccessLog()
+    self._templates_read = set()
+    self._access_tracking = template_objects.TrackAccess(self._access_log)
+    self._template_tracking = template_helpers.TrackTemplateReads(
+        self._templates_read)
+    self._access_tracking.__enter__()
+    self._template_tracking.__enter__()
+
+  def Stop(self):
+    """Stop recording accesses."""
+    self._template_tracking.__exit__(None, None, None)
+    self._access_tracking.__exit__(None, None, None)
+
+  def Finish(self, outputs):
+    """Record what the unit depended on and the files it wrote.
+
+    Args:
+      outputs: (list) (path, content) of each file written.
+    """
+    self._cache.FinishUnit(self._unit_key, self._template_path,
+                           self._variables, self._access_log,
+                           self._templates_read, outputs)
+
+
+class RenderCache(object):
+  """The state of incremental generation for one library."""
+
+  def __init__(self, state_dir):
+    """Construct a RenderCache.
+
+    Args:
+      state_dir: (str) Directory holding the state of the previous run of the
+        same library. It is created if it does not exist.
+    """
+    self._state_path = os.path.join(state_dir, 'state.json')
+    self._state_dir = state_dir
+    self._store = content_store.ContentStore(os.path.join(state_dir, 'store'))
+    self._previous_units = {}
+    self._previous_reads = []
+    self._previous_keys = []
+    self._read_verdicts = {}
+    self._units = {}
+    self._reads = []
+    self._read_numbers = {}
+    self._keys = []
+    self._key_numbers = {}
+    self._unit_counts = {}
+    self._index = _NodeIndex()
+    self._template_digests = {}
+    self._read_digests = {}
+    self.rendered = 0
+    self.reused = 0
+    if files.IsFile(self._state_path):
+      state = json.loads(files.GetFileContents(self._state_path))
+      if state.get('version') == _STATE_FORMAT_VERSION:
+        self._previous_units = state['units']
+        self._previous_reads = state['reads']
+        self._previous_keys = state['keys']
+
+  def AddRoot(self, root):
+    """Make the template objects reachable from root known to the cache.
+
+    Reads of template objects which are not known when the next run checks a
+    unit make that unit render again.
+
+    Args:
+      root: (UseableInTemplates) Typically the Api.
+    """
+    self._index.AddRoot(root)
+
+  def TrackVariables(self, variables):
+    """Returns a copy of the template variables which records reads.
+
+    Args:
+      variables: (dict) The variables for a template.
+    Returns:
+      (dict) The variables to render with instead.
+    """
+    tracked = dict(variables)
+    for name, value in variables.iteritems():
+      if isinstance(value, dict) and not isinstance(value, _TrackedValues):
+        owner = self._index.ValuesOwner(value)
+        if owner is not None:
+          tracked[name] = _TrackedValues(owner)
+    return tracked
+
+  def _UnitKey(self, template_path, output_path):
+    key = '%s\0%s' % (template_path, output_path)
+    count = self._unit_counts.get(key, 0)
+    self._unit_counts[key] = count + 1
+    return '%s\0%d' % (key, count)
+
+  def _VariablesDigest(self, variables):
+    """Digest the variables of a unit, other than template objects."""
+    bindings = {}
+    for name, value in variables.iteritems():
+      if name == template_helpers.FILE_WRITER:
+        continue
+      if isinstance(value, template_objects.UseableInTemplates):
+        self._index.AddRoot(value)
+        bindings[name] = ['node', self._index.KeyOf(value)]
+      elif isinstance(value, _TrackedValues):
+        bindings[name] = ['values', self._index.KeyOf(value._owner)]  # pylint: disable=protected-access
+      elif name == 'language_model':
+        bindings[name] = ['class', type(value).__name__]
+      else:
+        bindings[name] = value
+    return _Digest(bindings, self._index)
+
+  def _TemplateDigest(self, template_path):
+    digest = self._template_digests.get(template_path)
+    if digest is None:
+      try:
+        digest = hashlib.sha1(files.GetFileContents(template_path)).hexdigest()
+      except files.FileDoesNotExist:
+        digest = ''
+      self._template_digests[template_path] = digest
+    return digest
+
+  def _ReadDigest(self, node, name):
+    memo_key = (id(node), name)
+    memo = self._read_digests.get(memo_key)
+    if memo is None:
+      # Keep the node with its digest, so that its id is not reused.
+      memo = (node, _Digest(_ReadValue(node, name), self._index))
+      self._read_digests[memo_key] = memo
+    return memo[1]
+
+  def WriteCachedUnit(self, template_path, output_path, variables, package):
+    """Write the files of a unit from the last run, if it is unchanged.
+
+    Args:
+      template_path: (str) Full path to the template.
+      output_path: (str) The path of the file in the package.
+      variables: (dict) All the variables the template will be rendered with.
+      package: (LibraryPackage) The output package.
+    Returns:
+      (_Unit) None if the files were written. Otherwise, a unit which is
+      recording accesses and must be stopped and finished once the template
+      has been rendered.
+    """
+    unit_key = self._UnitKey(template_path, output_path)
+    record = self._previous_units.get(unit_key)
+    if record and self._IsUnchanged(record, variables):
+      for path, digest in record['outputs']:
+        out = package.StartFile(path)
+        out.write(files.GetFileContents(self._store.BlobPath(digest)))
+        package.EndFile()
+      self._units[unit_key] = dict(
+          record, reads=[self._PreviousReadNumber(number)
+                         for number in record['reads']])
+      self.reused += 1
+      return None
+    self.rendered += 1
+    return _Unit(self, unit_key, template_path, variables)
+
+  def _IsUnchanged(self, record, variables):
+    try:
+      if record['variables'] != self._VariablesDigest(variables):
+        return False
+      for path, digest in record['templates']:
+        if self._TemplateDigest(path) != digest:
+          return False
+      for number in record['reads']:
+        if not self._IsReadUnchanged(number):
+          return False
+    except _Untrackable:
+      return False
+    return True
+
+  def _IsReadUnchanged(self, number):
+    """Checks a read in the table of the last run against this run."""
+    verdict = self._read_verdicts.get(number)
+    if verdict is None:
+      key_number, name, digest = self._previous_reads[number]
+      nodes = self._index.Lookup(self._previous_keys[key_number])
+      verdict = bool(nodes) and all(self._ReadDigest(node, name) == digest
+                                    for node in nodes)
+      self._read_verdicts[number] = verdict
+    return verdict
+
+  def _ReadNumber(self, key, name, digest):
+    """Returns the position of a read in the table of reads of this run.
+
+    Units which read the same values, such as those of the Api, share an
+    entry of the table, and entries share the keys in the table of keys.
+
+    Args:
+      key: (str) The key of the object read.
+      name: (str) The name read, or None for all the values.
+      digest: (str) The digest of the value read.
+    Returns:
+      (int) The position.
+    """
+    key_number = self._key_numbers.get(key)
+    if key_number is None:
+      key_number = len(self._keys)
+      self._keys.append(key)
+      self._key_numbers[key] = key_number
+    read = (key_number, name, digest)
+    number = self._read_numbers.get(read)
+    if number is None:
+      number = len(self._reads)
+      self._reads.append(read)
+      self._read_numbers[read] = number
+    return number
+
+  def _PreviousReadNumber(self, number):
+    """Returns the number in this run of a read from the last run."""
+    key_number, name, digest = self._previous_reads[number]
+    return self._ReadNumber(self._previous_keys[key_number], name, digest)
+
+  def FinishUnit(self, unit_key, template_path, variables, access_log,
+                 templates_read, outputs):
+    """Record a unit which was rendered. See _Unit.Finish."""
+    if access_log.writes:
+      # Rendering changed the template objects. Values digested earlier may
+      # be stale, and this unit must render again next time.
+      self._read_digests = {}
+      return
+    try:
+      reads = set()
+      for node, name in ((node, name) for (_, name), node
+                         in access_log.reads.iteritems()):
+        reads.add((self._index.KeyOf(node), name,
+                   self._ReadDigest(node, name)))
+      templates_read.add(template_path)
+      record = {
+          'variables': self._VariablesDigest(variables),
+          'templates': sorted([path, self._TemplateDigest(path)]
+                              for path in templates_read),
+          'reads': sorted(self._ReadNumber(*read) for read in reads),
+          'outputs': [],
+      }
+    except _Untrackable as e:
+      _LOGGER.debug('Not caching %s: read a %s', unit_key, e)
+      return
+    for path, content in outputs:
+      digest, _ = self._store.PutData(content)
+      record['outputs'].append([path, digest])
+    self._units[unit_key] = record
+
+  def Save(self):
+    """Write the state of this run, for the next one to use."""
+    state = {'version': _STATE_FORMAT_VERSION, 'keys': self._keys,
+             'reads': self._reads, 'units': self._units}
+    fd, temp_path = tempfile.mkstemp(dir=self._state_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w') as f:
+        json.dump(state, f, sort_keys=True, separators=(',', ':'))
+      os.rename(temp_path, self._state_path)
+    finally:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+    _LOGGER.info('Rendered %d templates, reused the output of %d',
+                 self.rendered, self.reused)
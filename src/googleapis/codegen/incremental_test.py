@@ -0,0 +1,106 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for incremental.py."""
+
+import os
+import shutil
+import tempfile
+
+from google.apputils import basetest
+
+from googleapis.codegen import generator_lookup
+from googleapis.codegen import incremental
+from googleapis.codegen.filesys import memory_library_package
+from googleapis.codegen.targets import Targets
+from googleapis.codegen.utilities import discovery_loader
+
+
+class IncrementalTest(basetest.TestCase):
+
+  def setUp(self):
+    self._state_dir = tempfile.mkdtemp()
+    self._discovery = discovery_loader.LoadFile(
+        os.path.join(os.path.dirname(__file__), 'testdata',
+                     'golden_discovery', 'kitchen_sink.json'))
+
+  def tearDown(self):
+    shutil.rmtree(self._state_dir)
+
+  def _Generate(self, discovery, state_dir=None):
+    """Generate the Java library, returning the package and the cache."""
+    features = Targets().VariationsForLanguage('java').GetFeatures('default')
+    generator_class = generator_lookup.GetGeneratorByLanguage('java')
+    generator = generator_class(
+        discovery, options={'incremental_state_dir': state_dir})
+    generator.SetTemplateDir(features.template_dir)
+    generator.SetFeatures(features)
+    package = memory_library_package.MemoryLibraryPackage()
+    generator.GeneratePackage(package)
+    package.DoneWritingArchive()
+    return package, generator.render_cache
+
+  def _AssertSameFiles(self, expected, got):
+    self.assertEquals(list(expected), list(got))
+    for name in expected:
+      self.assertEquals(expected[name], got[name], name)
+
+  def testUnchangedInputIsReused(self):
+    first, first_cache = self._Generate(self._discovery, self._state_dir)
+    self.assertEquals(0, first_cache.reused)
+    second, cache = self._Generate(self._discovery, self._state_dir)
+    # Units which change template values while rendering are rendered every
+    # time; the rest are reused.
+    self.assertEquals(first_cache.rendered, cache.rendered + cache.reused)
+    self.assertGreater(cache.reused, cache.rendered)
+    self._AssertSameFiles(first, second)
+
+  def testChangedSchemaIsRenderedAgain(self):
+    self._Generate(self._discovery, self._state_dir)
+    self._discovery['schemas']['Tag']['properties']['caption'] = {
+        'type': 'string', 'description': 'A new property.'}
+    incremental_output, cache = self._Generate(self._discovery,
+                                               self._state_dir)
+    self.assertTrue(cache.rendered)
+    self.assertTrue(cache.reused)
+    full_output, _ = self._Generate(self._discovery)
+    self._AssertSameFiles(full_output, incremental_output)
+    self.assertIn('caption', incremental_output[
+        'com/google/kitch_sink/model/Tag.java'])
+
+  def testChangedTemplateIsRenderedAgain(self):
+    cache = incremental.RenderCache(self._state_dir)
+    cache._template_digests['/nowhere/a.tmpl'] = 'a'  # pylint: disable=protected-access
+    package = memory_library_package.MemoryLibraryPackage()
+    unit = cache.WriteCachedUnit('/nowhere/a.tmpl', 'a.txt', {}, package)
+    unit.Stop()
+    unit.Finish([('a.txt', 'contents')])
+    cache.Save()
+
+    cache = incremental.RenderCache(self._state_dir)
+    cache._template_digests['/nowhere/a.tmpl'] = 'a'  # pylint: disable=protected-access
+    self.assertIsNone(cache.WriteCachedUnit('/nowhere/a.tmpl', 'a.txt', {},
+                                            package))
+    package.DoneWritingArchive()
+    self.assertEquals('contents', package['a.txt'])
+
+    cache = incremental.RenderCache(self._state_dir)
+    cache._template_digests['/nowhere/a.tmpl'] = 'b'  # pylint: disable=protected-access
+    self.assertIsNotNone(cache.WriteCachedUnit(
+        '/nowhere/a.tmpl', 'a.txt', {}, package))
+
+
+if __name__ == '__main__':
+  basetest.main()
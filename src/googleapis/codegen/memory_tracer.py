@@ -0,0 +1,162 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Samples of memory use at the boundaries of the phases of a generation.
+
+A MemoryTracer given to a GenerationStats takes a sample at the end of every
+phase it times. Each sample holds:
+  rss_kb        the resident memory of the process, where it can be read,
+  peak_rss_kb   the largest resident memory of the process so far, never
+                less than rss_kb,
+  objects       the number of live objects of each type from this package and
+                from django.template, largest first: the Api tree, template
+                nodes and contexts,
+  top_sites     the source lines holding the most allocated memory, when the
+                interpreter has the tracemalloc module (Python 3, or a
+                Python 2 built with pytracemalloc). Otherwise this is empty.
+
+Counting objects walks the whole heap, so tracing slows generation down; it
+is meant for finding where the memory goes, not for every run.
+"""
+
+import collections
+import gc
+import os
+import platform
+import resource
+
+try:
+  import tracemalloc  # pylint: disable=g-import-not-at-top
+except ImportError:
+  tracemalloc = None
+
+# Objects of types from these modules are counted.
+_COUNTED_MODULE_PREFIXES = ('googleapis.codegen', 'django.template')
+
+
+def PeakRssKb():
+  """Returns the peak resident memory of this process, in kilobytes."""
+  peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  if platform.system() == 'Darwin':
+    peak_rss //= 1024  # Reported in bytes rather than kilobytes.
+  return peak_rss
+
+
+def RssKb():
+  """Returns the resident memory of this process in kilobytes, or None."""
+  try:
+    with open('/proc/self/statm') as f:
+      pages = int(f.read().split()[1])
+  except (IOError, IndexError, ValueError):
+    return None
+  return pages * resource.getpagesize() // 1024
+
+
+def CountLiveObjects(limit=None):
+  """Count the live objects of the types from this package and Django.
+
+  Args:
+    limit: (int) How many types to return, or None for all.
+  Returns:
+    (list) (type name, count), the most numerous first.
+  """
+  counts = collections.Counter()
+  for obj in gc.get_objects():
+    cls = type(obj)
+    module = getattr(cls, '__module__', None) or ''
+    if module.startswith(_COUNTED_MODULE_PREFIXES):
+      counts['%s.%s' % (module, cls.__name__)] += 1
+  return counts.most_common(limit)
+
+
+class MemoryTracer(object):
+  """Samples memory use each time it is asked to."""
+
+  def __init__(self, top_types=20, top_sites=10):
+    """Construct a MemoryTracer, starting tracemalloc if it is available.
+
+    Args:
+      top_types: (int) How many types to keep the object counts of in each
+        sample.
+      top_sites: (int) How many allocation sites to keep in each sample.
+    """
+    self._top_types = top_types
+    self._top_sites = top_sites
+    self._started_tracing = False
+    if tracemalloc and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      self._started_tracing = True
+    self.samples = []
+
+  def Sample(self, phase):
+    """Record the memory use at the end of a phase.
+
+    Args:
+      phase: (str) The phase.
+    """
+    rss = RssKb()
+    peak = PeakRssKb()
+    # The two come from different kernel counters, read at different times,
+    # so the peak can read slightly below the current size.
+    if rss is not None:
+      peak = max(peak, rss)
+    self.samples.append({
+        'phase': phase,
+        'rss_kb': rss,
+        'peak_rss_kb': peak,
+        'objects': CountLiveObjects(self._top_types),
+        'top_sites': self._TopSites(),
+    })
+
+  def _TopSites(self):
+    if not (tracemalloc and tracemalloc.is_tracing()):
+      return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__)])
+    sites = []
+    for stat in snapshot.statistics('lineno')[:self._top_sites]:
+      frame = stat.traceback[0]
+      sites.append({'site': '%s:%d' % (frame.filename, frame.lineno),
+                    'size_kb': stat.size // 1024,
+                    'count': stat.count})
+    return sites
+
+  def Stop(self):
+    """Stop tracemalloc, if this tracer started it."""
+    if self._started_tracing:
+      tracemalloc.stop()
+      self._started_tracing = False
+
+  def Report(self):
+    """Returns the samples as text, one block per phase."""
+    lines = []
+    for sample in self.samples:
+      lines.append('%s: rss %sKB, peak %dKB' % (
+          sample['phase'],
+          '?' if sample['rss_kb'] is None else sample['rss_kb'],
+          sample['peak_rss_kb']))
+      for name, count in sample['objects']:
+        lines.append('  %10d  %s' % (count, name))
+      for site in sample['top_sites']:
+        lines.append('  %8dKB %8d  %s' % (site['size_kb'], site['count'],
+                                          site['site']))
+    return '\n'.join(lines)
+
+  def AsList(self):
+    """Returns the samples, in a form for json.dump."""
+    return [dict(sample, objects=[{'type': name, 'count': count}
+                                  for name, count in sample['objects']])
+            for sample in self.samples]
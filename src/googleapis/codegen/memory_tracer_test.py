@@ -0,0 +1,83 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for memory_tracer.py."""
+
+import json
+
+from google.apputils import basetest
+
+from googleapis.codegen import generation_stats
+from googleapis.codegen import memory_tracer
+from googleapis.codegen import template_objects
+
+_CONSTANT_TYPE = 'googleapis.codegen.template_objects.Constant'
+
+
+class MemoryTracerTest(basetest.TestCase):
+
+  def setUp(self):
+    self._tracer = memory_tracer.MemoryTracer()
+
+  def tearDown(self):
+    self._tracer.Stop()
+
+  def testCountsLiveObjects(self):
+    before = dict(memory_tracer.CountLiveObjects()).get(_CONSTANT_TYPE, 0)
+    constants = [template_objects.Constant(i) for i in range(5)]
+    self.assertEquals(before + 5,
+                      dict(memory_tracer.CountLiveObjects())[_CONSTANT_TYPE])
+    del constants
+
+  def testSamplesPhasesOfStats(self):
+    stats = generation_stats.GenerationStats(memory_tracer=self._tracer)
+    with stats.Timing('model'):
+      constants = [template_objects.Constant(i) for i in range(3)]
+    with stats.Timing('templates'):
+      pass
+    samples = self._tracer.samples
+    self.assertEquals(['model', 'templates'], [s['phase'] for s in samples])
+    self.assertGreater(samples[0]['peak_rss_kb'], 0)
+    self.assertIn(_CONSTANT_TYPE, dict(samples[0]['objects']))
+    memory = json.loads(stats.ToJson())['memory']
+    self.assertEquals('model', memory[0]['phase'])
+    self.assertIn({'type': _CONSTANT_TYPE,
+                   'count': dict(samples[0]['objects'])[_CONSTANT_TYPE]},
+                  memory[0]['objects'])
+    report = self._tracer.Report()
+    self.assertIn('model: rss', report)
+    self.assertIn(_CONSTANT_TYPE, report)
+    del constants
+
+  def testPeakIsNeverBelowCurrent(self):
+    peak_rss_kb = memory_tracer.PeakRssKb
+    self.addCleanup(setattr, memory_tracer, 'PeakRssKb', peak_rss_kb)
+    memory_tracer.PeakRssKb = lambda: 1
+    self._tracer.Sample('model')
+    sample = self._tracer.samples[0]
+    if sample['rss_kb'] is None:
+      self.assertEquals(1, sample['peak_rss_kb'])
+    else:
+      self.assertEquals(sample['rss_kb'], sample['peak_rss_kb'])
+
+  def testRssIsReadWhereAvailable(self):
+    rss = memory_tracer.RssKb()
+    if rss is not None:
+      self.assertGreater(rss, 0)
+    self.assertGreater(memory_tracer.PeakRssKb(), 0)
+
+
+if __name__ == '__main__':
+  basetest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Command line tool to compile every template of some language variants.
+
+Each template is compiled once, so syntax errors are found even in templates
+which no test happens to render. The time taken to compile each template is
+printed, with any error, and the tool fails if any template has one.
+Usage:
+$ PYTHONPATH=$(/bin/pwd)/src \
+  $(/bin/pwd)/src/googleapis/codegen/precompile_templates.py \
+    --languages=java,csharp --report_json=templates.json
+"""
+
+import json
+import os
+import sys
+
+from google.apputils import app
+import gflags as flags
+from googleapis.codegen.targets import Targets
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list(
+    'languages',
+    [],
+    'The languages whose templates to compile. Defaults to every language.')
+flags.DEFINE_list(
+    'variants',
+    [],
+    'The variants of each language to compile. Defaults to every variant.')
+flags.DEFINE_string(
+    'report_json',
+    None,
+    'Write the compile time and error of each template as JSON to this'
+    ' file.')
+
+flags.DECLARE_key_flag('languages')
+flags.DECLARE_key_flag('report_json')
+flags.DECLARE_key_flag('variants')
+
+
+def PrecompileVariations(targets, languages=None, variants=None):
+  """Compile the templates of language variants into the template cache.
+
+  A template directory shared by several variants is compiled once.
+
+  Args:
+    targets: (Targets) The targets.
+    languages: (list) The languages to compile. Every language if None.
+    variants: (list) The variants of each language to compile. Every variant
+      if None.
+  Returns:
+    (list) (language, variant, [PrecompiledTemplate]) of each variant.
+  Raises:
+    ValueError: If a language is not known.
+  """
+  compiled = []
+  seen_dirs = set()
+  for language in languages or sorted(targets.Languages()):
+    variations = targets.VariationsForLanguage(language)
+    if variations is None:
+      raise ValueError('Unknown language: %s' % language)
+    for variant in sorted(variations):
+      if variants and variant not in variants:
+        continue
+      template_dir = variations.AbsoluteTemplateDir(variant)
+      if template_dir in seen_dirs:
+        continue
+      seen_dirs.add(template_dir)
+      compiled.append((language, variant,
+                       variations.PrecompileTemplates(variant)))
+  return compiled
+
+
+def main(unused_argv):
+  targets = Targets()
+  try:
+    compiled = PrecompileVariations(targets, languages=FLAGS.languages,
+                                    variants=FLAGS.variants)
+  except ValueError as e:
+    raise app.UsageError(str(e))
+
+  errors = 0
+  report = []
+  for language, variant, results in compiled:
+    seconds = sum(result.seconds for result in results)
+    print '%s/%s: %d templates, %.3fs' % (language, variant, len(results),
+                                           seconds)
+    for result in results:
+      path = os.path.relpath(result.path, targets.template_root)
+      print '  %8.4fs  %s%s' % (result.seconds, path,
+                                '\n    %s' % result.error if result.error
+                                else '')
+      errors += bool(result.error)
+      report.append({'language': language, 'variant': variant,
+                     'path': path, 'seconds': result.seconds,
+                     'error': result.error})
+  if FLAGS.report_json:
+    with open(FLAGS.report_json, 'w') as f:
+      json.dump(report, f, indent=1, sort_keys=True)
+  if errors:
+    sys.stderr.write('%d templates did not compile\n' % errors)
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  app.run()
@@ -0,0 +1,58 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for precompile_templates.py."""
+
+from google.apputils import basetest
+
+from googleapis.codegen import precompile_templates
+from googleapis.codegen import template_helpers
+from googleapis.codegen.targets import Targets
+
+
+class PrecompileTemplatesTest(basetest.TestCase):
+
+  def setUp(self):
+    self._loader = template_helpers.GetTemplateLoader()
+    self._loader.Clear()
+
+  def testPrecompileVariation(self):
+    before = self._loader.Stats()
+    compiled = precompile_templates.PrecompileVariations(
+        Targets(), languages=['java'], variants=['default'])
+    self.assertEquals(1, len(compiled))
+    language, variant, results = compiled[0]
+    self.assertEquals(('java', 'default'), (language, variant))
+    self.assertTrue(results)
+    self.assertEquals([], [r.path for r in results if r.error])
+    stats = self._loader.Stats()
+    self.assertEquals(len(results), stats['entries'])
+    self.assertEquals(len(results), stats['misses'] - before['misses'])
+    self.assertEquals(before['hits'], stats['hits'])
+    # Rendering finds the templates compiled.
+    template_dir = Targets().VariationsForLanguage('java').AbsoluteTemplateDir(
+        'default')
+    for result in results:
+      self._loader.GetTemplate(result.path, template_dir)
+    self.assertEquals(len(results),
+                      self._loader.Stats()['hits'] - stats['hits'])
+
+  def testUnknownLanguage(self):
+    self.assertRaises(ValueError, precompile_templates.PrecompileVariations,
+                      Targets(), languages=['cobol'])
+
+
+if __name__ == '__main__':
+  basetest.main()
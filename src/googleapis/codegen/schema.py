@@ -34,6 +34,43 @@ _ADDITIONAL_PROPERTIES = 'additionalProperties'
 _LOGGER = logging.getLogger('codegen')
 
 
+class BuildResult(object):
+  """The final value yielded by a builder. See RunBuilder."""
+
+  __slots__ = ('value',)
+
+  def __init__(self, value):
+    self.value = value
+
+
+def RunBuilder(builder):
+  """Run a data type builder to completion using an explicit work stack.
+
+  Data types nest as deeply as the discovery document does. Rather than
+  recursing once per level, which overflows the Python stack on deeply nested
+  schemas, the construction code is written as builders: generators which
+  yield another builder when they need a nested data type, receive the result
+  of that builder back from the yield, and finally yield a BuildResult.
+
+  Args:
+    builder: (generator) The top level builder.
+  Returns:
+    The value of the BuildResult yielded by builder.
+  """
+  stack = [builder]
+  value = None
+  while True:
+    step = stack[-1].send(value)
+    if isinstance(step, BuildResult):
+      stack.pop()
+      value = step.value
+      if not stack:
+        return value
+    else:
+      stack.append(step)
+      value = None
+
+
 class Schema(data_types.ComplexDataType):
   """The definition of a schema."""
 
@@ -91,6 +128,29 @@ class Schema(data_types.ComplexDataType):
     Raises:
       ApiException: If the definition dict is not correct.
     """
+    return RunBuilder(cls.CreateBuilder(api, default_name, def_dict,
+                                        wire_name, parent))
+
+  @classmethod
+  def CreateBuilder(cls, api, default_name, def_dict, wire_name, parent=None,
+                    parent_path=None):
+    """Returns a builder which does the work of Create.
+
+    See RunBuilder for how builders are run.
+
+    Args:
+      api: (Api) the Api instance owning the Schema
+      default_name: (str) the default name of the Schema.
+      def_dict: (dict) a discovery dictionary
+      wire_name: The name which will identify objects of this type in data on
+        the wire.
+      parent: (Schema) The containing schema.
+      parent_path: (str) The path key (see Api.SchemaPath) of parent, if the
+        caller knows it.
+
+    Yields:
+      Nested builders, then a BuildResult of a Schema or DataType.
+    """
 
     schema_id = def_dict.get('id')
     if schema_id:
@@ -146,8 +206,10 @@ class Schema(data_types.ComplexDataType):
         # Look for variants
         variant = def_dict.get('variant')
         if variant:
-          return cls._CreateVariantType(variant, api, name,
-                                        def_dict, wire_name, parent)
+          schema = yield cls._CreateVariantType(variant, api, name, def_dict,
+                                                wire_name, parent, parent_path)
+          yield BuildResult(schema)
+          return
 
         # Look for full object definition.  You can have properties or
         # additionalProperties, but it does not  do anything useful to have
@@ -157,27 +219,37 @@ class Schema(data_types.ComplexDataType):
         props = def_dict.get('properties')
         if props:
           # This case 1 from above
-          return cls._CreateObjectWithProperties(props, api, name,
-                                                 def_dict, wire_name, parent)
+          schema = yield cls._CreateObjectWithProperties(
+              props, api, name, def_dict, wire_name, parent, parent_path)
+          yield BuildResult(schema)
+          return
 
         # Look for case 2
         additional_props = def_dict.get(_ADDITIONAL_PROPERTIES)
         if additional_props:
-          return cls._CreateMapType(additional_props, api, name, wire_name,
-                                    class_name, parent)
+          schema = yield cls._CreateMapType(additional_props, api, name,
+                                            wire_name, class_name, parent,
+                                            parent_path)
+          yield BuildResult(schema)
+          return
 
         # no properties
-        return cls._CreateSchemaWithoutProperties(api, name, def_dict,
-                                                  wire_name, parent)
+        yield BuildResult(cls._CreateSchemaWithoutProperties(
+            api, name, def_dict, wire_name, parent))
+        return
 
       elif json_type == 'array':
         # Case 3: Look for array definition
-        return cls._CreateArrayType(api, def_dict, wire_name, class_name,
-                                    schema_id, parent)
+        schema = yield cls._CreateArrayType(api, def_dict, wire_name,
+                                            class_name, schema_id, parent,
+                                            parent_path)
+        yield BuildResult(schema)
+        return
       else:
         # Case 4: This must be a basic type.  Create a DataType for it.
-        return data_types.CreatePrimitiveDataType(def_dict, api, wire_name,
-                                                  parent=parent)
+        yield BuildResult(data_types.CreatePrimitiveDataType(
+            def_dict, api, wire_name, parent=parent))
+        return
 
     referenced_schema = def_dict.get('$ref')
     if referenced_schema:
@@ -203,22 +275,33 @@ class Schema(data_types.ComplexDataType):
       if schema:
         _LOGGER.debug('Schema.Create: %s => %s',
                       default_name, schema.values.get('wireName', '<unknown>'))
-        return schema
-      return data_types.SchemaReference(referenced_schema, api)
+        yield BuildResult(schema)
+        return
+      yield BuildResult(data_types.SchemaReference(referenced_schema, api))
+      return
 
     raise ApiException('Cannot decode JSON Schema for: %s' % def_dict)
 
   @classmethod
   def _CreateObjectWithProperties(cls, props, api, name, def_dict,
-                                  wire_name, parent):
+                                  wire_name, parent, parent_path):
     properties = []
     schema = cls(api, name, def_dict, parent=parent)
     if wire_name:
       schema.SetTemplateValue('wireName', wire_name)
+    schema_path = api.SchemaPath(schema, parent_path)
     for prop_name in sorted(props):
       prop_dict = props[prop_name]
       _LOGGER.debug('  adding prop: %s to %s', prop_name, name)
-      properties.append(Property(api, schema, prop_name, prop_dict))
+      # If the schema value for this property defines a new object directly,
+      # rather than refering to another schema, we will have to create a class
+      # name for it.   We create a unique name by prepending the schema we are
+      # in to the object name.
+      data_type = yield api.DataTypeBuilder(
+          prop_dict, api.NestedClassNameForProperty(prop_name, schema),
+          parent=schema, wire_name=prop_name, parent_path=schema_path)
+      properties.append(Property(api, schema, prop_name, prop_dict,
+                                 data_type=data_type))
       # Some APIs express etag directly in the response, others don't.
       # Knowing that we have it explicitly makes special case code generation
       # easier
@@ -237,11 +320,11 @@ class Schema(data_types.ComplexDataType):
             ' %s conflicts with another property' % (name, wire_name))
       names.add(no_at_sign)
 
-    return schema
+    yield BuildResult(schema)
 
   @classmethod
   def _CreateVariantType(cls, variant, api, name, def_dict,
-                         wire_name, parent):
+                         wire_name, parent, parent_path):
     """Creates a variant type."""
     variants = collections.OrderedDict()
     schema = cls(api, name, def_dict, parent=parent)
@@ -253,7 +336,9 @@ class Schema(data_types.ComplexDataType):
     # variant info on the api.
     for variant_entry in variant['map']:
       discriminant_value = variant_entry['type_value']
-      variant_schema = api.DataTypeFromJson(variant_entry, name, parent=parent)
+      variant_schema = yield api.DataTypeBuilder(variant_entry, name,
+                                                 parent=parent,
+                                                 parent_path=parent_path)
       variants[discriminant_value] = variant_schema
       # Set variant info. We get the original wire name from the JSON properties
       # via '$ref' it is not currently accessible via variant_schema.
@@ -265,11 +350,11 @@ class Schema(data_types.ComplexDataType):
     schema.SetTemplateValue('is_variant_base', True)
     schema.SetTemplateValue('discriminant', prop)
     schema.SetTemplateValue('properties', [prop])
-    return schema
+    yield BuildResult(schema)
 
   @classmethod
   def _CreateMapType(cls, additional_props, api, name, wire_name,
-                     class_name, parent):
+                     class_name, parent, parent_path):
     _LOGGER.debug('Have only additionalProps for %s, dict=%s',
                   name, additional_props)
     # TODO(user): Remove this hack at the next large breaking change
@@ -290,15 +375,15 @@ class Schema(data_types.ComplexDataType):
     else:
       base_wire_name = None
 
-    base_type = api.DataTypeFromJson(
+    base_type = yield api.DataTypeBuilder(
         additional_props, subtype_name, parent=parent,
-        wire_name=base_wire_name)
+        wire_name=base_wire_name, parent_path=parent_path)
     map_type = data_types.MapDataType(name, base_type, parent=parent,
                                       wire_name=wire_name)
     map_type.SetTemplateValue('className', class_name)
     _LOGGER.debug('  %s is MapOf<string, %s>',
                   class_name, base_type.class_name)
-    return map_type
+    yield BuildResult(map_type)
 
   @classmethod
   def _CreateSchemaWithoutProperties(cls, api, name, def_dict, wire_name,
@@ -321,7 +406,7 @@ class Schema(data_types.ComplexDataType):
 
   @classmethod
   def _CreateArrayType(cls, api, def_dict, wire_name,
-                       class_name, schema_id, parent):
+                       class_name, schema_id, parent, parent_path):
     items = def_dict.get('items')
     if not items:
       raise ApiException('array without items in: %s' % def_dict)
@@ -332,15 +417,49 @@ class Schema(data_types.ComplexDataType):
     if schema_id:
       _LOGGER.debug('Top level schema %s is an array', class_name)
       tentative_class_name += 'Items'
-    base_type = api.DataTypeFromJson(items, tentative_class_name,
-                                     parent=parent, wire_name=wire_name)
+    base_type = yield api.DataTypeBuilder(items, tentative_class_name,
+                                          parent=parent, wire_name=wire_name,
+                                          parent_path=parent_path)
     _LOGGER.debug('  %s is ArrayOf<%s>', class_name, base_type.class_name)
     array_type = data_types.ArrayDataType(tentative_class_name, base_type,
                                           wire_name=wire_name,
                                           parent=parent)
     if schema_id:
       array_type.SetTemplateValue('className', schema_id)
-    return array_type
+    yield BuildResult(array_type)
+
+  def SetTemplateValue(self, name, value, meaning=None):
+    """Adds a name/value pair to the template.
+
+    Overridden so that the index of properties by wire name is rebuilt
+    whenever the property list is replaced.
+
+    Args:
+      name: (str) name of the value.
+      value: (object) the value.
+      meaning: (str) description of the value.
+    """
+    super(Schema, self).SetTemplateValue(name, value, meaning=meaning)
+    if name == 'properties':
+      self._properties_by_wire_name = dict(
+          (p.values['wireName'], p) for p in value or [])
+
+  def DeleteTemplateValue(self, name):
+    """Delete a value from the object, keeping the property index in sync."""
+    super(Schema, self).DeleteTemplateValue(name)
+    if name == 'properties':
+      self._properties_by_wire_name = {}
+
+  def PropertyByWireName(self, wire_name):
+    """Find a property of this schema by its wire name.
+
+    Args:
+      wire_name: (str) the wireName of the property.
+
+    Returns:
+      Property or None if not found.
+    """
+    return self._properties_by_wire_name.get(wire_name)
 
   @property
   def class_name(self):
@@ -402,7 +521,8 @@ class Property(template_objects.CodeObject):
       "id": {"type": "string"}
   """
 
-  def __init__(self, api, schema, name, def_dict, key_for_variants=None):
+  def __init__(self, api, schema, name, def_dict, key_for_variants=None,
+               data_type=None):
     """Construct a Property.
 
     A Property requires several elements in its template value dictionary which
@@ -417,6 +537,8 @@ class Property(template_objects.CodeObject):
       def_dict: (dict) the JSON schema dictionary
       key_for_variants: (dict) if given, maps discriminator values to
                         variant schemas.
+      data_type: (DataType) the data type of this Property, if it has already
+        been built from def_dict.
 
     Raises:
       ApiException: If we have an array type without object definitions.
@@ -433,13 +555,15 @@ class Property(template_objects.CodeObject):
         self.schema.values['isList'] = True
     except KeyError:
       pass
-    # If the schema value for this property defines a new object directly,
-    # rather than refering to another schema, we will have to create a class
-    # name for it.   We create a unique name by prepending the schema we are
-    # in to the object name.
-    tentative_class_name = api.NestedClassNameForProperty(name, schema)
-    self._data_type = api.DataTypeFromJson(def_dict, tentative_class_name,
-                                           parent=schema, wire_name=name)
+    if data_type is None:
+      # If the schema value for this property defines a new object directly,
+      # rather than refering to another schema, we will have to create a class
+      # name for it.   We create a unique name by prepending the schema we are
+      # in to the object name.
+      tentative_class_name = api.NestedClassNameForProperty(name, schema)
+      data_type = api.DataTypeFromJson(def_dict, tentative_class_name,
+                                       parent=schema, wire_name=name)
+    self._data_type = data_type
 
   @property
   def code_type(self):
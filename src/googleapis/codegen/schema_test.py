@@ -83,6 +83,39 @@ class SchemaTest(basetest.TestCase):
     prop = prop[0]
     self.assertEquals('Array[Array[string]]', prop.codeType)
 
+  def testPropertyByWireName(self):
+    api = MakeApiWithSchemas({
+        'Thing': {
+            'id': 'Thing',
+            'type': 'object',
+            'properties': {
+                'kind': {'type': 'string'},
+                'etag': {'type': 'string'},
+                }
+            }
+        })
+    schema = api.SchemaByName('Thing')
+    kind = schema.PropertyByWireName('kind')
+    self.assertEquals('kind', kind.values['wireName'])
+    self.assertIsNone(schema.PropertyByWireName('missing'))
+    schema.SetTemplateValue('properties', [schema.PropertyByWireName('etag')])
+    self.assertIsNone(schema.PropertyByWireName('kind'))
+    self.assertEquals(['etag'],
+                      [p.values['wireName'] for p in schema.properties])
+
+  def testDeeplyNestedSchema(self):
+    depth = 2000
+    inner = {'type': 'string'}
+    for i in range(1, depth):
+      inner = {'type': 'object', 'properties': {'p%d' % i: inner}}
+    inner['id'] = 'Outer'
+    api = MakeApiWithSchemas({'Outer': inner})
+    path = ['Outer'] + ['p%d' % i for i in range(depth - 1, 1, -1)]
+    innermost = api.SchemaByName('.'.join(path))
+    self.assertTrue(innermost)
+    self.assertEquals(depth - 2, len(innermost.ancestors))
+    self.assertEquals(api.SchemaByName('Outer'), innermost.FindTopParent())
+
   def testDetectInvalidSchema(self):
     bad_discovery = {
         'name': 'fake',
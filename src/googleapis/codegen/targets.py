@@ -167,6 +167,26 @@ class Variations(dict):
     return os.path.join(self._targets.template_root,
                         self._RelativeTemplateDir(variation))
 
+  def PrecompileTemplates(self, variation):
+    """Compile the templates of a variation into the shared template cache.
+
+    Later generations for the variation find its templates compiled, and
+    templates with syntax errors are found without having to render them.
+
+    Args:
+      variation: (str) A target variation name.
+    Returns:
+      (list) A template_helpers.PrecompiledTemplate for each template.
+    """
+    # Most users of Targets never compile a template, so Django is only
+    # loaded here.
+    # pylint:disable=g-import-not-at-top
+    from googleapis.codegen import django_helpers
+    from googleapis.codegen import template_helpers
+    django_helpers.SetupDjango()
+    return template_helpers.GetTemplateLoader().Precompile(
+        self.AbsoluteTemplateDir(variation))
+
   def GetFeaturesForReleaseVersion(self, release_version):
     for name in self:
       features = self.GetFeatures(name)
@@ -4,9 +4,12 @@
 __author__ = 'jcgregorio@google.com (Joe Gregorio)'
 
 import os
+import shutil
+import tempfile
 
 from google.apputils import basetest
 from googleapis.codegen import targets
+from googleapis.codegen import template_helpers
 
 
 class BaseTargetsTest(basetest.TestCase):
@@ -35,6 +38,38 @@ class TargetsTest(BaseTargetsTest):
     self.assertTrue('cmd-line' in self.targets.Platforms())
 
 
+class PrecompileTemplatesTest(basetest.TestCase):
+
+  def setUp(self):
+    self._template_root = tempfile.mkdtemp()
+    self.targets = targets.Targets(
+        template_root=self._template_root,
+        targets_dict={'languages': {'java': {'variations': {'default': {}}}}})
+
+  def tearDown(self):
+    shutil.rmtree(self._template_root)
+
+  def _Write(self, path, content):
+    path = os.path.join(self._template_root, 'java', 'default', path)
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+      f.write(content)
+    return path
+
+  def testPrecompileTemplates(self):
+    good = self._Write('templates/good.tmpl', '{{ x }}')
+    bad = self._Write('templates/_bad.tmpl', '{% if %}')
+    self._Write('templates/notes.txt', '{% if %}')
+    results = self.targets.VariationsForLanguage('java').PrecompileTemplates(
+        'default')
+    self.assertEquals([bad, good], [r.path for r in results])
+    self.assertIn('TemplateSyntaxError', results[0].error)
+    self.assertIsNone(results[1].error)
+    self.assertLessEqual(0, results[1].seconds)
+    self.assertIn(good, template_helpers.GetTemplateLoader()._cache)
+
+
 class FeaturesLoadingTest(BaseTargetsTest):
 
   def testGetFeatures(self):
@@ -20,6 +20,7 @@ These are Django template filters for reformatting blocks of code.
 
 __author__ = 'aiuto@google.com (Tony Aiuto)'
 
+import collections
 import contextlib
 import hashlib
 import logging
@@ -28,10 +29,13 @@ import re
 import string
 import textwrap
 import threading
+import time
 
 
 import django.template as django_template  # pylint: disable=g-bad-import-order
 
+from googleapis.codegen import generation_events
+from googleapis.codegen import template_profiler
 from googleapis.codegen import utilities
 from googleapis.codegen.filesys import files
 
@@ -223,10 +227,13 @@ _language_defaults = {
 
 _TEMPLATE_GLOBALS = threading.local()
 _TEMPLATE_GLOBALS.current_context = None
+_TEMPLATE_GLOBALS.templates_read = None
+_TEMPLATE_GLOBALS.cache_observers = None
 
 
 def GetCurrentContext():
-  return _TEMPLATE_GLOBALS.current_context
+  # Only set on the thread which imported this module until it renders.
+  return getattr(_TEMPLATE_GLOBALS, 'current_context', None)
 
 
 @contextlib.contextmanager
@@ -238,6 +245,41 @@ def SetCurrentContext(ctxt):
     _TEMPLATE_GLOBALS.current_context = None
 
 
+@contextlib.contextmanager
+def TrackTemplateReads(templates_read):
+  """Record the paths of the templates loaded on this thread in a set."""
+  previous = getattr(_TEMPLATE_GLOBALS, 'templates_read', None)
+  _TEMPLATE_GLOBALS.templates_read = templates_read
+  try:
+    yield templates_read
+  finally:
+    _TEMPLATE_GLOBALS.templates_read = previous
+
+
+@contextlib.contextmanager
+def ObserveTemplateCache(observers):
+  """Hand the template cache events of this thread to observers.
+
+  Args:
+    observers: (list) The generation_events.GenerationObservers.
+  Yields:
+    Nothing.
+  """
+  previous = getattr(_TEMPLATE_GLOBALS, 'cache_observers', None)
+  _TEMPLATE_GLOBALS.cache_observers = observers
+  try:
+    yield
+  finally:
+    _TEMPLATE_GLOBALS.cache_observers = previous
+
+
+def _EmitCacheEvent(phase, template_path, **details):
+  observers = getattr(_TEMPLATE_GLOBALS, 'cache_observers', None)
+  if observers:
+    generation_events.Emit(observers, 'template_cache', phase, template_path,
+                           **details)
+
+
 def _GetCurrentLanguage(ctxt=None, default=None):
   if ctxt is None:
     ctxt = GetCurrentContext() or {}
@@ -253,14 +295,57 @@ def _GetCurrentLanguage(ctxt=None, default=None):
 
 
 class CachingTemplateLoader(object):
-  """A template loader that caches templates under stable directories."""
+  """A template loader that caches compiled templates.
+
+  Templates under unstable variations, which are edited in place, are
+  checked against the modification time and size of their file on every
+  use, and compiled again when either has changed. Setting NOCACHE in the
+  environment turns the cache off.
+
+  The cache may be bounded by a number of templates, by the estimated memory
+  they use, or both. When it is full the least recently used templates are
+  evicted. A compiled template is estimated to use as much memory as the size
+  of its source.
+  """
 
   # A pattern that variation directories will match if they are development
-  # versions that should not be cached.   E.g., "java/dev/" or "java/1.0dev"
+  # versions whose templates may change.   E.g., "java/dev/" or "java/1.0dev"
   UNSTABLE_VARIATION_PATTERN = re.compile(r'^[^/]+/[^/]*dev/')
 
-  def __init__(self):
-    self._cache = {}
+  def __init__(self, max_entries=None, max_bytes=None):
+    """Construct a CachingTemplateLoader.
+
+    Args:
+      max_entries: (int) The most templates to keep, or None for no limit.
+      max_bytes: (int) The most estimated bytes of templates to keep, or None
+        for no limit.
+    """
+    self._lock = threading.Lock()
+    # template_path -> (template, estimated bytes, file stamp or None), least
+    # recently used first
+    self._cache = collections.OrderedDict()
+    self._max_entries = max_entries
+    self._max_bytes = max_bytes
+    self._bytes = 0
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+    self._invalidations = 0
+
+  def SetLimits(self, max_entries=None, max_bytes=None):
+    """Change the bounds of the cache, evicting templates to meet them.
+
+    Args:
+      max_entries: (int) The most templates to keep, or None for no limit.
+      max_bytes: (int) The most estimated bytes of templates to keep, or None
+        for no limit.
+    """
+    with self._lock:
+      self._max_entries = max_entries
+      self._max_bytes = max_bytes
+      evicted = self._Evict()
+    for path in evicted:
+      _EmitCacheEvent(generation_events.EVICT, path)
 
   def GetTemplate(self, template_path, template_dir):
     """Get a compiled django template.
@@ -271,30 +356,139 @@ class CachingTemplateLoader(object):
     Returns:
       A compiled django template.
     """
+    templates_read = getattr(_TEMPLATE_GLOBALS, 'templates_read', None)
+    if templates_read is not None:
+      templates_read.add(template_path)
     relpath = os.path.relpath(template_path, template_dir)
-    if (self.UNSTABLE_VARIATION_PATTERN.match(relpath) or
-        os.environ.get('NOCACHE')):
-      # don't cache if specifically requested (for testing) or
-      # for unstable variations
-      return self._LoadTemplate(template_path)
-
-    template = self._cache.get(template_path)
-    if not template:
-      try:
-        template = self._LoadTemplate(template_path)
-        self._cache[template_path] = template
-      except django_template.TemplateSyntaxError as err:
-        raise django_template.TemplateSyntaxError('%s: %s' % (relpath, err))
+    if os.environ.get('NOCACHE'):
+      # don't cache if specifically requested (for testing)
+      return self._LoadTemplate(template_path)[0]
+    stamp = None
+    if self.UNSTABLE_VARIATION_PATTERN.match(relpath):
+      # unstable variations are edited in place, so check the file each time
+      stamp = _FileStamp(template_path)
+
+    with self._lock:
+      entry = self._cache.pop(template_path, None)
+      hit = entry and (stamp is None or entry[2] == stamp)
+      if hit:
+        self._cache[template_path] = entry
+        self._hits += 1
+      else:
+        if entry:
+          self._bytes -= entry[1]
+          self._invalidations += 1
+        self._misses += 1
+    # Observers are called outside of the lock, they may be slow.
+    if hit:
+      _EmitCacheEvent(generation_events.HIT, template_path)
+      return entry[0]
+    _EmitCacheEvent(generation_events.MISS, template_path, stale=bool(entry))
+    try:
+      template, size = self._LoadTemplate(template_path)
+    except django_template.TemplateSyntaxError as err:
+      raise django_template.TemplateSyntaxError('%s: %s' % (relpath, err))
+    with self._lock:
+      previous = self._cache.pop(template_path, None)
+      if previous:
+        self._bytes -= previous[1]
+      self._cache[template_path] = (template, size, stamp)
+      self._bytes += size
+      evicted = self._Evict()
+    for path in evicted:
+      _EmitCacheEvent(generation_events.EVICT, path)
     return template
 
+  def Precompile(self, template_dir):
+    """Compile every template under a directory into the cache.
+
+    Django must be set up first, with django_helpers.SetupDjango.
+
+    Args:
+      template_dir: (str) The directory to walk.
+    Returns:
+      (list) A PrecompiledTemplate for each template, in path order.
+    """
+    template_dir = os.path.normpath(template_dir)
+    results = []
+    for path in sorted(files.IterFiles(template_dir)):
+      if not path.endswith('.tmpl'):
+        continue
+      start = time.time()
+      error = None
+      try:
+        self.GetTemplate(path, template_dir)
+      except Exception as e:  # pylint: disable=broad-except
+        error = '%s: %s' % (type(e).__name__, e)
+      results.append(PrecompiledTemplate(path, time.time() - start, error))
+    return results
+
+  def _Evict(self):
+    """Drop the least recently used templates until the cache is in bounds.
+
+    Returns:
+      (list) The paths of the dropped templates.
+    """
+    evicted = []
+    while self._cache and (
+        (self._max_entries is not None and
+         len(self._cache) > self._max_entries) or
+        (self._max_bytes is not None and self._bytes > self._max_bytes)):
+      path, entry = self._cache.popitem(last=False)
+      self._bytes -= entry[1]
+      self._evictions += 1
+      evicted.append(path)
+    return evicted
+
+  def Stats(self):
+    """Returns the counts of the cache, as a dict."""
+    with self._lock:
+      return {
+          'entries': len(self._cache),
+          'bytes': self._bytes,
+          'max_entries': self._max_entries,
+          'max_bytes': self._max_bytes,
+          'hits': self._hits,
+          'misses': self._misses,
+          'evictions': self._evictions,
+          'invalidations': self._invalidations,
+      }
+
+  def Clear(self):
+    """Drop every cached template. The counts are kept."""
+    with self._lock:
+      self._cache.clear()
+      self._bytes = 0
+
   def _LoadTemplate(self, template_path):
-    source = files.GetFileContents(template_path).decode('utf-8')
-    return django_template.Template(source)
+    """Returns a compiled template, and the estimated bytes it uses."""
+    source = files.GetFileContents(template_path)
+    return django_template.Template(source.decode('utf-8')), len(source)
+
+
+# The outcome of compiling one template ahead of use; error is None if it
+# compiled.
+PrecompiledTemplate = collections.namedtuple('PrecompiledTemplate',
+                                             ['path', 'seconds', 'error'])
+
+
+def _FileStamp(path):
+  """Returns what identifies a version of a file: its mtime and size."""
+  try:
+    stat = os.stat(path)
+  except OSError:
+    return ()  # matches no cached version, so loading reports the error
+  return stat.st_mtime, stat.st_size
 
 
 _TEMPLATE_LOADER = CachingTemplateLoader()
 
 
+def GetTemplateLoader():
+  """Returns the CachingTemplateLoader shared by every generator."""
+  return _TEMPLATE_LOADER
+
+
 def _RenderToString(template_path, context):
   """Renders a template specified by a file path with a give values dict.
 
@@ -310,9 +504,19 @@ def _RenderToString(template_path, context):
   """
   # FRAGILE: this relies on template_dir being passed in to the
   # context (in generator.py)
-  t = _TEMPLATE_LOADER.GetTemplate(template_path,
-                                   context.get('template_dir', ''))
-  return t.render(context)
+  template_dir = context.get('template_dir', '')
+  profiler = template_profiler.Current()
+  if profiler:
+    return profiler.Profile(template_profiler.TemplateName(template_path,
+                                                          template_dir),
+                            _LoadAndRender, template_path, template_dir,
+                            context)
+  return _LoadAndRender(template_path, template_dir, context)
+
+
+def _LoadAndRender(template_path, template_dir, context):
+  return _TEMPLATE_LOADER.GetTemplate(template_path,
+                                      template_dir).render(context)
 
 
 def _GetFromContext(context, *variables):
@@ -611,7 +815,10 @@ class LanguageNode(django_template.Node):
     context[_LANGUAGE] = self._language
     per_language_defaults = _language_defaults.get(self._language)
     if per_language_defaults:
-      context.update(per_language_defaults)
+      # Push a copy: the values set in the context below, and the noblank
+      # stack, go into the dict on top, which must not be shared between
+      # renders.
+      context.update(dict(per_language_defaults))
     context[_CURRENT_INDENT] = 0
     context[_CURRENT_LEVEL] = 0
     return ''
@@ -1556,7 +1763,12 @@ class WriteNode(django_template.Node):
       ValueError: If the file writer method can not be found.
     """
     path = django_template.resolve_variable(self._path_variable, context)
-    content = self._nodelist.render(context)
+    profiler = template_profiler.Current()
+    if profiler:
+      content = profiler.Profile('%s:write' % profiler.CurrentName(),
+                                 self._nodelist.render, context)
+    else:
+      content = self._nodelist.render(context)
     file_writer = _GetFromContext(context, FILE_WRITER)
     if not file_writer:
       raise ValueError('"write" called in a context where "%s" is not defined.',
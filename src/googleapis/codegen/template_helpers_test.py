@@ -20,6 +20,8 @@ __author__ = 'aiuto@google.com (Tony Aiuto)'
 
 import hashlib
 import os
+import shutil
+import tempfile
 import textwrap
 
 from google.apputils import basetest
@@ -33,6 +35,10 @@ class TemplateHelpersTest(basetest.TestCase):
 
   _TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
 
+  def setUp(self):
+    super(TemplateHelpersTest, self).setUp()
+    django_helpers.SetupDjango()
+
   def testExtractCommentPrefix(self):
     self.assertEquals('   *',
                       template_helpers._ExtractCommentPrefix('   * hello'))
@@ -127,6 +133,14 @@ class TemplateHelpersTest(basetest.TestCase):
     self.assertEquals('a\nb', template_helpers.noblanklines('a\nb'))
     self.assertEquals('a\nb', template_helpers.noblanklines('a\nb\n\n'))
     self.assertEquals('a\nb', template_helpers.noblanklines('\na\n\nb\n'))
+    self.assertEquals(u'a\nb', template_helpers.noblanklines(u'a\n \u3000\nb'))
+
+  def testCollapseBlanklines(self):
+    self.assertEquals('a\n\nb',
+                      template_helpers.collapse_blanklines('a\n\n\n\nb'))
+    self.assertEquals('\na\n  \nb\n',
+                      template_helpers.collapse_blanklines(
+                          '\n\na\n  \n\t\nb\n\n'))
 
   def _GetContext(self, data=None):
     return django_template.Context(data or {})
@@ -588,7 +602,102 @@ class TemplateHelpersTest(basetest.TestCase):
     loader.GetTemplate(test_path, template_dir)
     loader.GetTemplate(stable_path, template_dir)
     self.assertTrue(stable_path in loader._cache)
-    self.assertFalse(test_path in loader._cache)
+    self.assertTrue(test_path in loader._cache)
+    self.assertIsNone(loader._cache[stable_path][2])
+    self.assertIsNotNone(loader._cache[test_path][2])
+
+  def testCacheDisabledByEnvironment(self):
+    loader = template_helpers.CachingTemplateLoader()
+    template_dir = os.path.join(self._TEST_DATA_DIR, 'templates')
+    stable_path = os.path.join(template_dir, 'java/1.0/test.tmpl')
+    os.environ['NOCACHE'] = '1'
+    try:
+      loader.GetTemplate(stable_path, template_dir)
+    finally:
+      del os.environ['NOCACHE']
+    self.assertFalse(stable_path in loader._cache)
+
+  def testCacheReloadsChangedUnstableTemplates(self):
+    template_dir = tempfile.mkdtemp()
+    try:
+      os.makedirs(os.path.join(template_dir, 'java', 'dev'))
+      path = os.path.join(template_dir, 'java', 'dev', 't.tmpl')
+      context = self._GetContext()
+
+      def Write(text, mtime):
+        with open(path, 'w') as f:
+          f.write(text)
+        os.utime(path, (mtime, mtime))
+
+      loader = template_helpers.CachingTemplateLoader()
+      Write('one', 1000)
+      first = loader.GetTemplate(path, template_dir)
+      self.assertIs(first, loader.GetTemplate(path, template_dir))
+      # Same size, later mtime.
+      Write('two', 2000)
+      self.assertEquals('two',
+                        loader.GetTemplate(path, template_dir).render(context))
+      # Same mtime, different size.
+      Write('three', 2000)
+      self.assertEquals('three',
+                        loader.GetTemplate(path, template_dir).render(context))
+      stats = loader.Stats()
+      self.assertEquals(1, stats['hits'])
+      self.assertEquals(3, stats['misses'])
+      self.assertEquals(2, stats['invalidations'])
+      self.assertEquals(1, stats['entries'])
+      self.assertEquals(5, stats['bytes'])
+    finally:
+      shutil.rmtree(template_dir)
+
+  def _WriteTemplates(self, template_dir, sizes):
+    paths = []
+    os.makedirs(os.path.join(template_dir, 'java', '1.0'))
+    for i, size in enumerate(sizes):
+      path = os.path.join(template_dir, 'java', '1.0', 't%d.tmpl' % i)
+      with open(path, 'w') as f:
+        f.write('x' * size)
+      paths.append(path)
+    return paths
+
+  def testCacheEvictsLeastRecentlyUsed(self):
+    template_dir = tempfile.mkdtemp()
+    try:
+      a, b, c = self._WriteTemplates(template_dir, [10, 10, 10])
+      loader = template_helpers.CachingTemplateLoader(max_entries=2)
+      first = loader.GetTemplate(a, template_dir)
+      loader.GetTemplate(b, template_dir)
+      self.assertIs(first, loader.GetTemplate(a, template_dir))
+      loader.GetTemplate(c, template_dir)
+      self.assertEquals([a, c], list(loader._cache))
+      self.assertEquals({'entries': 2, 'bytes': 20, 'max_entries': 2,
+                         'max_bytes': None, 'hits': 1, 'misses': 3,
+                         'evictions': 1, 'invalidations': 0},
+                        loader.Stats())
+      loader.Clear()
+      self.assertEquals(0, loader.Stats()['entries'])
+      self.assertEquals(0, loader.Stats()['bytes'])
+      self.assertIsNot(first, loader.GetTemplate(a, template_dir))
+    finally:
+      shutil.rmtree(template_dir)
+
+  def testCacheBoundedByBytes(self):
+    template_dir = tempfile.mkdtemp()
+    try:
+      a, b, c = self._WriteTemplates(template_dir, [40, 30, 50])
+      loader = template_helpers.CachingTemplateLoader(max_bytes=100)
+      for path in (a, b, c):
+        loader.GetTemplate(path, template_dir)
+      self.assertEquals([b, c], list(loader._cache))
+      self.assertEquals(80, loader.Stats()['bytes'])
+      loader.SetLimits(max_bytes=60)
+      self.assertEquals([c], list(loader._cache))
+      self.assertEquals(2, loader.Stats()['evictions'])
+      # A template larger than the bound is not kept.
+      loader.SetLimits(max_bytes=20)
+      self.assertEquals(0, loader.Stats()['entries'])
+    finally:
+      shutil.rmtree(template_dir)
 
   def testHalt(self):
     # See that it raises the error
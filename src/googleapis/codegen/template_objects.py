@@ -21,13 +21,71 @@ in template expansion.
 
 __author__ = 'aiuto@google.com (Tony Aiuto)'
 
+import contextlib
 import copy
+import threading
 
 from googleapis.codegen import utilities
 from googleapis.codegen.django_helpers import MarkSafe
 from googleapis.codegen.utilities import html_stripper
 from googleapis.codegen.utilities import name_validator
 
+# The reads and writes of template values made on the current thread while
+# dependency tracking is on. See TrackAccess.
+_ACCESS_LOG = threading.local()
+
+# How many threads are tracking accesses. Checked inline before each call to
+# NoteRead or _NoteWrite, so that reads cost nothing extra when no thread is.
+_tracking = 0
+_tracking_lock = threading.Lock()
+
+
+class AccessLog(object):
+  """The template values read and written during a piece of work.
+
+  Each access is recorded as a (UseableInTemplates, name) pair. A name of None
+  means the whole values dictionary was used.
+  """
+
+  def __init__(self):
+    self.reads = {}
+    self.writes = {}
+
+
+@contextlib.contextmanager
+def TrackAccess(access_log):
+  """Record the template value accesses made on this thread in a log.
+
+  Args:
+    access_log: (AccessLog) The log to record into.
+  Yields:
+    access_log
+  """
+  global _tracking
+  previous = getattr(_ACCESS_LOG, 'log', None)
+  _ACCESS_LOG.log = access_log
+  with _tracking_lock:
+    _tracking += 1
+  try:
+    yield access_log
+  finally:
+    with _tracking_lock:
+      _tracking -= 1
+    _ACCESS_LOG.log = previous
+
+
+def NoteRead(obj, name):
+  """Record a read of a template value, if tracking is on."""
+  log = getattr(_ACCESS_LOG, 'log', None)
+  if log is not None:
+    log.reads[(id(obj), name)] = obj
+
+
+def _NoteWrite(obj, name):
+  log = getattr(_ACCESS_LOG, 'log', None)
+  if log is not None:
+    log.writes[(id(obj), name)] = obj
+
 
 class UseableInTemplates(object):
   """Base class for any object usable in templates.
@@ -36,6 +94,8 @@ class UseableInTemplates(object):
   can be referenced from django templates.
   """
 
+  _cached_value_names = frozenset()
+
   def __init__(self, def_dict):
     """Construct a UseableInTemplates object.
 
@@ -47,10 +107,19 @@ class UseableInTemplates(object):
     # simply be a deep copy? Or can we store mutations separately and
     # thus not change the underlying dictionary?
     self._def_dict = dict(def_dict)
-    self._raw_def_dict = dict(copy.deepcopy(def_dict))
+    # The raw copy is made on first use. Deep copying every definition up
+    # front costs time proportional to the depth of nesting for each object,
+    # and recurses as deeply as the discovery document does. Until then this
+    # aliases the discovery document, so the document must not be changed
+    # once the objects are built from it. Nothing in the generators changes
+    # it: they set template values, which go into _def_dict instead.
+    self._source_def_dict = def_dict
+    self._raw_def_dict = None
 
   def __getitem__(self, key):
     """Overrides default __getitem__ to return values from the original dict."""
+    if _tracking:
+      NoteRead(self, key)
     return self._def_dict[key]
 
   def GetTemplateValue(self, name):
@@ -61,30 +130,60 @@ class UseableInTemplates(object):
     Returns:
       object or None if not found.
     """
+    if _tracking:
+      NoteRead(self, name)
     return self._def_dict.get(name, None)
 
   # pylint: disable=unused-argument
   def SetTemplateValue(self, name, value, meaning=None):
     """Adds a name/value pair to the template."""
+    if _tracking:
+      _NoteWrite(self, name)
     self._def_dict[name] = value
     # TODO(user): call something like docmaker.add(
     #    self.__class__.__name__, name, meaning)
 
+  def CacheTemplateValue(self, name, value):
+    """Keep a value computed from other template values, for reuse.
+
+    Unlike SetTemplateValue, this is not recorded as a change to the object,
+    since it adds nothing a template could not compute anyway.
+
+    Args:
+      name: (str) name of the value.
+      value: (object) the value.
+    """
+    self._def_dict[name] = value
+    self._cached_value_names |= frozenset([name])
+
+  @property
+  def cached_value_names(self):
+    """The names of the values stored with CacheTemplateValue."""
+    return self._cached_value_names
+
   def DeleteTemplateValue(self, name):
     """Delete a value from the object."""
+    if _tracking:
+      _NoteWrite(self, name)
     if name in self._def_dict:
       del self._def_dict[name]
 
   @property
   def values(self):
     """Return the underlying name/value pair dictionary."""
+    if _tracking:
+      NoteRead(self, None)
     return self._def_dict
 
   @property
   def raw(self):
+    if self._raw_def_dict is None:
+      self._raw_def_dict = dict(copy.deepcopy(self._source_def_dict))
     return self._raw_def_dict
 
   def get(self, key, default=None):  # pylint:disable=g-bad-name
+    if _tracking:
+      NoteRead(self, key)
     return self._def_dict.get(key, default)
 
 
@@ -212,7 +311,7 @@ class CodeObject(UseableInTemplates):
       if self.language_model:
         code_name = self.language_model.ToMemberName(code_name, self._api)
     code_name = MarkSafe(code_name)
-    self.SetTemplateValue('codeName', code_name)
+    self.CacheTemplateValue('codeName', code_name)
     return code_name
 
   @property
@@ -290,9 +389,13 @@ class CodeObject(UseableInTemplates):
     Returns:
       (list) list of CodeObjects.
     """
-    if self.parent:
-      return self.parent.ancestors + [self.parent]
-    return []
+    ancestors = []
+    parent = self.parent
+    while parent:
+      ancestors.append(parent)
+      parent = parent.parent
+    ancestors.reverse()
+    return ancestors
 
   @property
   def full_path(self):
@@ -301,12 +404,13 @@ class CodeObject(UseableInTemplates):
     Returns:
       (list) list of CodeObjects.
     """
-    return (self.ancestors or []) + [self]
+    return self.ancestors + [self]
 
   def FindTopParent(self):
-    if self.parent:
-      return self.parent.FindTopParent()
-    return self
+    top = self
+    while top.parent:
+      top = top.parent
+    return top
 
   def SetLanguageModel(self, language_model):
     """Changes the language model of this code object."""
@@ -334,11 +438,18 @@ class CodeObject(UseableInTemplates):
     Returns:
       (LanguageModel) A LanguageModel
     """
-    if self._language_model:
-      return self._language_model
-    if self._parent:
-      self._language_model = self._parent.language_model
-    return self._language_model
+    # Walk up iteratively; the tree can be deeper than the recursion limit.
+    # pylint: disable=protected-access
+    unresolved = []
+    node = self
+    while not node._language_model and node._parent:
+      unresolved.append(node)
+      node = node._parent
+    language_model = node._language_model
+    if language_model:
+      for n in unresolved:
+        n._language_model = language_model
+    return language_model
 
   @property
   def codeType(self):  # pylint: disable=g-bad-name
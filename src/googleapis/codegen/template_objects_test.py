@@ -20,6 +20,7 @@ __author__ = 'aiuto@google.com (Tony Aiuto)'
 
 from django import template as django_template  # pylint:disable=g-bad-import-order
 from google.apputils import basetest
+from googleapis.codegen import django_helpers
 from googleapis.codegen import language_model
 from googleapis.codegen import template_objects
 
@@ -28,6 +29,7 @@ class TemplateObjectsTest(basetest.TestCase):
 
   def setUp(self):
     super(TemplateObjectsTest, self).setUp()
+    django_helpers.SetupDjango()
     self.language_model = language_model.LanguageModel(class_name_delimiter='|')
 
   def testFullyQualifiedClassName(self):
@@ -75,6 +77,18 @@ class TemplateObjectsTest(basetest.TestCase):
     baz = template_objects.CodeObject({'className': 'Baz'}, None, parent=bar)
     self.assertEquals(['Foo', 'Bar'], baz.parentPath)
 
+  def testDeepAncestry(self):
+    top = template_objects.CodeObject({'className': 'Top'}, None,
+                                      language_model=self.language_model)
+    node = top
+    for _ in range(5000):
+      node = template_objects.CodeObject({}, None, parent=node)
+    self.assertEquals(5000, len(node.ancestors))
+    self.assertEquals(top, node.ancestors[0])
+    self.assertEquals(node, node.full_path[-1])
+    self.assertEquals(top, node.FindTopParent())
+    self.assertEquals(self.language_model, node.language_model)
+
   def _TestRender(self, source, ctxt, expected):
     t = django_template.Template(source)
     rendered = t.render(django_template.Context(ctxt))
@@ -86,6 +100,20 @@ class TemplateObjectsTest(basetest.TestCase):
     t = '{{o.x}}|{{o.y}}|{{o.z}}'
     self._TestRender(t, {'o': useable}, '1|2|3')
 
+  def testTrackAccess(self):
+    useable = template_objects.UseableInTemplates({'x': 1, 'y': 2})
+    log = template_objects.AccessLog()
+    useable.get('x')
+    self.assertEquals(0, template_objects._tracking)
+    with template_objects.TrackAccess(log):
+      self.assertEquals(1, template_objects._tracking)
+      useable.get('y')
+      useable.SetTemplateValue('z', 3)
+    self.assertEquals(0, template_objects._tracking)
+    useable.get('z')
+    self.assertEquals([(id(useable), 'y')], log.reads.keys())
+    self.assertEquals([(id(useable), 'z')], log.writes.keys())
+
   def testUseableInTemplatesWithAttributes(self):
 
     class SubUseable(template_objects.UseableInTemplates):
@@ -0,0 +1,206 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Profiling of template rendering.
+
+While a TemplateProfiler is active on a thread, every render of a template
+on that thread is recorded under the path of the template, relative to the
+template directory. That covers the templates rendered into files, those
+included with call_template and friends, and the content of each write tag,
+which is recorded as "<template>:write".
+
+For each template the profiler keeps the number of renders, the inclusive
+time (including the templates it called), the exclusive time (its own), and
+the number of characters it produced. A template which calls itself, directly
+or not, only counts the time of its outermost render as inclusive.
+
+generate_library and expand_templates take --profile_templates=<file> to
+profile a run. Elsewhere:
+  profiler = template_profiler.TemplateProfiler()
+  with profiler.Profiling():
+    generator.GeneratePackage(package)
+  print profiler.Report()
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+_ACTIVE = threading.local()
+
+
+def Current():
+  """Returns the profiler active on this thread, or None."""
+  return getattr(_ACTIVE, 'profiler', None)
+
+
+@contextlib.contextmanager
+def ProfileTo(json_path, report_file=None):
+  """Profile the templates rendered in a with block, when asked to.
+
+  Args:
+    json_path: (str) The file to write the results to as JSON. Nothing is
+      profiled if it is empty.
+    report_file: (file) Where to print a report of the results. Defaults to
+      stderr.
+  Yields:
+    (TemplateProfiler) The active profiler, or None.
+  """
+  if not json_path:
+    yield None
+    return
+  profiler = TemplateProfiler()
+  with profiler.Profiling():
+    yield profiler
+  (report_file or sys.stderr).write(profiler.Report() + '\n')
+  with open(json_path, 'w') as f:
+    f.write(profiler.ToJson())
+
+
+def TemplateName(template_path, template_dir):
+  """Returns the name a template is profiled under."""
+  if not template_dir:
+    return template_path
+  return os.path.relpath(template_path, template_dir)
+
+
+class _Frame(object):
+  """A render in progress."""
+
+  __slots__ = ('name', 'start', 'child_seconds')
+
+  def __init__(self, name, start):
+    self.name = name
+    self.start = start
+    self.child_seconds = 0.0
+
+
+class TemplateStats(object):
+  """The totals of one template."""
+
+  def __init__(self, name):
+    self.name = name
+    self.renders = 0
+    self.inclusive_seconds = 0.0
+    self.exclusive_seconds = 0.0
+    self.chars = 0
+
+  def AsDict(self):
+    return {
+        'template': self.name,
+        'renders': self.renders,
+        'inclusive_seconds': self.inclusive_seconds,
+        'exclusive_seconds': self.exclusive_seconds,
+        'chars': self.chars,
+    }
+
+
+class TemplateProfiler(object):
+  """Records the cost of rendering each template.
+
+  A profiler may be active on one thread at a time.
+  """
+
+  SORT_KEYS = ('exclusive_seconds', 'inclusive_seconds', 'renders', 'chars')
+
+  def __init__(self):
+    self._stats = {}
+    self._stack = []
+    self._active_names = {}
+
+  @contextlib.contextmanager
+  def Profiling(self):
+    """Make this the active profiler of the thread, for a with block."""
+    previous = Current()
+    _ACTIVE.profiler = self
+    try:
+      yield self
+    finally:
+      _ACTIVE.profiler = previous
+
+  def CurrentName(self):
+    """Returns the name of the template being rendered, or None."""
+    return self._stack[-1].name if self._stack else None
+
+  def Profile(self, name, render, *args):
+    """Call a render function, recording it as a render of a template.
+
+    Args:
+      name: (str) The template.
+      render: (callable) Renders it, returning its text.
+      *args: The arguments of render.
+    Returns:
+      (unicode) What render returned.
+    """
+    frame = _Frame(name, time.time())
+    self._stack.append(frame)
+    self._active_names[name] = self._active_names.get(name, 0) + 1
+    output = None
+    try:
+      output = render(*args)
+      return output
+    finally:
+      elapsed = time.time() - frame.start
+      self._stack.pop()
+      self._active_names[name] -= 1
+      if self._stack:
+        self._stack[-1].child_seconds += elapsed
+      stats = self._stats.get(name)
+      if stats is None:
+        stats = self._stats[name] = TemplateStats(name)
+      stats.renders += 1
+      stats.exclusive_seconds += elapsed - frame.child_seconds
+      if not self._active_names[name]:
+        stats.inclusive_seconds += elapsed
+      if output:
+        stats.chars += len(output)
+
+  def Stats(self, sort_key='exclusive_seconds'):
+    """Returns the TemplateStats of each template, largest first.
+
+    Args:
+      sort_key: (str) One of SORT_KEYS.
+    Returns:
+      (list) The TemplateStats.
+    """
+    if sort_key not in self.SORT_KEYS:
+      raise ValueError('Unknown sort key: %s' % sort_key)
+    return sorted(self._stats.itervalues(),
+                  key=lambda s: (-getattr(s, sort_key), s.name))
+
+  def Report(self, sort_key='exclusive_seconds', limit=None):
+    """Returns a table of the stats, one template per line.
+
+    Args:
+      sort_key: (str) One of SORT_KEYS.
+      limit: (int) The number of templates to list, or None for all.
+    Returns:
+      (str) The table.
+    """
+    lines = ['%10s %10s %8s %10s  %s' % (
+        'exclusive', 'inclusive', 'renders', 'chars', 'template')]
+    for stats in self.Stats(sort_key)[:limit]:
+      lines.append('%9.3fs %9.3fs %8d %10d  %s' % (
+          stats.exclusive_seconds, stats.inclusive_seconds, stats.renders,
+          stats.chars, stats.name))
+    return '\n'.join(lines)
+
+  def ToJson(self, sort_key='exclusive_seconds'):
+    """Returns the stats as a JSON list, sorted as with Stats."""
+    return json.dumps([stats.AsDict() for stats in self.Stats(sort_key)],
+                      indent=1, sort_keys=True)
@@ -0,0 +1,144 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for template_profiler.py."""
+
+import json
+import os
+import shutil
+import StringIO
+import tempfile
+import time
+
+from google.apputils import basetest
+
+from googleapis.codegen import django_helpers
+from googleapis.codegen import template_helpers
+from googleapis.codegen import template_profiler
+
+
+class TemplateProfilerTest(basetest.TestCase):
+
+  def setUp(self):
+    self._profiler = template_profiler.TemplateProfiler()
+
+  def _Render(self, name, seconds, *children):
+    """Pretends to render a template which calls others."""
+    time.sleep(seconds)
+    output = name
+    for child in children:
+      output += self._profiler.Profile(child[0], self._Render, *child)
+    return output
+
+  def _Stats(self):
+    return dict((stats.name, stats) for stats in self._profiler.Stats())
+
+  def testInclusiveAndExclusiveTime(self):
+    self._profiler.Profile('outer', self._Render, 'outer', 0.03,
+                           ('inner', 0.01), ('inner', 0.01))
+    stats = self._Stats()
+    self.assertEquals(1, stats['outer'].renders)
+    self.assertEquals(2, stats['inner'].renders)
+    self.assertEquals(len('outerinnerinner'), stats['outer'].chars)
+    self.assertEquals(len('inner') * 2, stats['inner'].chars)
+    self.assertGreaterEqual(stats['outer'].inclusive_seconds, 0.05)
+    self.assertLess(stats['outer'].exclusive_seconds,
+                    stats['outer'].inclusive_seconds - 0.015)
+    self.assertAlmostEqual(stats['inner'].inclusive_seconds,
+                           stats['inner'].exclusive_seconds)
+    self.assertEquals(['outer', 'inner'],
+                      [s.name for s in self._profiler.Stats()])
+    self.assertEquals(['inner', 'outer'],
+                      [s.name for s in self._profiler.Stats('renders')])
+
+  def testRecursionCountsOutermostInclusiveTime(self):
+    self._profiler.Profile('node', self._Render, 'node', 0.01,
+                           ('node', 0.01, ('node', 0.01)))
+    stats = self._Stats()['node']
+    self.assertEquals(3, stats.renders)
+    # Counting every level would give about 0.06s.
+    self.assertLess(stats.inclusive_seconds, 0.045)
+    self.assertAlmostEqual(stats.inclusive_seconds, stats.exclusive_seconds,
+                           places=3)
+
+  def testReportAndJson(self):
+    self._profiler.Profile('a.tmpl', self._Render, 'a.tmpl', 0,
+                           ('_b.tmpl', 0))
+    report = self._profiler.Report().splitlines()
+    self.assertEquals(3, len(report))
+    self.assertIn('template', report[0])
+    results = json.loads(self._profiler.ToJson('chars'))
+    self.assertEquals(['a.tmpl', '_b.tmpl'],
+                      [r['template'] for r in results])
+    self.assertEquals(1, results[1]['renders'])
+    self.assertRaises(ValueError, self._profiler.Stats, 'bogus')
+
+
+class ProfilingTemplatesTest(basetest.TestCase):
+
+  def setUp(self):
+    self._template_dir = tempfile.mkdtemp()
+    self._Write('page.tmpl',
+                'a{% call_template _part x=y %}'
+                '{% write path %}{% call_template _part x=y %}{% endwrite %}')
+    self._Write('_part.tmpl', '[{{ x }}]')
+
+  def tearDown(self):
+    shutil.rmtree(self._template_dir)
+
+  def _Write(self, name, content):
+    with open(os.path.join(self._template_dir, name), 'w') as f:
+      f.write(content)
+
+  def _RenderPage(self):
+    written = {}
+
+    def Writer(path, content):
+      written[path] = content
+
+    page = django_helpers.DjangoRenderTemplate(
+        os.path.join(self._template_dir, 'page.tmpl'),
+        {'template_dir': self._template_dir, 'path': 'out', 'y': 'Y',
+         template_helpers.FILE_WRITER: Writer})
+    return page, written
+
+  def testRecordsEachKindOfRender(self):
+    report = StringIO.StringIO()
+    json_path = os.path.join(self._template_dir, 'profile.json')
+    with template_profiler.ProfileTo(json_path, report) as profiler:
+      page, written = self._RenderPage()
+    self.assertIsNone(template_profiler.Current())
+    self.assertEquals('a[Y]', page)
+    self.assertEquals({'out': '[Y]'}, written)
+    stats = dict((s.name, s) for s in profiler.Stats())
+    self.assertEquals(['_part.tmpl', 'page.tmpl', 'page.tmpl:write'],
+                      sorted(stats))
+    self.assertEquals(1, stats['page.tmpl'].renders)
+    self.assertEquals(2, stats['_part.tmpl'].renders)
+    self.assertEquals(1, stats['page.tmpl:write'].renders)
+    self.assertEquals(len('[Y]'), stats['page.tmpl:write'].chars)
+    self.assertIn('page.tmpl:write', report.getvalue())
+    with open(json_path) as f:
+      self.assertEquals(3, len(json.load(f)))
+
+  def testNothingIsRecordedWhenNotAsked(self):
+    with template_profiler.ProfileTo(None) as profiler:
+      self.assertIsNone(profiler)
+      self.assertEquals('a[Y]', self._RenderPage()[0])
+    self.assertIsNone(template_profiler.Current())
+
+
+if __name__ == '__main__':
+  basetest.main()
@@ -0,0 +1,258 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Fetching of discovery documents from a discovery server.
+
+A DiscoveryFetcher keeps, when given a cache directory, the last copy of each
+document it fetched along with its ETag and Last-Modified headers. Later
+fetches of the same document are conditional (If-None-Match and
+If-Modified-Since), so a document which has not changed costs a 304 response
+rather than a transfer.
+
+Connections are kept open between fetches; each thread has its own, since an
+httplib2.Http must not be shared between threads. FetchMany fetches many
+documents at once on a pool of threads.
+
+Layout of a cache directory, for each URL:
+  <sha1 of url>        The body of the last response.
+  <sha1 of url>.json   Its URL and validators.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import Queue
+import tempfile
+import threading
+
+from googleapis.codegen.filesys import files
+
+FetchResult = collections.namedtuple('FetchResult', ['content', 'modified'])
+
+
+class DiscoveryFetchError(Exception):
+  """The discovery server did not return a document."""
+
+  def __init__(self, url, status, message):
+    super(DiscoveryFetchError, self).__init__(
+        '%s: %s %s' % (url, status, message))
+    self.url = url
+    self.status = status
+
+
+class _ResponseCache(object):
+  """The last response for each URL, kept in a directory."""
+
+  def __init__(self, cache_dir):
+    self._cache_dir = cache_dir
+    if not os.path.isdir(cache_dir):
+      os.makedirs(cache_dir)
+
+  def _Path(self, url):
+    return os.path.join(self._cache_dir, hashlib.sha1(url).hexdigest())
+
+  def Get(self, url):
+    """Returns the (validators, content) cached for a URL, or None."""
+    path = self._Path(url)
+    try:
+      validators = json.loads(files.GetFileContents(path + '.json'))
+      content = files.GetFileContents(path)
+    except (files.FileDoesNotExist, ValueError):
+      return None
+    if validators.get('url') != url:
+      return None
+    return validators, content
+
+  def Put(self, url, validators, content):
+    """Cache a response for a URL.
+
+    Args:
+      url: (str) The URL.
+      validators: (dict) The headers to revalidate the response with.
+      content: (str) The body of the response.
+    """
+    path = self._Path(url)
+    # The body goes first, so that the validators never describe a body
+    # which is not there yet.
+    self._WriteFile(path, content)
+    self._WriteFile(path + '.json', json.dumps(dict(validators, url=url)))
+
+  def _WriteFile(self, path, content):
+    fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+      os.rename(temp_path, path)
+    finally:
+      if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+class DiscoveryFetcher(object):
+  """Fetches discovery documents, revalidating cached copies."""
+
+  def __init__(self, server='www.googleapis.com', discovery_version='v1',
+               cache_dir=None, scheme='https', timeout=None):
+    """Construct a DiscoveryFetcher.
+
+    Args:
+      server: (str) The host, and optionally port, of the discovery server.
+      discovery_version: (str) The version of the discovery service.
+      cache_dir: (str) A directory to cache documents in. Nothing is cached
+        if None.
+      scheme: (str) http or https.
+      timeout: (float) Seconds to wait for the server, or None to use the
+        socket default.
+    """
+    self._base_url = '%s://%s/discovery/%s/' % (scheme, server,
+                                                discovery_version)
+    self._cache = _ResponseCache(cache_dir) if cache_dir else None
+    self._timeout = timeout
+    self._local = threading.local()
+    self._lock = threading.Lock()
+    self.fetched = 0
+    self.not_modified = 0
+
+  def ApiUrl(self, api_name, api_version):
+    """Returns the URL of the discovery document of an API."""
+    return '%sapis/%s/%s/rest' % (self._base_url, api_name, api_version)
+
+  def DirectoryUrl(self, preferred_only=False):
+    """Returns the URL of the directory of the APIs on the server."""
+    url = '%sapis' % self._base_url
+    if preferred_only:
+      url += '?preferred=true'
+    return url
+
+  def _Http(self):
+    http = getattr(self._local, 'http', None)
+    if http is None:
+      # Only needed when fetching, so keep it out of the startup path.
+      import httplib2  # pylint: disable=g-import-not-at-top
+      http = httplib2.Http(timeout=self._timeout)
+      self._local.http = http
+    return http
+
+  def Fetch(self, url):
+    """Fetch a document, revalidating the cached copy if there is one.
+
+    Args:
+      url: (str) The URL.
+    Returns:
+      (FetchResult) The content, and whether it differs from the cached copy.
+      Content which was not cached before counts as modified.
+    Raises:
+      DiscoveryFetchError: If the server answers with an error.
+    """
+    cached = self._cache.Get(url) if self._cache else None
+    headers = {}
+    if cached:
+      validators = cached[0]
+      if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+      if validators.get('last-modified'):
+        headers['If-Modified-Since'] = validators['last-modified']
+    response, content = self._Http().request(url, headers=headers)
+    if response.status == 304 and cached:
+      with self._lock:
+        self.not_modified += 1
+      return FetchResult(cached[1], False)
+    if response.status != 200:
+      raise DiscoveryFetchError(url, response.status, _ErrorMessage(content))
+    with self._lock:
+      self.fetched += 1
+    if self._cache:
+      self._cache.Put(url, dict((name, response[name]) for name in
+                                ('etag', 'last-modified') if name in response),
+                      content)
+    return FetchResult(content, not cached or cached[1] != content)
+
+  def FetchApi(self, api_name, api_version):
+    """Fetch the discovery document of an API.
+
+    Args:
+      api_name: (str) The name of the API, e.g. "plus".
+      api_version: (str) The version of the API, e.g. "v1".
+    Returns:
+      (FetchResult) The document.
+    Raises:
+      DiscoveryFetchError: If the server answers with an error.
+    """
+    return self.Fetch(self.ApiUrl(api_name, api_version))
+
+  def ListApis(self, preferred_only=False):
+    """List the APIs on the server.
+
+    Args:
+      preferred_only: (bool) Only list the preferred version of each API.
+    Returns:
+      (list) (name, version) of each API.
+    Raises:
+      DiscoveryFetchError: If the server answers with an error.
+    """
+    directory = json.loads(self.Fetch(
+        self.DirectoryUrl(preferred_only)).content)
+    return [(item['name'], item['version'])
+            for item in directory.get('items', [])]
+
+  def FetchMany(self, apis, threads=8):
+    """Fetch the discovery documents of many APIs at once.
+
+    Args:
+      apis: (list) (name, version) of each API.
+      threads: (int) How many documents to fetch at the same time.
+    Returns:
+      (dict, dict) The FetchResult of each API which was fetched, and the
+      DiscoveryFetchError (or other exception) of each which was not, both
+      by (name, version).
+    """
+    work = Queue.Queue()
+    for api in apis:
+      work.put(api)
+    results = {}
+    errors = {}
+
+    def Work():
+      while True:
+        try:
+          api = work.get_nowait()
+        except Queue.Empty:
+          return
+        try:
+          results[api] = self.FetchApi(*api)
+        except Exception as e:  # pylint: disable=broad-except
+          logging.warning('Fetching %s %s failed: %s', api[0], api[1], e)
+          errors[api] = e
+
+    workers = [threading.Thread(target=Work)
+               for _ in range(max(1, min(threads, len(apis))))]
+    for worker in workers:
+      worker.start()
+    for worker in workers:
+      worker.join()
+    return results, errors
+
+
+def _ErrorMessage(content):
+  """Returns the message of a discovery error response."""
+  try:
+    error = json.loads(content).get('error')
+  except (ValueError, AttributeError):
+    return content[:200]
+  if isinstance(error, dict):
+    return error.get('message', error)
+  return error
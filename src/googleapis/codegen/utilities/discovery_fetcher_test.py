@@ -0,0 +1,158 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for discovery_fetcher.py, against a stand-in discovery server."""
+
+import BaseHTTPServer
+import hashlib
+import json
+import os
+import shutil
+import SocketServer
+import tempfile
+import threading
+
+from google.apputils import basetest
+
+from googleapis.codegen import fetch_discovery
+from googleapis.codegen.utilities import discovery_fetcher
+
+
+class _StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """Serves the documents of the server, with ETags."""
+
+  protocol_version = 'HTTP/1.1'
+
+  def do_GET(self):  # pylint: disable=g-bad-name
+    self.server.requests.append(self.path)
+    content = self.server.documents.get(self.path)
+    if content is None:
+      self._Respond(404, json.dumps({'error': {'message': 'Not found'}}))
+      return
+    etag = '"%s"' % hashlib.sha1(content).hexdigest()
+    if self.headers.get('If-None-Match') == etag:
+      self._Respond(304, '', etag)
+      return
+    self.server.transfers += 1
+    self._Respond(200, content, etag)
+
+  def _Respond(self, code, body, etag=None):
+    self.send_response(code)
+    if etag:
+      self.send_header('ETag', etag)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *unused_args):  # pylint: disable=g-bad-name
+    pass
+
+
+class _StandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  # Fetchers keep their connections open.
+  daemon_threads = True
+
+
+class DiscoveryFetcherTest(basetest.TestCase):
+
+  def setUp(self):
+    self._cache_dir = tempfile.mkdtemp()
+    self._server = _StandInServer(('localhost', 0), _StandInHandler)
+    self._server.requests = []
+    self._server.transfers = 0
+    self._server.documents = {
+        '/discovery/v1/apis': json.dumps({'items': [
+            {'name': 'plus', 'version': 'v1'},
+            {'name': 'drive', 'version': 'v2'},
+            {'name': 'gone', 'version': 'v1'}]}),
+        '/discovery/v1/apis/plus/v1/rest': '{"name": "plus"}',
+        '/discovery/v1/apis/drive/v2/rest': '{"name": "drive"}',
+    }
+    thread = threading.Thread(target=self._server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+  def tearDown(self):
+    self._server.shutdown()
+    self._server.server_close()
+    shutil.rmtree(self._cache_dir)
+
+  def _Fetcher(self, cache_dir=None):
+    return discovery_fetcher.DiscoveryFetcher(
+        server='localhost:%d' % self._server.server_address[1],
+        cache_dir=cache_dir, scheme='http')
+
+  def testUnchangedDocumentIsNotTransferredAgain(self):
+    result = self._Fetcher(self._cache_dir).FetchApi('plus', 'v1')
+    self.assertEquals(('{"name": "plus"}', True), result)
+
+    fetcher = self._Fetcher(self._cache_dir)
+    result = fetcher.FetchApi('plus', 'v1')
+    self.assertEquals(('{"name": "plus"}', False), result)
+    self.assertEquals((0, 1), (fetcher.fetched, fetcher.not_modified))
+    self.assertEquals(1, self._server.transfers)
+
+    self._server.documents['/discovery/v1/apis/plus/v1/rest'] = '{}'
+    self.assertEquals(('{}', True), fetcher.FetchApi('plus', 'v1'))
+    self.assertEquals(2, self._server.transfers)
+
+  def testWithoutCache(self):
+    fetcher = self._Fetcher()
+    fetcher.FetchApi('plus', 'v1')
+    fetcher.FetchApi('plus', 'v1')
+    self.assertEquals(2, self._server.transfers)
+
+  def testError(self):
+    fetcher = self._Fetcher(self._cache_dir)
+    try:
+      fetcher.FetchApi('gone', 'v1')
+      self.fail('DiscoveryFetchError not raised')
+    except discovery_fetcher.DiscoveryFetchError as e:
+      self.assertEquals(404, e.status)
+      self.assertIn('Not found', str(e))
+
+  def testFetchMany(self):
+    fetcher = self._Fetcher(self._cache_dir)
+    apis = fetcher.ListApis()
+    self.assertEquals([('plus', 'v1'), ('drive', 'v2'), ('gone', 'v1')], apis)
+    results, errors = fetcher.FetchMany(apis, threads=2)
+    self.assertEquals('{"name": "drive"}', results[('drive', 'v2')].content)
+    self.assertEquals(2, len(results))
+    self.assertEquals([('gone', 'v1')], errors.keys())
+
+    results, errors = self._Fetcher(self._cache_dir).FetchMany(apis)
+    self.assertFalse(any(result.modified for result in results.values()))
+    # The directory and the two documents.
+    self.assertEquals(3, self._server.transfers)
+
+  def testMirrorWritesOnlyChangedDocuments(self):
+    mirror_dir = os.path.join(self._cache_dir, 'mirror')
+    written, errors = fetch_discovery.Mirror(
+        self._Fetcher(os.path.join(self._cache_dir, 'cache')), mirror_dir)
+    self.assertEquals(['drive.v2.json', 'plus.v1.json'],
+                      [os.path.basename(path) for path in written])
+    self.assertEquals([('gone', 'v1')], errors.keys())
+
+    self._server.documents['/discovery/v1/apis/plus/v1/rest'] = '{}'
+    written, _ = fetch_discovery.Mirror(
+        self._Fetcher(os.path.join(self._cache_dir, 'cache')), mirror_dir,
+        apis=[('plus', 'v1'), ('drive', 'v2')])
+    self.assertEquals([os.path.join(mirror_dir, 'plus.v1.json')], written)
+    with open(written[0]) as f:
+      self.assertEquals('{}', f.read())
+
+
+if __name__ == '__main__':
+  basetest.main()
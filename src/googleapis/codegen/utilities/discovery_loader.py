@@ -0,0 +1,210 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Fast loading of discovery documents.
+
+Discovery documents must be read preserving the declaration order of their
+members, because some of that order (e.g. optional method parameters) shows
+up in the generated code. collections.OrderedDict does that, but it is
+implemented in Python and is several times slower to build and larger than a
+plain dict.
+
+This module decodes JSON into OrderedJsonDict, a dict which keeps a list of
+its keys on the side. It is built with a single C level update, so it costs
+little more than a plain dict. While decoding, the keys and the values of
+members which repeat throughout discovery ('type', 'format', '$ref', ...) are
+interned, so that each distinct string is only held once.
+"""
+
+import copy
+import json
+
+
+# Members whose (string) values repeat throughout a discovery document.
+_INTERNED_VALUE_KEYS = frozenset([
+    '$ref',
+    'default',
+    'format',
+    'httpMethod',
+    'location',
+    'maximum',
+    'minimum',
+    'pattern',
+    'type',
+    ])
+
+
+class OrderedJsonDict(dict):
+  """A dict which iterates over its keys in insertion order."""
+
+  __slots__ = ('_keys',)
+
+  def __init__(self, pairs=()):
+    """Construct an OrderedJsonDict.
+
+    Args:
+      pairs: (list) (key, value) tuples, or a dict, to initialize from.
+    """
+    if isinstance(pairs, dict):
+      pairs = pairs.items()
+    elif not isinstance(pairs, list):
+      pairs = list(pairs)
+    dict.__init__(self, pairs)
+    keys = [k for k, _ in pairs]
+    if len(keys) != len(self):
+      # Duplicate keys. Keep the position of the first occurrence.
+      seen = set()
+      keys = [k for k in keys if not (k in seen or seen.add(k))]
+    self._keys = keys
+
+  def __setitem__(self, key, value):
+    if key not in self:
+      self._keys.append(key)
+    dict.__setitem__(self, key, value)
+
+  def __delitem__(self, key):
+    dict.__delitem__(self, key)
+    self._keys.remove(key)
+
+  def __iter__(self):
+    return iter(self._keys)
+
+  def __reversed__(self):
+    return reversed(self._keys)
+
+  def __repr__(self):
+    return '%s(%r)' % (self.__class__.__name__, self.items())
+
+  def __reduce__(self):
+    return (self.__class__, (self.items(),))
+
+  def __copy__(self):
+    return self.__class__(self.items())
+
+  def __deepcopy__(self, memo):
+    result = self.__class__.__new__(self.__class__)
+    memo[id(self)] = result
+    deepcopy = copy.deepcopy
+    getitem = dict.__getitem__
+    for k in self._keys:
+      dict.__setitem__(result, k, deepcopy(getitem(self, k), memo))
+    result._keys = list(self._keys)  # pylint: disable=protected-access
+    return result
+
+  def keys(self):
+    return list(self._keys)
+
+  def iterkeys(self):
+    return iter(self._keys)
+
+  def values(self):
+    getitem = dict.__getitem__
+    return [getitem(self, k) for k in self._keys]
+
+  def itervalues(self):
+    getitem = dict.__getitem__
+    return (getitem(self, k) for k in self._keys)
+
+  def items(self):
+    getitem = dict.__getitem__
+    return [(k, getitem(self, k)) for k in self._keys]
+
+  def iteritems(self):
+    getitem = dict.__getitem__
+    return ((k, getitem(self, k)) for k in self._keys)
+
+  def copy(self):
+    return self.__copy__()
+
+  def clear(self):
+    dict.clear(self)
+    del self._keys[:]
+
+  def pop(self, key, *default):
+    if key in self:
+      self._keys.remove(key)
+    return dict.pop(self, key, *default)
+
+  def popitem(self):
+    if not self._keys:
+      raise KeyError('dictionary is empty')
+    key = self._keys.pop()
+    return key, dict.pop(self, key)
+
+  def setdefault(self, key, default=None):
+    if key not in self:
+      self[key] = default
+    return dict.__getitem__(self, key)
+
+  def update(self, *args, **kw):
+    for other in args + (kw,):
+      if hasattr(other, 'keys'):
+        for k in other.keys():
+          self[k] = other[k]
+      else:
+        for k, v in other:
+          self[k] = v
+
+
+def _MakeObjectPairsHook():
+  """Returns a json object_pairs_hook which interns as it builds dicts."""
+  memo = {}
+  intern_string = memo.setdefault
+  interned_value_keys = _INTERNED_VALUE_KEYS
+
+  def ObjectPairsHook(pairs):
+    items = []
+    for k, v in pairs:
+      k = intern_string(k, k)
+      if k in interned_value_keys and isinstance(v, basestring):
+        v = intern_string(v, v)
+      items.append((k, v))
+    return OrderedJsonDict(items)
+
+  return ObjectPairsHook
+
+
+def Loads(content):
+  """Load a discovery document from a string.
+
+  Args:
+    content: (str|unicode) The JSON text of the document.
+  Returns:
+    (OrderedJsonDict) The decoded document.
+  """
+  return json.loads(content, object_pairs_hook=_MakeObjectPairsHook())
+
+
+def Load(fp):
+  """Load a discovery document from a file.
+
+  Args:
+    fp: (file) A fileish object.
+  Returns:
+    (OrderedJsonDict) The decoded document.
+  """
+  return Loads(fp.read())
+
+
+def LoadFile(path):
+  """Load a discovery document from a path.
+
+  Args:
+    path: (str) Path to the document.
+  Returns:
+    (OrderedJsonDict) The decoded document.
+  """
+  with open(path, 'rb') as f:
+    return Load(f)
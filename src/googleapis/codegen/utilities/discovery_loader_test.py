@@ -0,0 +1,77 @@
+#!/usr/bin/python2.7
+"""Tests for discovery_loader.py."""
+
+import copy
+import os
+import pickle
+import tempfile
+
+from google.apputils import basetest
+
+from googleapis.codegen.utilities import discovery_loader
+
+
+class DiscoveryLoaderTest(basetest.TestCase):
+
+  DOC = """
+    {"name": "fake",
+     "parameters": {
+       "zeta": {"type": "string", "location": "query"},
+       "alpha": {"type": "string", "location": "query"},
+       "mu": {"type": "integer", "format": "int32", "location": "path"}
+     }
+    }
+    """
+
+  def testPreservesOrder(self):
+    doc = discovery_loader.Loads(self.DOC)
+    self.assertEquals(['name', 'parameters'], doc.keys())
+    self.assertEquals(['zeta', 'alpha', 'mu'], list(doc['parameters']))
+    self.assertEquals(['zeta', 'alpha', 'mu'],
+                      [k for k, _ in doc['parameters'].iteritems()])
+
+  def testInternsKeysAndValues(self):
+    params = discovery_loader.Loads(self.DOC)['parameters']
+    zeta_keys = dict((k, k) for k in params['zeta'])
+    alpha_keys = dict((k, k) for k in params['alpha'])
+    self.assertIs(zeta_keys['type'], alpha_keys['type'])
+    self.assertIs(params['zeta']['type'], params['alpha']['type'])
+    self.assertIs(params['zeta']['location'], params['alpha']['location'])
+
+  def testMutationKeepsOrder(self):
+    d = discovery_loader.OrderedJsonDict([('b', 1), ('a', 2)])
+    d['c'] = 3
+    d['b'] = 4
+    del d['a']
+    self.assertEquals([('b', 4), ('c', 3)], d.items())
+    self.assertEquals(3, d.pop('c'))
+    d.setdefault('z', 0)
+    d.update([('y', 1)])
+    self.assertEquals(['b', 'z', 'y'], d.keys())
+
+  def testDuplicateKeys(self):
+    doc = discovery_loader.Loads('{"a": 1, "b": 2, "a": 3}')
+    self.assertEquals([('a', 3), ('b', 2)], doc.items())
+
+  def testCopyAndPickle(self):
+    doc = discovery_loader.Loads(self.DOC)
+    for clone in (copy.deepcopy(doc), pickle.loads(pickle.dumps(doc, 2))):
+      self.assertEquals(doc, clone)
+      self.assertEquals(['zeta', 'alpha', 'mu'], clone['parameters'].keys())
+    deep = copy.deepcopy(doc)
+    self.assertIsNot(doc['parameters'], deep['parameters'])
+    self.assertIs(doc['parameters'], copy.copy(doc)['parameters'])
+
+  def testLoadFile(self):
+    fd, path = tempfile.mkstemp()
+    try:
+      os.write(fd, self.DOC)
+      os.close(fd)
+      self.assertEquals(discovery_loader.Loads(self.DOC),
+                        discovery_loader.LoadFile(path))
+    finally:
+      os.remove(path)
+
+
+if __name__ == '__main__':
+  basetest.main()
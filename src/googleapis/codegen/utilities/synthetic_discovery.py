@@ -0,0 +1,330 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Synthetic discovery documents of any size, for scale testing.
+
+MakeDiscoveryDocument builds a valid discovery document from a seed and a few
+size knobs. The same seed and knobs always give the same document, so the
+documents can be regenerated rather than checked in, and a series of them
+with one knob growing gives a scaling curve.
+
+The schemas refer to each other at random, cycles included, through plain
+references, arrays and maps. Properties are primitives, enums, references or
+inline objects nested down to a given depth. Variant schemas follow the form
+of Geometry in kitchen_sink.json. Resources nest, and each has the usual
+get/list/insert/update/patch/delete methods, then custom ones.
+"""
+
+import collections
+import random
+
+# Property kinds and the share of properties of each kind. Inline objects are
+# only used above the nesting depth.
+_PROPERTY_KINDS = (
+    ('string', 4),
+    ('integer', 2),
+    ('int64', 1),
+    ('number', 1),
+    ('boolean', 1),
+    ('date-time', 1),
+    ('enum', 1),
+    ('ref', 3),
+    ('ref_array', 2),
+    ('string_array', 1),
+    ('ref_map', 1),
+    ('object', 2),
+)
+
+_PARAMETER_KINDS = ('string', 'integer', 'boolean', 'enum', 'repeated')
+
+# The standard methods and their HTTP methods, before custom ones.
+_STANDARD_METHODS = (
+    ('get', 'GET'),
+    ('list', 'GET'),
+    ('insert', 'POST'),
+    ('update', 'PUT'),
+    ('patch', 'PATCH'),
+    ('delete', 'DELETE'),
+)
+
+_SCOPE = 'https://www.googleapis.com/auth/synthetic'
+_READONLY_SCOPE = _SCOPE + '.readonly'
+
+
+def MakeDiscoveryDocument(seed=0, schemas=50, properties=10, depth=2,
+                          resources=10, resource_depth=2, methods=8,
+                          parameters=4, enum_size=8, variants=2,
+                          variant_types=3, name='synthetic'):
+  """Build a synthetic discovery document.
+
+  Args:
+    seed: (int) Seeds the choices; equal arguments give equal documents.
+    schemas: (int) The number of top level object schemas.
+    properties: (int) The number of properties of each of them.
+    depth: (int) How deep inline object properties nest.
+    resources: (int) The number of top level resources.
+    resource_depth: (int) How deep resources nest. Each resource above this
+      depth has one sub resource.
+    methods: (int) The number of methods of each resource.
+    parameters: (int) The number of query parameters of each method.
+    enum_size: (int) The number of values of each enum.
+    variants: (int) The number of variant schemas.
+    variant_types: (int) The number of subtypes of each variant schema.
+    name: (str) The name of the API.
+  Returns:
+    (OrderedDict) The discovery document, ready for json.dump.
+  """
+  return _Builder(random.Random(seed), properties, depth, methods,
+                  parameters, enum_size).Build(
+                      name, schemas, resources, resource_depth, variants,
+                      variant_types)
+
+
+class _Builder(object):
+  """Builds the parts of one synthetic document."""
+
+  def __init__(self, rng, properties, depth, methods, parameters, enum_size):
+    self._rng = rng
+    self._properties = properties
+    self._depth = depth
+    self._methods = methods
+    self._parameters = parameters
+    self._enum_size = max(1, enum_size)
+    self._ref_names = []
+    self._kinds = []
+    for kind, share in _PROPERTY_KINDS:
+      self._kinds.extend([kind] * share)
+
+  def Build(self, name, schemas, resources, resource_depth, variants,
+            variant_types):
+    """Returns the whole document; see MakeDiscoveryDocument."""
+    schema_names = ['Schema%d' % i for i in xrange(max(1, schemas))]
+    variant_names = ['Variant%d' % i for i in xrange(variants)]
+    self._ref_names = schema_names + variant_names
+    doc = collections.OrderedDict()
+    doc['kind'] = 'discovery#restDescription'
+    doc['discoveryVersion'] = 'v1'
+    doc['id'] = '%s:v1' % name
+    doc['name'] = name
+    doc['version'] = 'v1'
+    doc['revision'] = '20160101'
+    doc['title'] = 'Synthetic API'
+    doc['description'] = 'A synthetic API for scale testing.'
+    doc['ownerDomain'] = 'google.com'
+    doc['ownerName'] = 'Google'
+    doc['protocol'] = 'rest'
+    doc['rootUrl'] = 'https://www.googleapis.com/'
+    doc['servicePath'] = '%s/v1/' % name
+    doc['batchPath'] = 'batch'
+    doc['parameters'] = collections.OrderedDict([
+        ('alt', {'type': 'string', 'description': 'Data format.',
+                 'default': 'json', 'enum': ['json'],
+                 'enumDescriptions': ['Responses with JSON.'],
+                 'location': 'query'}),
+        ('fields', {'type': 'string', 'location': 'query',
+                    'description': 'Selector of the fields to include.'}),
+        ('prettyPrint', {'type': 'boolean', 'default': 'true',
+                         'location': 'query',
+                         'description': 'Whether to indent responses.'}),
+    ])
+    doc['auth'] = {'oauth2': {'scopes': collections.OrderedDict([
+        (_SCOPE, {'description': 'Manage your synthetic data'}),
+        (_READONLY_SCOPE, {'description': 'View your synthetic data'}),
+    ])}}
+
+    all_schemas = collections.OrderedDict()
+    for schema_name in schema_names:
+      all_schemas[schema_name] = self._Schema(schema_name)
+    for variant_name in variant_names:
+      all_schemas.update(self._Variant(variant_name, variant_types))
+    doc['schemas'] = all_schemas
+
+    doc['resources'] = collections.OrderedDict()
+    for i in xrange(resources):
+      resource_name = 'resource%d' % i
+      doc['resources'][resource_name] = self._Resource(
+          name, [resource_name], resource_depth)
+    return doc
+
+  def _Description(self, what):
+    return 'The %s.' % what
+
+  def _Schema(self, schema_name):
+    schema = collections.OrderedDict()
+    schema['id'] = schema_name
+    schema['type'] = 'object'
+    schema['description'] = self._Description(schema_name)
+    schema['properties'] = self._Properties(self._properties, 0)
+    return schema
+
+  def _Properties(self, count, level):
+    props = collections.OrderedDict()
+    # Nested properties are named for their level, so that the classes made
+    # of inline objects never share the name of the class they are in.
+    prefix = 'level%dField' % level if level else 'field'
+    for i in xrange(count):
+      props['%s%d' % (prefix, i)] = self._Property(level)
+    return props
+
+  def _Property(self, level):
+    """Returns a property, which is an object if level allows."""
+    kind = self._rng.choice(self._kinds)
+    while kind == 'object' and level >= self._depth:
+      kind = self._rng.choice(self._kinds)
+    prop = collections.OrderedDict()
+    if kind in ('ref', 'ref_array', 'ref_map'):
+      ref = {'$ref': self._rng.choice(self._ref_names)}
+      if kind == 'ref':
+        prop.update(ref)
+      elif kind == 'ref_array':
+        prop['type'] = 'array'
+        prop['items'] = ref
+      else:
+        prop['type'] = 'object'
+        prop['additionalProperties'] = ref
+    elif kind == 'object':
+      prop['type'] = 'object'
+      prop['properties'] = self._Properties(max(2, self._properties // 2),
+                                            level + 1)
+    elif kind == 'string_array':
+      prop['type'] = 'array'
+      prop['items'] = {'type': 'string'}
+    elif kind == 'enum':
+      prop['type'] = 'string'
+      prop['enum'], prop['enumDescriptions'] = self._Enum()
+    elif kind in ('int64', 'date-time'):
+      prop['type'] = 'string'
+      prop['format'] = kind
+    elif kind == 'integer':
+      prop['type'] = 'integer'
+      prop['format'] = 'int32'
+    elif kind == 'number':
+      prop['type'] = 'number'
+      prop['format'] = 'double'
+    else:
+      prop['type'] = kind
+    prop['description'] = self._Description('%s value' % kind)
+    return prop
+
+  def _Enum(self):
+    values = ['VALUE_%d' % i for i in xrange(self._enum_size)]
+    return values, ['Means %s.' % value for value in values]
+
+  def _Variant(self, base_name, types):
+    """Returns the base schema of a variant and its subtypes, by name."""
+    result = collections.OrderedDict()
+    subtype_names = ['%sType%d' % (base_name, i) for i in xrange(types)]
+    result[base_name] = collections.OrderedDict([
+        ('id', base_name),
+        ('type', 'object'),
+        ('description', self._Description(base_name)),
+        ('variant', {
+            'discriminant': 'type',
+            'map': [{'type_value': 'TYPE_%d' % i, '$ref': subtype_name}
+                    for i, subtype_name in enumerate(subtype_names)]}),
+    ])
+    for i, subtype_name in enumerate(subtype_names):
+      props = collections.OrderedDict([
+          ('type', {'type': 'string', 'enum': ['TYPE_%d' % i],
+                    'description': 'The discriminant.'}),
+          ('parent', {'$ref': base_name}),
+      ])
+      props.update(self._Properties(max(1, self._properties // 2), 0))
+      result[subtype_name] = collections.OrderedDict([
+          ('id', subtype_name),
+          ('type', 'object'),
+          ('properties', props),
+      ])
+    return result
+
+  def _Resource(self, api_name, path, levels):
+    """Returns a resource, and the resources nested in it.
+
+    Args:
+      api_name: (str) The name of the API, for method ids.
+      path: (list) The names of this resource and those it is nested in.
+      levels: (int) How many levels of resources, this one included.
+    Returns:
+      (OrderedDict) The resource.
+    """
+    resource = collections.OrderedDict()
+    url_path = '/'.join('%s/{%sId}' % (part, part) for part in path[:-1])
+    if url_path:
+      url_path += '/'
+    url_path += path[-1]
+    resource['methods'] = collections.OrderedDict()
+    for i in xrange(self._methods):
+      if i < len(_STANDARD_METHODS):
+        method_name, http_method = _STANDARD_METHODS[i]
+      else:
+        method_name, http_method = 'action%d' % i, 'POST'
+      resource['methods'][method_name] = self._Method(
+          '.'.join([api_name] + path + [method_name]), path, url_path,
+          method_name, http_method)
+    if levels > 1:
+      child = 'child%d' % len(path)
+      resource['resources'] = {
+          child: self._Resource(api_name, path + [child], levels - 1)}
+    return resource
+
+  def _Method(self, method_id, path, url_path, method_name, http_method):
+    """Returns a method of a resource."""
+    method = collections.OrderedDict()
+    method['id'] = method_id
+    path_params = ['%sId' % part for part in path[:-1]]
+    if method_name not in ('list', 'insert'):
+      path_params.append('%sId' % path[-1])
+      url_path += '/{%s}' % path_params[-1]
+    if method_name.startswith('action'):
+      url_path += ':%s' % method_name
+    method['path'] = url_path
+    method['httpMethod'] = http_method
+    method['description'] = self._Description('%s method' % method_name)
+    params = collections.OrderedDict()
+    for param in path_params:
+      params[param] = {'type': 'string', 'required': True,
+                       'location': 'path',
+                       'description': self._Description(param)}
+    for i in xrange(self._parameters):
+      params['param%d' % i] = self._Parameter()
+    method['parameters'] = params
+    if path_params:
+      method['parameterOrder'] = path_params
+    if http_method in ('POST', 'PUT', 'PATCH'):
+      method['request'] = {'$ref': self._rng.choice(self._ref_names)}
+    if http_method != 'DELETE':
+      method['response'] = {'$ref': self._rng.choice(self._ref_names)}
+    method['scopes'] = ([_SCOPE, _READONLY_SCOPE] if http_method == 'GET'
+                        else [_SCOPE])
+    return method
+
+  def _Parameter(self):
+    kind = self._rng.choice(_PARAMETER_KINDS)
+    param = collections.OrderedDict()
+    param['location'] = 'query'
+    if kind == 'integer':
+      param['type'] = 'integer'
+      param['format'] = 'int32'
+      param['minimum'] = '0'
+    elif kind == 'boolean':
+      param['type'] = 'boolean'
+    else:
+      param['type'] = 'string'
+      if kind == 'enum':
+        param['enum'], param['enumDescriptions'] = self._Enum()
+      elif kind == 'repeated':
+        param['repeated'] = True
+    param['description'] = self._Description('%s parameter' % kind)
+    return param
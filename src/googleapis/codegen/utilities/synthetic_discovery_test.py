@@ -0,0 +1,74 @@
+#!/usr/bin/python2.7
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Tests for synthetic_discovery.py."""
+
+import json
+
+from google.apputils import basetest
+
+from googleapis.codegen import api
+from googleapis.codegen.utilities import discovery_loader
+from googleapis.codegen.utilities import synthetic_discovery
+
+
+def _Api(doc):
+  return api.Api(discovery_loader.Loads(json.dumps(doc)))
+
+
+class SyntheticDiscoveryTest(basetest.TestCase):
+
+  def testSameSeedGivesSameDocument(self):
+    self.assertEquals(
+        json.dumps(synthetic_discovery.MakeDiscoveryDocument(seed=7)),
+        json.dumps(synthetic_discovery.MakeDiscoveryDocument(seed=7)))
+    self.assertNotEquals(
+        json.dumps(synthetic_discovery.MakeDiscoveryDocument(seed=7)),
+        json.dumps(synthetic_discovery.MakeDiscoveryDocument(seed=8)))
+
+  def testKnobsSetTheSize(self):
+    doc = synthetic_discovery.MakeDiscoveryDocument(
+        schemas=5, properties=3, depth=1, resources=2, resource_depth=3,
+        methods=7, parameters=2, enum_size=4, variants=1, variant_types=2)
+    # 5 schemas, plus a variant base and its 2 subtypes.
+    self.assertEquals(8, len(doc['schemas']))
+    self.assertEquals(3, len(doc['schemas']['Schema0']['properties']))
+    self.assertEquals(2, len(doc['resources']))
+    child = doc['resources']['resource0']['resources']['child1']
+    grandchild = child['resources']['child2']
+    self.assertNotIn('resources', grandchild)
+    self.assertEquals(7, len(grandchild['methods']))
+    self.assertEquals(
+        'resource0/{resource0Id}/child1/{child1Id}/child2/{child2Id}',
+        grandchild['methods']['get']['path'])
+    self.assertEquals(
+        'resource0/{resource0Id}/child1/{child1Id}/child2/{child2Id}:action6',
+        grandchild['methods']['action6']['path'])
+    self.assertEquals(
+        ['resource0Id', 'child1Id', 'child2Id'],
+        grandchild['methods']['get']['parameterOrder'])
+
+  def testBuildsAnApi(self):
+    doc = synthetic_discovery.MakeDiscoveryDocument(
+        schemas=20, properties=8, depth=3, resources=3, variants=2)
+    the_api = _Api(doc)
+    self.assertEquals('synthetic', the_api.values['name'])
+    self.assertIn('Schema19', the_api.all_schemas)
+    self.assertIn('Variant1Type2', the_api.all_schemas)
+    self.assertEquals(3 * 2 * 8, len(the_api.all_methods))
+
+
+if __name__ == '__main__':
+  basetest.main()